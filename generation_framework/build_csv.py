@@ -8,9 +8,12 @@ import time
 import re
 import subprocess
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, Future
 import json
 from typing import List
 import sys
+import traceback
+import psutil
 
 # The following allows for an absolute import from an adjacent script directory--i.e., up and over instead of down.
 # Find the absolute path.
@@ -23,6 +26,12 @@ import ubkg_logging as ulog
 import ubkg_subprocess as usub
 # config file
 import ubkg_config as uconfig
+# OCTOBER 2026 - build journal
+import ubkg_build_journal as ujournal
+# OCTOBER 2026 - cache of the Relations Ontology
+import ubkg_ro as uro
+# OCTOBER 2026 - manifest of the inputs to OWLNETS files
+import ubkg_owlnets_manifest as umanifest
 
 
 # TODO: make these optional parameters and print them out when --verbose
@@ -33,6 +42,22 @@ VALIDATION_SCRIPT: str = './blackbox_validation/__main__.py'
 # JAS 16 Mar 2023 renamed folder to OWLNETS-UMLS-GRAPH script.
 UMLS_GRAPH_SCRIPT: str = './owlnets_umls_graph/OWLNETS-UMLS-GRAPH-12.py'
 
+# OCTOBER 2026
+# Sources for which the build writes to the ontology CSVs, and so is never run in parallel with other sources.
+SERIAL_BUILD_SABS: List[str] = ['UMLS']
+# OCTOBER 2026
+# Values of the owlnets_mode key in ontologies.json. In the streaming mode, the owlnets_script writes the OWLNETS
+# files by streaming the OWL file instead of parsing it into an rdflib Graph. (See ubkg_owl_stream.py.)
+OWLNETS_MODES: List[str] = ['rdflib', 'streaming']
+# OCTOBER 2026
+# Files of the conversion of OWL files to OWLNETS files. A change to any of these files invalidates the OWLNETS
+# manifests of all SABs. (See ubkg_owlnets_manifest.py.)
+OWLNETS_CONVERTER_FILES: List[str] = [OWLNETS_SCRIPT, FIX_OWLNETS_TSV_SCRIPT,
+                                      './ubkg_utilities/ubkg_extract.py',
+                                      './ubkg_utilities/ubkg_owl_metadata.py',
+                                      './ubkg_utilities/ubkg_owl_stream.py',
+                                      './ubkg_utilities/ubkg_graph_cache.py']
+
 # This one needs processing (see https://robot.obolibrary.org/merge ) to include references...
 # UBERON_EXT_OWL_URL: str = 'http://purl.obolibrary.org/obo/uberon/ext.owl'
 
@@ -119,6 +144,25 @@ parser.add_argument("-S", "--skipValidation", action="store_true",
                     help='skip all validation')
 parser.add_argument("-v", "--verbose", action="store_true",
                     help='increase output verbosity')
+# OCTOBER 2026
+parser.add_argument("-C", "--csv_cache", action="store_true",
+                    help='read the ontology CSVs through a columnar cache (requires pyarrow)')
+parser.add_argument("-j", "--jobs", type=int, default=1,
+                    help='number of source builds (e.g., PheKnowLator runs, execute scripts) to run in parallel')
+parser.add_argument("-i", "--in_process", action="store_true",
+                    help='run the OWLNETS-UMLS-GRAPH script in this process, keeping the ontology CSVs in memory '
+                         'between ontologies')
+parser.add_argument("-r", "--resume", action="store_true",
+                    help='resume a build that failed, from the ontology after the last one that completed in the '
+                         'build journal')
+parser.add_argument("-k", "--code_cache", action="store_true",
+                    help='save the codes converted for each ontology in the ontology CSV directory, so that later '
+                         'ontologies do not convert them again')
+parser.add_argument("-R", "--ro_offline", action="store_true",
+                    help='use the local cache of the Relations Ontology (ro_cache) without checking for changes')
+parser.add_argument("-b", "--build_unchanged", action="store_true",
+                    help='convert OWL files to OWLNETS files even if the OWLNETS manifest shows that the OWL file, '
+                         'the ontologies.json entry and the converter are unchanged')
 # JAS 15 NOV 2022 - organism argument no longer needed, because PR is no longer ingested.
 # JAS 19 October 2022
 # parser.add_argument("-p", '--organism', type=str, default='human',
@@ -168,7 +212,8 @@ def lines_in_csv_files(path: str, save_path: str) -> None:
 
 def verify_ontologies_json_file(ontologies: dict, ontologies_filename: str) -> None:
     valid_ontology_keys: List[str] = \
-        ['owl_url', 'home_url', 'comment', 'sab', 'download_owl_url_to_file_name', 'execute']
+        ['owl_url', 'home_url', 'comment', 'sab', 'download_owl_url_to_file_name', 'execute',
+         'depends_on', 'owlnets_mode']
     for key, value in ontologies.items():
         if not key.isupper():
             ulog.print_and_logger_info(f"For the Ontologies file {ontologies_filename}: the ontology key "
@@ -179,6 +224,10 @@ def verify_ontologies_json_file(ontologies: dict, ontologies_filename: str) -> N
                 ulog.print_and_logger_info(f"For the Ontologies file {ontologies_filename} with ontology key "
                                            f"{key}: {key_o} must be one of: {', '.join(valid_ontology_keys)}")
                 exit(1)
+        if value.get('owlnets_mode', 'rdflib') not in OWLNETS_MODES:
+            ulog.print_and_logger_info(f"For the Ontologies file {ontologies_filename} with ontology key "
+                                       f"{key}: owlnets_mode must be one of: {', '.join(OWLNETS_MODES)}")
+            exit(1)
 
 
 # Fix files that have tabs in the descriptions and therefore broken records (while saving the original file)...
@@ -218,6 +267,180 @@ def get_ubkg_context(sablist: List[str]) -> List[str]:
 
     return context.upper().split(' ')
 
+
+def get_owl_sab(ontology_name: str) -> str:
+    # Returns the SAB for an ontology key in ontologies.json.
+    ontology_record = ontologies[ontology_name]
+    owl_sab: str = ontology_name.upper()
+    if 'sab' in ontology_record:
+        owl_sab: str = ontology_record['sab'].upper()
+    return owl_sab
+
+
+def build_source(ontology_name: str) -> None:
+
+    # OCTOBER 2026 - Moved from the main loop, so that source files can be built in parallel.
+    # Builds the source (OWLNETS) files for an ontology, either by running PheKnowLator on an OWL file or
+    # by running the script in the execute key of the ontology's record in ontologies.json.
+
+    ontology_record = ontologies[ontology_name]
+    owl_sab: str = get_owl_sab(ontology_name)
+    working_owlnets_dir: str = os.path.join(args.owlnets_dir, owl_sab)
+    working_owl_dir: str = os.path.join(args.owl_dir, owl_sab)
+
+    # Create output folders for source files. Use the existing OWL and OWLNETS folder structure.
+    os.system(f'mkdir -p {working_owl_dir}')
+    os.system(f'mkdir -p {working_owlnets_dir}')
+
+    if 'execute' not in ontology_record and args.skipBuild is not True:
+        owl_url = ontology_record['owl_url']
+
+        # OCTOBER 2026
+        # Skip the conversion if the OWLNETS manifest shows that the OWL file (at its URL, as checked with a
+        # conditional request), the ontologies.json entry, and the converter are unchanged since the OWLNETS files
+        # were written.
+        manifest_options = {'with_imports': args.with_imports}
+        if args.clean is not True and args.force_owl_download is not True and args.build_unchanged is not True:
+            # A new release of the OWL file at its URL changes the MD5 in the inputs.
+            source_comparable = True
+            if os.path.exists(umanifest.get_manifest_path(working_owlnets_dir)):
+                source_comparable = umanifest.check_owl_source(owldir=working_owl_dir, owl_url=owl_url, sab=owl_sab)
+            source_file = umanifest.get_owl_source_file(owldir=working_owl_dir, owl_url=owl_url, sab=owl_sab)
+            inputs = umanifest.get_manifest_inputs(source_file=source_file, ontology_record=ontology_record,
+                                                   converter_files=OWLNETS_CONVERTER_FILES, options=manifest_options)
+            if source_comparable and umanifest.manifest_matches(owlnetsdir=working_owlnets_dir, inputs=inputs):
+                ulog.print_and_logger_info(f"Skipping conversion of OWL file: {owl_url}. The OWLNETS files in "
+                                           f"{working_owlnets_dir} are current (OWL file MD5 "
+                                           f"{inputs['source_md5']}).")
+                return
+        umanifest.remove_manifest(owlnetsdir=working_owlnets_dir)
+
+        ulog.print_and_logger_info(f"Processing OWL file: {owl_url}")
+        clean = ''
+        if args.clean is True:
+            clean = '--clean'
+        force_owl_download = ''
+        if args.force_owl_download is True:
+            force_owl_download = '--force_owl_download'
+        with_imports = ''
+        if args.with_imports is True:
+            with_imports = '--with_imports'
+        verbose = ''
+        if args.verbose is True:
+            verbose = '--verbose'
+        # OCTOBER 2026
+        streaming = ''
+        if ontology_record.get('owlnets_mode') == 'streaming':
+            streaming = '--streaming'
+        owlnets_script: str = f"{OWLNETS_SCRIPT} --ignore_owl_md5 {clean} {verbose} {force_owl_download} " \
+                              f"{with_imports} {streaming} -l {args.owlnets_dir} -t {args.owltools_dir} " \
+                              f"-o {args.owl_dir} {owl_url} {owl_sab}"
+        ulog.print_and_logger_info(f"Running: {owlnets_script}")
+        # JAS APR 2023 replaced call to os.system
+        # os.system(owlnets_script)
+        usub.call_subprocess(owlnets_script)
+
+        fix_owlnets_metadata_file(working_owlnets_dir)
+
+        # OCTOBER 2026 - Record the inputs of the conversion.
+        source_file = umanifest.get_owl_source_file(owldir=working_owl_dir, owl_url=owl_url, sab=owl_sab)
+        if source_file is not None:
+            inputs = umanifest.get_manifest_inputs(source_file=source_file, ontology_record=ontology_record,
+                                                   converter_files=OWLNETS_CONVERTER_FILES, options=manifest_options)
+            umanifest.write_manifest(owlnetsdir=working_owlnets_dir, inputs=inputs)
+    # JAS MAY 2023 Generalized skip of build to include paths other than PheKnowLator
+    elif 'execute' in ontology_record and args.skipBuild is not True:
+        script: str = ontology_record['execute']
+        ulog.print_and_logger_info(f"Running: {script}")
+        # JAS 4 APR 2023 replaced call to os.system
+        # os.system(script)
+        usub.call_subprocess(script)
+    # JAS 13 OCT 2022 - allows skipping of PheKnowLator processing
+    elif 'execute' in ontology_record:
+        ulog.print_and_logger_info(f"Skipping build processing for Ontology: {ontology_name}.")
+        ulog.print_and_logger_info("Assuming that current OWLNETS files are available.")
+        script: str = ontology_record['execute'] + ' -s'
+        ulog.print_and_logger_info(f"Running: {script}")
+        usub.call_subprocess(script)
+    # else:
+        # ulog.print_and_logger_info(f"ERROR: There is no processing available for Ontology: {ontology_name}?!")
+
+
+def log_build_failure(ontology_name: str, build: Future) -> None:
+    # OCTOBER 2026
+    # Logs the reason that a build of source files scheduled in parallel failed: the exit code of the build (e.g., from
+    # call_subprocess, which also prints the command that failed) or the exception that it raised, with the traceback.
+    e = build.exception()
+    if isinstance(e, SystemExit):
+        reason = f'exited with code {e.code}'
+    else:
+        reason = f'raised {type(e).__name__}: {e}'
+    ulog.print_and_logger_info(f"ERROR: The build of source files for Ontology: {ontology_name} {reason}.")
+    ulog.print_and_logger_info(''.join(traceback.format_exception(type(e), e, e.__traceback__)))
+
+
+def stop_source_builds(executor: ThreadPoolExecutor) -> None:
+    # OCTOBER 2026
+    # Stops the builds of source files scheduled in parallel, after a build failed. Builds that have not started are
+    # cancelled. The threads of running builds are joined when the interpreter exits, so the subprocesses of running
+    # builds (e.g., PheKnowLator or the scripts in execute keys) are terminated; otherwise, the exit would wait for them
+    # to finish. The OWLNETS manifest of a SAB is removed before its conversion, so a stopped conversion runs again in
+    # the next build.
+    executor.shutdown(wait=False, cancel_futures=True)
+    children = psutil.Process().children(recursive=True)
+    if len(children) > 0:
+        ulog.print_and_logger_info(f"Stopping {len(children)} processes of running builds of source files...")
+    for child in children:
+        try:
+            child.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    gone, alive = psutil.wait_procs(children, timeout=30)
+    for child in alive:
+        try:
+            child.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def build_source_after_dependencies(ontology_name: str, dependencies: dict) -> None:
+    # OCTOBER 2026
+    # Waits for the builds of source files for the ontologies on which an ontology depends, and then builds the
+    # source files for the ontology.
+    # dependencies - dict of the Futures of the builds of the dependencies, keyed by ontology name
+    for dependency_name, dependency in dependencies.items():
+        if dependency.exception() is not None:
+            ulog.print_and_logger_info(f"ERROR: Not building source files for Ontology: {ontology_name}, because the "
+                                       f"build of its dependency {dependency_name} failed.")
+            exit(1)
+    build_source(ontology_name)
+
+
+def submit_source_builds(executor: ThreadPoolExecutor, ontology_names: List[str]) -> dict:
+
+    # OCTOBER 2026
+    # Schedules the builds of source files for a list of ontologies, to run in parallel.
+    # Returns a dict of Futures, keyed by ontology name.
+
+    # The build of an ontology waits for the builds of the ontologies listed in its depends_on key in
+    # ontologies.json that precede it in the list--e.g., GENCODE depends on GENCODE_VS.
+    # Builds are submitted in list order, so the build of a dependency always starts before the build that waits
+    # for it.
+
+    # Each build runs in a subprocess, so threads are sufficient to run builds in parallel.
+
+    # Only the first occurrence of an ontology in the list is scheduled. Ontologies in SERIAL_BUILD_SABS are not
+    # scheduled.
+
+    futures = {}
+    for ontology_name in ontology_names:
+        if ontology_name in futures or ontology_name in SERIAL_BUILD_SABS:
+            continue
+        dependencies = {d: futures[d] for d in ontologies[ontology_name].get('depends_on', []) if d in futures}
+        futures[ontology_name] = executor.submit(build_source_after_dependencies, ontology_name, dependencies)
+    return futures
+
+
 # ----------------------------
 # Start of main script
 
@@ -261,11 +484,30 @@ if args.verbose is True:
         print(f" * Process only one OWL file: {args.oneOwl}")
     if args.skipValidation is True:
         print(' * Skipping all validation')
+    if args.csv_cache is True:
+        print(' * Read ontology CSVs through the columnar cache')
+    if args.in_process is True:
+        print(' * Run the OWLNETS-UMLS-GRAPH script in process')
+    if args.jobs > 1:
+        print(f' * Build source files with {args.jobs} parallel jobs')
+    if args.resume is True:
+        print(' * Resume the build from the build journal')
+    if args.code_cache is True:
+        print(' * Save converted codes in the code cache')
+    if args.build_unchanged is True:
+        print(' * Convert OWL files even if the OWLNETS manifest is current')
+    if args.ro_offline is True:
+        print(' * Use the local cache of the Relations Ontology without checking for changes')
     # JAS 15 NOV 2022 - The organism argument is no longer needed.
     # JAS 19 OCT 2022
     # print(f' * Organism: {args.organism}')
     print('')
 
+# OCTOBER 2026 - Offline mode for the cache of the Relations Ontology. The environment variable is inherited by the
+# scripts that build the ontologies, including those run in subprocesses.
+if args.ro_offline is True:
+    os.environ[uro.RO_OFFLINE_VARIABLE] = '1'
+
 ontologies = json.load(open(args.ontologies_json, 'r'))
 verify_ontologies_json_file(ontologies, args.ontologies_json)
 
@@ -288,61 +530,49 @@ start_time = time.time()
 
 ulog.print_and_logger_info(f"Processing Ontologies: {', '.join(ontology_names)}")
 
-for ontology_name in ontology_names:
+# OCTOBER 2026
+# Build journal. A build records a checkpoint of the ontology CSVs after each ontology. A resumed build truncates the
+# CSVs to the last checkpoint, removing rows appended by the ontology that failed, and continues with the next
+# ontology in the list.
+resume_position = 0
+if args.resume is True:
+    checkpoint = ujournal.read_last_checkpoint(csvdir=args.umls_csvs_dir, ontology_names=ontology_names)
+    resume_position = checkpoint['position'] + 1
+    if resume_position >= len(ontology_names):
+        ulog.print_and_logger_info("All ontologies in the build journal completed. There is nothing to resume.")
+        exit(0)
+    ulog.print_and_logger_info(f"Resuming the build at Ontology: {ontology_names[resume_position]}")
+    ujournal.restore_csv_checkpoint(csvdir=args.umls_csvs_dir, checkpoint=checkpoint)
+else:
+    ujournal.start_journal(csvdir=args.umls_csvs_dir, ontology_names=ontology_names)
+
+# OCTOBER 2026
+# Build source files in parallel. The appends to the ontology CSVs remain in list order.
+source_builds = {}
+if args.jobs > 1:
+    ulog.print_and_logger_info(f"Building source files with {args.jobs} parallel jobs")
+    build_executor = ThreadPoolExecutor(max_workers=args.jobs)
+    source_builds = submit_source_builds(executor=build_executor, ontology_names=ontology_names[resume_position:])
+
+for position, ontology_name in enumerate(ontology_names):
+    if position < resume_position:
+        continue
     ulog.print_and_logger_info('*********************************************')
     ulog.print_and_logger_info(f"Ontology: {ontology_name}")
-    ontology_record = ontologies[ontology_name]
-
-    owl_sab: str = ontology_name.upper()
-    if 'sab' in ontology_record:
-        owl_sab: str = ontology_record['sab'].upper()
+    owl_sab: str = get_owl_sab(ontology_name)
     working_owlnets_dir: str = os.path.join(args.owlnets_dir, owl_sab)
 
-    working_owl_dir: str = os.path.join(args.owl_dir, owl_sab)
-
-    # Create output folders for source files. Use the existing OWL and OWLNETS folder structure.
-    os.system(f'mkdir -p {working_owl_dir}')
-    os.system(f'mkdir -p {working_owlnets_dir}')
-
-    if 'execute' not in ontology_record and args.skipBuild is not True:
-        owl_url = ontology_record['owl_url']
-        ulog.print_and_logger_info(f"Processing OWL file: {owl_url}")
-        clean = ''
-        if args.clean is True:
-            clean = '--clean'
-        force_owl_download = ''
-        if args.force_owl_download is True:
-            force_owl_download = '--force_owl_download'
-        with_imports = ''
-        if args.with_imports is True:
-            with_imports = '--with_imports'
-        if args.verbose is True:
-            verbose = '--verbose'
-        owlnets_script: str = f"{OWLNETS_SCRIPT} --ignore_owl_md5 {clean} {verbose} {force_owl_download} " \
-                              f"{with_imports} -l {args.owlnets_dir} -t {args.owltools_dir} " \
-                              f"-o {args.owl_dir} {owl_url} {owl_sab}"
-        ulog.print_and_logger_info(f"Running: {owlnets_script}")
-        # JAS APR 2023 replaced call to os.system
-        # os.system(owlnets_script)
-        usub.call_subprocess(owlnets_script)
-
-        fix_owlnets_metadata_file(working_owlnets_dir)
-    # JAS MAY 2023 Generalized skip of build to include paths other than PheKnowLator
-    elif 'execute' in ontology_record and args.skipBuild is not True:
-        script: str = ontology_record['execute']
-        ulog.print_and_logger_info(f"Running: {script}")
-        # JAS 4 APR 2023 replaced call to os.system
-        # os.system(script)
-        usub.call_subprocess(script)
-    # JAS 13 OCT 2022 - allows skipping of PheKnowLator processing
-    elif 'execute' in ontology_record:
-        ulog.print_and_logger_info(f"Skipping build processing for Ontology: {ontology_name}.")
-        ulog.print_and_logger_info("Assuming that current OWLNETS files are available.")
-        script: str = ontology_record['execute'] + ' -s'
-        ulog.print_and_logger_info(f"Running: {script}")
-        usub.call_subprocess(script)
-    # else:
-        # ulog.print_and_logger_info(f"ERROR: There is no processing available for Ontology: {ontology_name}?!")
+    # OCTOBER 2026 - Wait for a build of source files that was scheduled in parallel, or build in order.
+    if ontology_name in source_builds:
+        ulog.print_and_logger_info(f"Waiting for the build of source files for Ontology: {ontology_name}...")
+        # Pop the build, so that a later occurrence of the ontology in the list is built again in order.
+        source_build = source_builds.pop(ontology_name)
+        if source_build.exception() is not None:
+            log_build_failure(ontology_name=ontology_name, build=source_build)
+            stop_source_builds(executor=build_executor)
+            exit(1)
+    else:
+        build_source(ontology_name)
 
     # if args.skipValidation is not True:
     #     validation_script: str = f"{VALIDATION_SCRIPT} -o {args.umls_csvs_dir} -l {bargs.owlnets_dir}"
@@ -358,15 +588,31 @@ for ontology_name in ontology_names:
     # JAS July 2023 - Do not call UMLS_GRAPH_SCRIPT for the initial UMLS reformatting.
     if owl_sab != 'UMLS':
         umls_graph_script: str = f"{UMLS_GRAPH_SCRIPT} {working_owlnets_dir} {args.umls_csvs_dir} {owl_sab}"
+        # OCTOBER 2026 - Optional argument to read the ontology CSVs through the columnar cache.
+        if args.csv_cache is True:
+            umls_graph_script = f"{umls_graph_script} cache"
+        # OCTOBER 2026 - In-process mode, in which the ontology CSVs read by the script stay in memory between
+        # ontologies. The script still appends to the CSVs for each ontology.
+        if args.in_process is True:
+            umls_graph_script = f"{umls_graph_script} memory"
+        # OCTOBER 2026 - Optional argument to persist the cache of converted codes between ontologies.
+        if args.code_cache is True:
+            umls_graph_script = f"{umls_graph_script} codecache"
         ulog.print_and_logger_info(f"Running: {umls_graph_script}")
 
         # JAS 4 APR 2023 - Replaced os.system call with subprocess and error handling.
         # os.system(umls_graph_script)
-        usub.call_subprocess(umls_graph_script)
+        if args.in_process is True:
+            usub.call_script_in_process(umls_graph_script)
+        else:
+            usub.call_subprocess(umls_graph_script)
 
         # JAS JANUARY 2024 - Deprecate saving copies of CSVs to save directory.
         # lines_in_csv_files(args.umls_csvs_dir, save_csv_dir)
 
+    # OCTOBER 2026 - Record the completion of the ontology in the build journal.
+    ujournal.write_checkpoint(csvdir=args.umls_csvs_dir, ontology_name=ontology_name, position=position)
+
     # Add log entry for how long it took to do the processing...
     elapsed_time = time.time() - start_time
     ulog.print_and_logger_info(f'Done! Total Elapsed time {"{:0>8}".format(str(timedelta(seconds=elapsed_time)))}')
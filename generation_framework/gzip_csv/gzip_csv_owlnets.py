@@ -28,6 +28,8 @@ import ubkg_extract as uextract
 import ubkg_logging as ulog
 # Parser
 import ubkg_parsetools as uparse
+# Relations Ontology cache
+import ubkg_ro as uro
 
 def getAPIKey()->str:
 
@@ -75,20 +77,9 @@ def translate_SAB_Property_label_to_RO_IRI(apikey: str, sab: str, label: str)->
             propIRI = prop.get('@id')
 
     # Obtain corresponding property label from RO.json.
+    # OCTOBER 2026 - RO.json is read from the local cache of the Relations Ontology.
     if propIRI != '':
-        urlRO = 'https://raw.githubusercontent.com/oborel/obo-relations/master/ro.json'
-        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
-        response = requests.get(urlRO, headers=headers)
-        if response.status_code == 200:
-            responsejson = response.json()
-            all_graphs = responsejson.get('graphs')
-            if all_graphs is not None and len(all_graphs) > 0:
-                graphs = all_graphs[0]
-                nodes = graphs.get('nodes')
-                for node in nodes:
-                    id = node.get('id')
-                    if id == propIRI:
-                        proplbl = node.get('lbl')
+        proplbl = uro.get_ro_label(propIRI)
 
     ulog.print_and_logger_info(f'In {sab}, the has_component property translates to {propIRI} ({proplbl}).')
     return (propIRI, proplbl)
@@ -14,6 +14,7 @@
 # 4. Files with "bad lines"--e.g., inline EOFs.
 
 # Note: this script executes GNU wget from the os command line to download OWL files.
+# OCTOBER 2026 - OWL files are downloaded with requests (see ubkg_owl_download). wget is still used for owltools.
 
 import argparse
 import os
@@ -31,7 +32,6 @@ import time
 from datetime import timedelta
 from lxml import etree
 # from urllib.request import urlopen
-import subprocess
 import hashlib
 from typing import Dict
 import pandas as pd
@@ -44,6 +44,15 @@ fpath = os.path.join(fpath, 'generation_framework/ubkg_utilities')
 sys.path.append(fpath)
 # Extracting files
 import ubkg_extract as uextract
+# OCTOBER 2026 - Assembling class metadata
+import ubkg_owl_metadata as uowlmeta
+# OCTOBER 2026 - Streaming extraction mode
+import ubkg_owl_stream as uowlstream
+# OCTOBER 2026 - Cache of the parsed Graph
+import ubkg_graph_cache as ugraphcache
+# OCTOBER 2026 - Downloading OWL files
+import ubkg_owl_download as uowldownload
+import requests
 
 # JAS Jan 2023 - to handle errors from parsing OWL files in Turtle format
 from xml.parsers.expat import ParserCreate, ExpatError, errors
@@ -99,6 +108,16 @@ parser.add_argument("-r", "--robot", action="store_true",
                     help='apply robot to owl_url incorporating the includes and exit')
 parser.add_argument("-v", "--verbose", action="store_true",
                     help='increase output verbosity')
+# OCTOBER 2026
+parser.add_argument("-m", "--streaming", action="store_true",
+                    help='write the OWLNETS files by streaming the OWL file (RDF/XML or N-Triples) instead of parsing '
+                         'it into an rdflib Graph and running OWL-NETS')
+# OCTOBER 2026
+parser.add_argument("-n", "--no_graph_cache", action="store_true",
+                    help='parse the OWL file even if the cache of the parsed Graph matches its MD5')
+# OCTOBER 2026
+parser.add_argument("-p", "--download_chunks", type=int, default=1,
+                    help='number of byte ranges of a large OWL file to download in parallel')
 args = parser.parse_args()
 
 log_dir, log, log_config = 'builds/logs', 'pkt_build_log.log', glob.glob('**/logging.ini', recursive=True)
@@ -156,36 +175,55 @@ def download_owltools(loc: str) -> None:
         os.chdir(cwd)
 
 
-def download_owl(url: str, loc: str, working_file: str, force_empty=True) -> None:
+def download_owl(url: str, loc: str, working_file: str, force_empty=True, conditional=True) -> None:
     logger.info(f'Downloading owl file from \'{url}\' to \'{loc}\'')
 
-    cwd: str = os.getcwd()
+    # OCTOBER 2026
+    # The OWL file is downloaded with a timeout and retries, and only if it changed since the last download
+    # (conditional). A download that fails is resumed by the next run. The MD5 is calculated during the download.
+    # (See ubkg_owl_download.)
+    # cwd: str = os.getcwd()
 
     os.system(f"mkdir -p {loc}")
-    os.chdir(loc)
+    # os.chdir(loc)
 
     if force_empty is True:
-        os.system(f"rm -f *.owl *.md5")
-
-    # TODO: This hangs sometimes, so there should be a timeout...
-    wgetResults: bytes = subprocess.check_output([f'wget {url}'], shell=True, stderr=subprocess.STDOUT)
-    wgetResults_str: str = wgetResults.decode('utf-8')
-    for line in wgetResults_str.strip().split('\n'):
-        if 'Length: unspecified' in line:
-            logger.error(f'Failed to download {uri}')
-            print(f'Failed to download {uri}')
-            print(wgetResults_str)
-            exit(1)
+        # os.system(f"rm -f *.owl *.md5")
+        # The OWL file itself is kept for the conditional download.
+        for path in glob.glob(os.path.join(loc, '*.owl')) + glob.glob(os.path.join(loc, '*.md5')):
+            if os.path.basename(path) not in [working_file, f'{working_file}.md5']:
+                os.remove(path)
+
+    # wgetResults: bytes = subprocess.check_output([f'wget {url}'], shell=True, stderr=subprocess.STDOUT)
+    # wgetResults_str: str = wgetResults.decode('utf-8')
+    # for line in wgetResults_str.strip().split('\n'):
+    #     if 'Length: unspecified' in line:
+    #         logger.error(f'Failed to download {uri}')
+    #         print(f'Failed to download {uri}')
+    #         print(wgetResults_str)
+    #         exit(1)
+    # if args.verbose:
+    #     print(wgetResults_str)
+    try:
+        download = uowldownload.download_owl_file(url=url, path=os.path.join(loc, working_file),
+                                                  chunks=args.download_chunks, conditional=conditional)
+    except requests.exceptions.RequestException as e:
+        print_and_logger_error(f'Failed to download {url}: {e}')
+        exit(1)
+    if download['status'] == 'not modified':
+        print_and_logger_info(f'{working_file} has not changed since the last download')
     if args.verbose:
-        print(wgetResults_str)
+        print(f"Downloaded {download['size']} bytes (ETag {download['etag']}, "
+              f"Last-Modified {download['last_modified']})")
 
-    md5: str = hashlib.md5(open(working_file, 'rb').read()).hexdigest()
-    md5_file: str = f'{working_file}.md5'
-    logger.info('MD5 for owl file {md5} saved to {md5_file}')
+    # md5: str = hashlib.md5(open(working_file, 'rb').read()).hexdigest()
+    md5: str = download['md5']
+    md5_file: str = os.path.join(loc, f'{working_file}.md5')
+    logger.info(f'MD5 for owl file {md5} saved to {md5_file}')
     with open(md5_file, 'w', newline='') as fp:
         fp.write(md5)
 
-    os.chdir(cwd)
+    # os.chdir(cwd)
 
 
 def compare_file_md5(working_file: str) -> bool:
@@ -217,9 +255,16 @@ def scan_xml_tree_for_imports(tree: etree.ElementTree) -> list:
 
 
 def search_owl_file_for_imports(owl_filename: str) -> None:
-    parser = etree.HTMLParser()
-    tree: etree.ElementTree = etree.parse(owl_filename, parser)
-    imports: list = scan_xml_tree_for_imports(tree)
+    # OCTOBER 2026 - In the streaming mode, the OWL file is not parsed into a tree.
+    stream_format = uowlstream.get_stream_format(owl_filename) if args.streaming else None
+    if stream_format == 'xml':
+        imports: list = uowlstream.find_rdfxml_imports(owl_filename)
+    elif stream_format == 'nt':
+        imports: list = uowlstream.find_ntriples_imports(owl_filename)
+    else:
+        parser = etree.HTMLParser()
+        tree: etree.ElementTree = etree.parse(owl_filename, parser)
+        imports: list = scan_xml_tree_for_imports(tree)
     if len(imports) != 0:
         logger.info(f"Found the following imports were found in the OWL file {owl_filename} : {', '.join(imports)}")
         if args.with_imports is not True:
@@ -365,6 +410,11 @@ print_and_logger_info('Loading ontology')
 # Another problem is with chebi, there is a redirect which Graph.parse(uri, ...) may not handle.
 owl_dir: str = os.path.join(args.owl_dir, args.owl_sab)
 working_file: str = file_from_uri(uri)
+# OCTOBER 2026 - An OWL file without an extension is downloaded directly to <SAB>.OWL (the name to which it was
+# formerly renamed after each download--see below), so that the download state and MD5 of the file are kept under
+# its final name, and the next download is conditional.
+if uri.startswith(('http://', 'https://')) and '.' not in working_file[len(working_file)-5:len(working_file)]:
+    working_file = args.owl_sab + '.OWL'
 
 owl_file: str = os.path.join(owl_dir, working_file)
 
@@ -378,7 +428,8 @@ elif args.ignore_owl_md5 is True:
 elif compare_file_md5(owl_file) is False:
     if args.verbose:
         print_and_logger_info(f"Downloading .owl file to {owl_file} (MD5 of .owl file does not match)")
-    download_owl(uri, owl_dir, working_file)
+    # OCTOBER 2026 - The OWL file on disk does not match its MD5, so it is downloaded unconditionally.
+    download_owl(uri, owl_dir, working_file, conditional=False)
 
 # June 2023
 # Some download URLs (e.g., many from NCBO BioPortal) are REST calls that result in file names like
@@ -426,6 +477,24 @@ if args.verbose:
 
 search_owl_file_for_imports(owl_file)
 
+# OCTOBER 2026
+# In the streaming mode, the OWLNETS files are written directly from the OWL file, without an rdflib Graph or
+# PheKnowLator. (See ubkg_owl_stream.) Files in other formats (e.g., Turtle) are processed with rdflib.
+if args.streaming:
+    if uowlstream.get_stream_format(owl_file) is None:
+        print_and_logger_info(f'{owl_file} is not in RDF/XML or N-Triples format; the streaming mode is not used.')
+    else:
+        print_and_logger_info(f'Streaming {owl_file} to OWLNETS files')
+        counts = uowlstream.write_owlnets_files(owl_file=owl_file, working_dir=working_dir,
+                                                delete_definitions=args.delete_definitions)
+        print_and_logger_info(f"Wrote {counts['edges']} edges, {counts['nodes']} nodes and {counts['relations']} "
+                              f"relations to directory '{working_dir}'")
+        log_files_and_sizes(working_dir)
+        look_for_none_in_node_metadata_file(working_dir)
+        elapsed_time = time.time() - start_time
+        print_and_logger_info(f'Done! Elapsed time {"{:0>8}".format(str(timedelta(seconds=elapsed_time)))}')
+        exit(0)
+
 # JAS January 2023
 # The original logic assumed that OWL files were in RDF/XML format. Almost all the OWL files that have been
 # encountered up to January 2023 have been in RDF/XML. (The exception is GlycoRDF, which is available in both
@@ -433,28 +502,44 @@ search_owl_file_for_imports(owl_file)
 #
 # Some ontologies are available only in non-RDF/XML serializations. For example, GlycoCoO is only available in Turtle.
 # Attempt to parse in Turtle; serialize to RDF/XML; and then reparse the RDF/XML.
-try:
-    graph = Graph().parse(owl_file, format='xml')
-except:
-    # Note: If the file is not in RDF/XML, the exception will be from xml (ExpatError), not rdflib.
-    # Exception handling does not seem able to catch this lower-level error, so this logic uses the generic
-    # exception handler. The risk here, of course, is that the error is not from ExpatError.
-
-    # This logic does not handle the use case of an input file being in some format other than RDF/XML or Turtle--
-    # in particular, if the file is OWL/RDF or RDF
-    # It is assumed that such a case would be properly addressed prior to ingestion--i.e., either don't use the
-    # file as input or modify this logic further to account for the other formats.
-    # TODO: Check for OWL/XML and reserialize as RDF/XML using code here: https://github.com/RDFLib/rdflib/discussions/1571
-
-    print_and_logger_info(f'Error parsing {owl_file} as RDF/XML.')
-    print_and_logger_info('Assuming Turtle format. Attempting to convert...')
-    # graph = Graph().parse(owl_file, format='n3')
-    graph = Graph().parse(owl_file, format='ttl')
-    convertedpath = os.path.join(owl_dir, 'converted.owl')
-    print_and_logger_info(f'Serializing {owl_file} to RDF/XML format in file {convertedpath}')
-    v = graph.serialize(format='xml', destination=convertedpath)
-    graph2 = Graph().parse(convertedpath, format='xml')
-    graph = graph2
+# OCTOBER 2026
+# The triples of the parsed Graph are cached alongside the OWL file, keyed by the MD5 of the OWL file. If the OWL file
+# is unchanged since the last run, the Graph is loaded from the cache instead of parsed. (See ubkg_graph_cache.)
+graph = None
+owl_md5 = ugraphcache.get_file_md5(owl_file)
+if not args.no_graph_cache:
+    graph = ugraphcache.read_graph_cache(owl_file=owl_file, md5=owl_md5)
+    if graph is not None:
+        print_and_logger_info(f'Loaded {len(graph)} triples for {owl_file} (MD5 {owl_md5}) from the graph cache '
+                              f'{ugraphcache.get_graph_cache_dir(owl_file)}')
+
+if graph is None:
+    try:
+        graph = Graph().parse(owl_file, format='xml')
+    except:
+        # Note: If the file is not in RDF/XML, the exception will be from xml (ExpatError), not rdflib.
+        # Exception handling does not seem able to catch this lower-level error, so this logic uses the generic
+        # exception handler. The risk here, of course, is that the error is not from ExpatError.
+
+        # This logic does not handle the use case of an input file being in some format other than RDF/XML or Turtle--
+        # in particular, if the file is OWL/RDF or RDF
+        # It is assumed that such a case would be properly addressed prior to ingestion--i.e., either don't use the
+        # file as input or modify this logic further to account for the other formats.
+        # TODO: Check for OWL/XML and reserialize as RDF/XML using code here: https://github.com/RDFLib/rdflib/discussions/1571
+
+        print_and_logger_info(f'Error parsing {owl_file} as RDF/XML.')
+        print_and_logger_info('Assuming Turtle format. Attempting to convert...')
+        # graph = Graph().parse(owl_file, format='n3')
+        graph = Graph().parse(owl_file, format='ttl')
+        convertedpath = os.path.join(owl_dir, 'converted.owl')
+        print_and_logger_info(f'Serializing {owl_file} to RDF/XML format in file {convertedpath}')
+        v = graph.serialize(format='xml', destination=convertedpath)
+        graph2 = Graph().parse(convertedpath, format='xml')
+        graph = graph2
+
+    print_and_logger_info(f'Caching {len(graph)} triples for {owl_file} (MD5 {owl_md5}) in '
+                          f'{ugraphcache.get_graph_cache_dir(owl_file)}')
+    ugraphcache.write_graph_cache(graph=graph, owl_file=owl_file, md5=owl_md5)
 
 logger.info('Extract Node Metadata')
 ont_classes = pkt.utils.gets_ontology_classes(graph)
@@ -463,12 +548,21 @@ ont_synonyms = pkt.utils.gets_ontology_class_synonyms(graph)
 ont_dbxrefs = pkt.utils.gets_ontology_class_dbxrefs(graph)
 ont_defs = pkt.utils.gets_ontology_definitions(graph)
 
+# OCTOBER 2026
+# The synonym and dbxref dictionaries are inverted once into dictionaries keyed by class, instead of scanned for
+# each class. (See ubkg_owl_metadata.)
+logger.info('Index the synonyms and dbxrefs by class')
+cls_synonyms = uowlmeta.invert_class_metadata(metadata=ont_synonyms[0], classes=ont_classes)
+cls_dbxrefs = uowlmeta.invert_class_metadata(metadata=ont_dbxrefs[0], classes=ont_classes)
+
 logger.info('Add the class metadata to the master metadata dictionary')
 entity_metadata = {'nodes': {}, 'relations': {}}
 for cls in tqdm(ont_classes):
     # get class metadata - synonyms and dbxrefs
-    syns = '|'.join([k for k, v in ont_synonyms[0].items() if str(cls) in v])
-    dbxrefs = '|'.join([k for k, v in ont_dbxrefs[0].items() if str(cls) in v])
+    # syns = '|'.join([k for k, v in ont_synonyms[0].items() if str(cls) in v])
+    # dbxrefs = '|'.join([k for k, v in ont_dbxrefs[0].items() if str(cls) in v])
+    syns = '|'.join(cls_synonyms.get(str(cls), []))
+    dbxrefs = '|'.join(cls_dbxrefs.get(str(cls), []))
 
     # extract metadata
     cls_path_last: str = str(cls).split('/')[-1]
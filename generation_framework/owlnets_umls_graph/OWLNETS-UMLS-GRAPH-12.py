@@ -25,6 +25,11 @@
 # 1. The path to the OWLNETS directory (default: owlnets_output) where the assertion data files are located
 # 2. path to the directory that contains the ontology CSV files
 # 3. SAB for the set of assertions/ontology that is being ingested
+# 4. (optional) any of the following options:
+#    cache: read the ontology CSVs through the columnar cache (see ubkg_csv_cache.py)
+#    memory: keep the ontology CSVs read in memory for the next SAB (when build_csv.py runs this script in process)
+#    codecache: load and save the cache of converted codes (see ubkg_parsetools.codeReplacements) in the directory
+#               that contains the ontology CSV files, so that the next SAB reuses the codes converted for this SAB
 # sys.argv is used instead of argparse because this script is designed to be called as a subprocess.
 
 # -----------------------------------------------------
@@ -59,6 +64,17 @@ import ubkg_extract as uextract
 import ubkg_logging as ulog
 #import ubkg_reporting as ureport
 import ubkg_clean_csv as uclean
+import ubkg_csv_cache as ucache
+import ubkg_ro as uro
+# OCTOBER 2026 - integer encoding of CUIs and codes
+import ubkg_identifiers as uid
+import ubkg_code_index as ucodeindex
+# OCTOBER 2026 - set-membership tests of rows
+import ubkg_row_sets as urowsets
+# OCTOBER 2026 - index of the terms in SUIs.csv
+import ubkg_term_index as utermindex
+# OCTOBER 2026 - alternate CUIs for codes mapped to the same CUI
+import ubkg_cui_duplicates as ucuidup
 
 
 def owlnets_path(file: str) -> str:
@@ -71,6 +87,13 @@ def csv_path(file: str) -> str:
     return os.path.join(sys.argv[2], file)
 
 
+def read_ontology_csv(file: str) -> pd.DataFrame:
+    # OCTOBER 2026
+    # Reads an ontology CSV through the columnar and/or in-memory caches, which only parse rows appended since the
+    # last read.
+    return ucache.read_csv_with_cache(path=csv_path(file), columnar=USE_CSV_CACHE, in_memory=KEEP_CSVS_IN_MEMORY)
+
+
 def identify_source_file(file_names: list) -> str:
 
     # Checks for the existence of source files (edges or nodes).
@@ -93,127 +116,13 @@ def getROrelationshiptriples() -> pd.DataFrame:
 
     # Obtain descriptions of relationships and their inverses from the Relations Ontology JSON.
 
-    # The Relations Ontology (RO) is an ontology of relationships, in which the nodes are
-    # relationship properties and the edges (predicates) are relationships *between*
-    # relationship properties.
-    # For example,
-    # relationship property RO_0002292 (node) inverseOf (edge) relationship property RO_0002206 (node)
-    # or
-    # "expresses" inverseOf "expressed in"
+    # OCTOBER 2026
+    # The Relations Ontology JSON is read from a local cache, which is refreshed from GitHub only when it is stale,
+    # and the table of relationships and inverses is derived once for each version of the JSON.
+    # The derivation of the table moved to ubkg_ro.build_relation_triples.
 
     ulog.print_and_logger_info('-- Obtaining relationship reference information from Relations Ontology...')
-    # Fetch the RO JSON.
-    dfro = pd.read_json("https://raw.githubusercontent.com/oborel/obo-relations/master/ro.json")
-
-    # Information on relationship properties (i.e., relationship property nodes) is in the node array.
-    dfnodes = pd.DataFrame(dfro.graphs[0]['nodes'])
-    # Information on edges (i.e., relationships between relationship properties) is in the edges array.
-    dfedges = pd.DataFrame(dfro.graphs[0]['edges'])
-
-    # Information on the relationships between relationship properties *should be* in the edges array.
-    # Example of edge element:
-    # {
-    #      "sub" : "http://purl.obolibrary.org/obo/RO_0002101",
-    #      "pred" : "inverseOf",
-    #      "obj" : "http://purl.obolibrary.org/obo/RO_0002132"
-    #    }
-    #
-    # The ontology graph requires that every relationship have an inverse.
-    # Not all relationships in RO are defined with inverses; for these relationships, the script will create
-    # "pseudo-inverse" relationships--e.g., if the only information available is the label "eats", then
-    # the pseudo-inverse will be "inverse_eats" (instead of, say, "eaten_by").
-
-    # Cases that require pseudo-inverses include:
-    # 1. A property is incompletely specified in terms of both sides of an inverse relationship--e.g.,
-    #    RO_0002206 is listed as the inverse of RO_0002292, but RO_0002292 is not listed as the
-    #    corresponding inverse of RO_0002206. For these properties, the available relationship
-    #    will be inverted when joining relationship information to the edgelist.
-    #    (This is really a case in which both directions of the inverse relationship should have been
-    #    defined in the edges node, but were not.)
-    # 2. A property does not have inverse relationships defined in RO.
-    #    The relationship will be added to the list with a null inverse. The script will later create a
-    #    pseudo-inverse by appending "inverse_" to the relationship label.
-
-    # ---------------------------------
-
-    # Obtain triple information for relationship properties--i.e.,
-    # 1. IRIs for "subject" nodes and "object" nodes (relationship properties)
-    # 2. relationship predicates (relationships between relationship properties)
-
-    # Get subject node, edge
-    # MAY 2023 replace inner join with left
-    dfrt = dfnodes.merge(dfedges, how='left', left_on='id', right_on='sub')
-    # Get object node
-    dfrt = dfrt.merge(dfnodes, how='left', left_on='obj', right_on='id')
-
-    # May 2023
-    # Set a default predicate to capture nodes without predicates.
-    dfrt = dfrt.fillna(value={'pred': 'no predicate'})
-
-    # ---------------------------------
-    # Identify relationship properties that do not have inverses.
-    # 1. Group relationship properties by predicate, using count.
-    #    ('pred' here describes the relationship between relationship properties.)
-    dfpred = dfrt.groupby(['id_x', 'pred']).count().reset_index()
-
-    # 2. Identify the relationships for which the set of predicates does not include "inverseOf".
-    listinv = dfpred[dfpred['pred'] == 'inverseOf']['id_x'].to_list()
-    listnoinv = dfpred[~dfpred['id_x'].isin(listinv)]['id_x'].to_list()
-    dfnoinv = dfrt.copy()
-    dfnoinv = dfnoinv[dfnoinv['id_x'].isin(listnoinv)]
-
-    # 3. Rename column names to match the relationtriples frame. (Column names are described
-    #    farther down.)
-    dfnoinv = dfnoinv[['id_x', 'lbl_x', 'id_y', 'lbl_y']].rename(
-        columns={'id_x': 'IRI', 'lbl_x': 'relation_label_RO', 'id_y': 'inverse_IRI', 'lbl_y': 'inverse_RO'})
-    # The inverses are undefined.
-    dfnoinv['inverse_IRI'] = np.nan
-    dfnoinv['inverse_RO'] = np.nan
-
-    # ---------------------------------
-    # Look for members of incomplete inverse pairs--i.e., relationship properties that are
-    # the *object* of an inverseOf edge, but not the corresponding *subject* of an inverseOf edge.
-    #
-    # 1. Filter edges to inverseOf.
-    dfedgeinv = dfedges[dfedges['pred'] == 'inverseOf']
-
-    # 2. Find all relation properties that are objects of inverseOf edges.
-    dfnoinv = dfnoinv.merge(dfedgeinv, how='left', left_on='IRI', right_on='obj')
-
-    # 3. Get the label for the relation properties that are subjects of inverseOf edges.
-    dfnoinv = dfnoinv.merge(dfnodes, how='left', left_on='sub', right_on='id')
-    dfnoinv['inverse_IRI'] = np.where(dfnoinv['lbl'].isnull(), dfnoinv['inverse_IRI'], dfnoinv['id'])
-    dfnoinv['inverse_RO'] = np.where(dfnoinv['lbl'].isnull(), dfnoinv['inverse_RO'], dfnoinv['lbl'])
-    dfnoinv = dfnoinv[['IRI', 'relation_label_RO', 'inverse_IRI', 'inverse_RO']]
-
-    # ---------------------------------
-    # Filter the base triples frame to just those relationship properties that have inverses.
-    # This step eliminates relationship properties related by relationships such as "subPropertyOf".
-    dfrt = dfrt[dfrt['pred'] == 'inverseOf']
-
-    # Rename column names.
-    # Column names will be:
-    # IRI - the IRI for the relationship property
-    # relation_label_RO - the label for the relationship property
-    # inverse_RO - the label of the inverse relationship property
-    # inverse_IRI - IRI for the inverse relationship (This will be dropped.)
-    dfrt = dfrt[['id_x', 'lbl_x', 'id_y', 'lbl_y']].rename(
-        columns={'id_x': 'IRI', 'lbl_x': 'relation_label_RO', 'id_y': 'inverse_IRI', 'lbl_y': 'inverse_RO'})
-
-    # Add triples for problematic relationship properties--i.e., without inverses or from incomplete pairs.
-    dfrt = pd.concat([dfrt, dfnoinv], ignore_index=True).drop_duplicates(subset=['IRI'])
-
-    # Convert stings for labels for relationships to expected delimiting.
-    dfrt['relation_label_RO'] = \
-        dfrt['relation_label_RO'].str.replace(' ', '_').str.split('/').str[-1]
-    dfrt['inverse_RO'] = dfrt['inverse_RO'].str.replace(' ', '_').str.split('/').str[-1]
-
-    dfrt = dfrt.drop(columns='inverse_IRI')
-
-    # March 2024 Cast IRI to lowercase.
-    dfrt['IRI'] = dfrt['IRI'].str.lower()
-
-    return dfrt
+    return uro.get_relation_triples()
 
 
 # -----------------------------------------------------
@@ -221,6 +130,14 @@ def getROrelationshiptriples() -> pd.DataFrame:
 # Assignment of SAB for CUI-CUI relationships (edgelist) - typically use file name before .owl in CAPS
 OWL_SAB = sys.argv[3].upper()
 
+# OCTOBER 2026 - Optional arguments to read ontology CSVs through the columnar cache and to keep them in memory.
+USE_CSV_CACHE = 'cache' in sys.argv[4:]
+KEEP_CSVS_IN_MEMORY = 'memory' in sys.argv[4:]
+# OCTOBER 2026 - Optional argument to persist the cache of converted codes between SABs.
+USE_CODE_ID_CACHE = 'codecache' in sys.argv[4:]
+if USE_CODE_ID_CACHE:
+    uparse.load_code_id_cache(path=csv_path('codeids.cache.jsonl'))
+
 # Threshold number of rows for which to show TQDM progress bars when writing to output.
 TQDM_THRESHOLD = 100000
 
@@ -470,18 +387,30 @@ dfrelationtriples = getROrelationshiptriples()
 # 1. Optional use of OWLNETS_relations.txt file.
 # 2. Identification of all relations in Relations Ontology, not just inverses.
 
+# OCTOBER 2026
+# The relation label and inverse of an edge depend only on the predicate of the edge and the relation label from the
+# relations file. Instead of joining the edgelist to the Relations Ontology, the joins below are done once for each
+# distinct combination of predicate and relation label (a "key"), in the frame edgekeys. The resulting relation
+# labels and inverses are then mapped onto the edges by key.
+
+# Drop duplicate edges. (This was done by the drop_duplicates after the join of the edgelist by IRI, the columns of
+# which depend only on the predicate.)
+edgelist = edgelist.drop_duplicates().reset_index(drop=True)
+edgelist['key'] = edgelist.groupby(['predicate', 'relation_label_from_file'], dropna=False, sort=False).ngroup()
+edgekeys = edgelist[['key', 'predicate', 'relation_label_from_file']].drop_duplicates(subset=['key'])
+
 # Perform a series of joins and rename resulting columns to keep track of the source of
 # relationship labels and inverse relationship labels.
 
 ulog.print_and_logger_info('-- Translating predicates in edges file to relationships from Relations Ontology...')
 
 # Check for relationships in RO, considering the edgelist predicate as a *full IRI*.
-edgelist = edgelist.merge(dfrelationtriples, how='left', left_on='predicate',
+edgekeys = edgekeys.merge(dfrelationtriples, how='left', left_on='predicate',
                           right_on='IRI').drop_duplicates().reset_index(drop=True)
 
 # JAS 6 JAN 2023 add optional evidence_class
-edgelist = edgelist[
-    ['subject', 'predicate', 'object', 'evidence_class', 'relation_label_from_file', 'relation_label_RO',
+edgekeys = edgekeys[
+    ['key', 'predicate', 'relation_label_from_file', 'relation_label_RO',
      'inverse_RO']].rename(
     columns={'relation_label_RO': 'relation_label_RO_fromIRIjoin', 'inverse_RO': 'inverse_RO_fromIRIjoin'})
 
@@ -490,13 +419,13 @@ edgelist = edgelist[
 # First, format the predicate string to match potential relationship strings from RO.
 # Parsing note: relationship IRIs often include the '#' character as a terminal delimiter, and
 # be in format url...#relation--e.g., ccf.owl#ct_is_a.
-edgelist['predicate'] = edgelist['predicate'].str.replace(' ', '_').str.replace('#', '/').str.split('/').str[-1]
-edgelist = edgelist.merge(dfrelationtriples, how='left', left_on='predicate',
+edgekeys['predicate'] = edgekeys['predicate'].str.replace(' ', '_').str.replace('#', '/').str.split('/').str[-1]
+edgekeys = edgekeys.merge(dfrelationtriples, how='left', left_on='predicate',
                           right_on='relation_label_RO').drop_duplicates().reset_index(drop=True)
 
 # JAS 6 JAN 2023 add optional evidence_class
-edgelist = edgelist[
-    ['subject', 'predicate', 'object', 'evidence_class', 'relation_label_from_file', 'relation_label_RO_fromIRIjoin',
+edgekeys = edgekeys[
+    ['key', 'predicate', 'relation_label_from_file', 'relation_label_RO_fromIRIjoin',
      'inverse_RO_fromIRIjoin', 'relation_label_RO', 'inverse_RO']].rename(
     columns={'relation_label_RO': 'relation_label_RO_frompredicatejoinlabel',
              'inverse_RO': 'inverse_RO_frompredicatejoinlabel'})
@@ -504,12 +433,12 @@ edgelist = edgelist[
 # Check for relationships in RO by label, considering the relationship label from the
 # OWLNETS_relations.txt file that corresponds to the predicate (if available).
 if relations_file_exists:
-    edgelist['relation_label_from_file'] = \
-        edgelist['relation_label_from_file'].str.replace(' ', '_').str.replace('#', '/').str.split('/').str[-1]
-    edgelist = edgelist.merge(dfrelationtriples, how='left', left_on='relation_label_from_file',
+    edgekeys['relation_label_from_file'] = \
+        edgekeys['relation_label_from_file'].str.replace(' ', '_').str.replace('#', '/').str.split('/').str[-1]
+    edgekeys = edgekeys.merge(dfrelationtriples, how='left', left_on='relation_label_from_file',
                               right_on='relation_label_RO').drop_duplicates().reset_index(drop=True)
     # JAS 6 JAN 2023 add optional evidence_class
-    edgelist = edgelist[['subject', 'predicate', 'object', 'evidence_class', 'relation_label_from_file',
+    edgekeys = edgekeys[['key', 'predicate', 'relation_label_from_file',
                          'relation_label_RO_fromIRIjoin',
                          'inverse_RO_fromIRIjoin', 'relation_label_RO_frompredicatejoinlabel',
                          'inverse_RO_frompredicatejoinlabel', 'relation_label_RO', 'inverse_RO']].rename(
@@ -517,17 +446,17 @@ if relations_file_exists:
                  'inverse_RO': 'inverse_RO_fromfilelabeljoinlabel'})
 # JAS APR 2023 - Add null columns if no relations file.
 else:
-    edgelist['relation_label_RO_fromfilelabeljoinlabel'] = np.nan
-    edgelist['inverse_RO_fromfilelabeljoinlabel'] = np.nan
+    edgekeys['relation_label_RO_fromfilelabeljoinlabel'] = np.nan
+    edgekeys['inverse_RO_fromfilelabeljoinlabel'] = np.nan
 
 # JAS APR 2023 - Check for relationships in RO, considering the edgelist predicate as an abbreviated IRI
 # in format RO:code. (Use case: GTEX)
 # First, try to reformat the predicate string as a full IRI.
-edgelist['predicate_expanded'] = 'http://purl.obolibrary.org/obo/' + edgelist['predicate'].str.replace(':', '_')
-edgelist = edgelist.merge(dfrelationtriples, how='left', left_on='predicate_expanded',
+edgekeys['predicate_expanded'] = 'http://purl.obolibrary.org/obo/' + edgekeys['predicate'].str.replace(':', '_')
+edgekeys = edgekeys.merge(dfrelationtriples, how='left', left_on='predicate_expanded',
                           right_on='IRI').drop_duplicates().reset_index(drop=True)
 
-edgelist = edgelist[['subject', 'predicate', 'object', 'evidence_class', 'relation_label_from_file',
+edgekeys = edgekeys[['key', 'predicate', 'relation_label_from_file',
                          'relation_label_RO_fromIRIjoin', 'inverse_RO_fromIRIjoin',
                          'relation_label_RO_frompredicatejoinlabel', 'inverse_RO_frompredicatejoinlabel',
                          'relation_label_RO_fromfilelabeljoinlabel', 'inverse_RO_fromfilelabeljoinlabel',
@@ -560,28 +489,28 @@ edgelist = edgelist[['subject', 'predicate', 'object', 'evidence_class', 'relati
 # 8. JAS 13 JAN 2023 - 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type' converted to 'isa'
 
 
-edgelist['relation_label'] = edgelist['relation_label_RO_fromIRIjoin']
+edgekeys['relation_label'] = edgekeys['relation_label_RO_fromIRIjoin']
 
 # JAS APR 2023
-edgelist['relation_label'] = np.where(edgelist['relation_label'].isnull(),
-                                      edgelist['relation_label_RO_fromexpandedpredicate'], edgelist['relation_label'])
+edgekeys['relation_label'] = np.where(edgekeys['relation_label'].isnull(),
+                                      edgekeys['relation_label_RO_fromexpandedpredicate'], edgekeys['relation_label'])
 
-edgelist['relation_label'] = np.where(edgelist['relation_label'].isnull(),
-                                      edgelist['relation_label_RO_frompredicatejoinlabel'], edgelist['relation_label'])
+edgekeys['relation_label'] = np.where(edgekeys['relation_label'].isnull(),
+                                      edgekeys['relation_label_RO_frompredicatejoinlabel'], edgekeys['relation_label'])
 if relations_file_exists:
-    edgelist['relation_label'] = np.where(edgelist['relation_label'].isnull(),
-                                          edgelist['relation_label_RO_fromfilelabeljoinlabel'],
-                                          edgelist['relation_label'])
-    edgelist['relation_label'] = np.where(edgelist['relation_label'].isnull(), edgelist['relation_label_from_file'],
-                                          edgelist['relation_label'])
-edgelist['relation_label'] = np.where(edgelist['relation_label'].isnull(), edgelist['predicate'],
-                                      edgelist['relation_label'])
-edgelist['relation_label'] = np.where(edgelist['predicate'].str.contains('subClassOf'), 'isa',
-                                      edgelist['relation_label'])
+    edgekeys['relation_label'] = np.where(edgekeys['relation_label'].isnull(),
+                                          edgekeys['relation_label_RO_fromfilelabeljoinlabel'],
+                                          edgekeys['relation_label'])
+    edgekeys['relation_label'] = np.where(edgekeys['relation_label'].isnull(), edgekeys['relation_label_from_file'],
+                                          edgekeys['relation_label'])
+edgekeys['relation_label'] = np.where(edgekeys['relation_label'].isnull(), edgekeys['predicate'],
+                                      edgekeys['relation_label'])
+edgekeys['relation_label'] = np.where(edgekeys['predicate'].str.contains('subClassOf'), 'isa',
+                                      edgekeys['relation_label'])
 
 # JAS MARCH 2024 - relationships are cast to lowercase.
-edgelist['relation_label'] = np.where(edgelist['predicate'].str.contains('subclassof'), 'isa',
-                                      edgelist['relation_label'])
+edgekeys['relation_label'] = np.where(edgekeys['predicate'].str.contains('subclassof'), 'isa',
+                                      edgekeys['relation_label'])
 
 # JAS SEPT 2023 - Moved to relationshipreplacements in ubkg_parsetools.py
 # JAS 13 JAN 2023 - 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type' converted to 'isa'
@@ -591,18 +520,18 @@ edgelist['relation_label'] = np.where(edgelist['predicate'].str.contains('subcla
 # The algorithm for inverses is simpler: if one was derived from RO, use it; else leave empty, and
 # the script will create a pseudo-inverse.
 
-edgelist['inverse'] = edgelist['inverse_RO_fromIRIjoin']
+edgekeys['inverse'] = edgekeys['inverse_RO_fromIRIjoin']
 
-edgelist['inverse'] = np.where(edgelist['inverse'].isnull(), edgelist['inverse_RO_fromexpandedpredicate'],
-                               edgelist['inverse'])
+edgekeys['inverse'] = np.where(edgekeys['inverse'].isnull(), edgekeys['inverse_RO_fromexpandedpredicate'],
+                               edgekeys['inverse'])
 
-edgelist['inverse'] = np.where(edgelist['inverse'].isnull(), edgelist['inverse_RO_frompredicatejoinlabel'],
-                               edgelist['inverse'])
-edgelist['inverse'] = np.where(edgelist['inverse'].isnull(), edgelist['inverse_RO_fromexpandedpredicate'],
-                               edgelist['inverse'])
+edgekeys['inverse'] = np.where(edgekeys['inverse'].isnull(), edgekeys['inverse_RO_frompredicatejoinlabel'],
+                               edgekeys['inverse'])
+edgekeys['inverse'] = np.where(edgekeys['inverse'].isnull(), edgekeys['inverse_RO_fromexpandedpredicate'],
+                               edgekeys['inverse'])
 if relations_file_exists:
-    edgelist['inverse'] = np.where(edgelist['inverse'].isnull(), edgelist['inverse_RO_fromfilelabeljoinlabel'],
-                                   edgelist['inverse'])
+    edgekeys['inverse'] = np.where(edgekeys['inverse'].isnull(), edgekeys['inverse_RO_fromfilelabeljoinlabel'],
+                                   edgekeys['inverse'])
 
 # In[9]:
 
@@ -617,7 +546,17 @@ if relations_file_exists:
 
 # In[10]:
 
-edgelist.loc[edgelist['inverse'].isnull(), 'inverse'] = 'inverse_' + edgelist['relation_label']
+edgekeys.loc[edgekeys['inverse'].isnull(), 'inverse'] = 'inverse_' + edgekeys['relation_label']
+
+# OCTOBER 2026
+# Map the relation labels and inverses onto the edges by key. The predicate and relation label of an edge are replaced
+# with the formatted versions from the joins. A key can map to more than one relation label or inverse if labels in
+# the Relations Ontology are not unique.
+edgelist = edgelist[['subject', 'object', 'evidence_class', 'key']].merge(
+    edgekeys[['key', 'predicate', 'relation_label_from_file', 'relation_label', 'inverse']], how='left', on='key')
+edgelist = edgelist[['subject', 'predicate', 'object', 'evidence_class', 'relation_label_from_file', 'relation_label',
+                     'inverse']].drop_duplicates().reset_index(drop=True)
+del edgekeys
 
 # ---------------------------------------------------------
 # PREPARE NODES
@@ -766,9 +705,13 @@ explode_dbxrefs['nodeXrefCodes'] = explode_dbxrefs['node_dbxrefs'].str.split(':'
         #'nodeXrefCodes'].apply(list).reset_index(name='nodeCUIs')
 # JUlY 2023 - Colon is the delimiter between SAB:CODE (in this case, SAB:CUI)
 
-explode_dbxrefs_UMLS = \
-    explode_dbxrefs[explode_dbxrefs['node_dbxrefs'].str.contains('UMLS:C') == True].groupby('node_id', sort=False, group_keys=False)[
-        'nodeXrefCodes'].progress_apply(list).reset_index(name='nodeCUIs')
+# OCTOBER 2026 - The lists are built with array operations instead of a call to list for each group.
+explode_dbxrefs_UMLS = explode_dbxrefs[explode_dbxrefs['node_dbxrefs'].str.contains('UMLS:C') == True]
+node_ids, node_cuis = uid.group_lists(keys=explode_dbxrefs_UMLS['node_id'],
+                                      values=explode_dbxrefs_UMLS['nodeXrefCodes'].to_numpy())
+explode_dbxrefs_UMLS = pd.DataFrame({'node_id': node_ids, 'nodeCUIs': node_cuis})
+del node_ids
+del node_cuis
 # Associate nodes with cross-references that have UMLS CUIs.
 # In general, this could result in a node having more than one row, if the node was associated with more than one
 # UMLS CUI.
@@ -792,8 +735,43 @@ del explode_dbxrefs['nodeXrefCodes']
 # There can be multiple assignment rows for each CUI.
 ulog.print_and_logger_info('-- Reading existing CUIs from CUI-CODES.csv...')
 #CUI_CODEs = pd.read_csv(csv_path("CUI-CODEs.csv"))
-CUI_CODEs = uextract.read_csv_with_progress_bar(path=csv_path("CUI-CODEs.csv"))
-CUI_CODEs = CUI_CODEs.dropna().drop_duplicates().reset_index(drop=True)
+# OCTOBER 2026
+# CUI-CODEs.csv is read into an index (ubkg_code_index), in which CUIs and codes are encoded as integers.
+# CUI_CODEs is the largest frame in the script and is used in merges until the append to CUI-CODEs.csv, so each
+# distinct CUI and code is stored once, in the dictionaries CUI_IDS and CODE_IDS. Rows are decoded to strings only
+# where they match nodes of the ingestion.
+# With the columnar cache, the index is persisted alongside CUI-CODEs.csv; in the in-process mode, it is kept in
+# memory. In both cases, only the rows appended since the prior SAB are parsed.
+if USE_CSV_CACHE or KEEP_CSVS_IN_MEMORY:
+    CODE_INDEX = ucodeindex.read_code_index(csvpath=csv_path("CUI-CODEs.csv"), persist=USE_CSV_CACHE,
+                                            in_memory=KEEP_CSVS_IN_MEMORY)
+else:
+    CODE_INDEX = ucodeindex.build_code_index(uextract.read_csv_with_progress_bar(path=csv_path("CUI-CODEs.csv")))
+CUI_IDS = CODE_INDEX['cui_ids']
+CODE_IDS = CODE_INDEX['code_ids']
+CUI_CODEs = ucodeindex.get_cui_codes(CODE_INDEX)
+
+# Multimap from the uppercase form of each code to its CUIs.
+CODE_CUI_MULTIMAP = ucodeindex.get_code_cui_multimap(index=CODE_INDEX, cuicodes=CUI_CODEs)
+
+
+def decode_cui_codes(rows: np.ndarray) -> pd.DataFrame:
+
+    # OCTOBER 2026
+    # Decodes the rows of CUI_CODEs selected by a boolean array to strings.
+
+    return pd.DataFrame({':START_ID': uid.decode_identifiers(CUI_IDS, CUI_CODEs[':START_ID'].to_numpy()[rows]),
+                         ':END_ID': uid.decode_identifiers(CODE_IDS, CUI_CODEs[':END_ID'].to_numpy()[rows])})
+
+
+def select_cui_codes_by_code(codes: pd.Series) -> np.ndarray:
+
+    # OCTOBER 2026
+    # Selects the rows of CUI_CODEs with codes in a Series of codes.
+
+    code = uid.lookup_identifiers(CODE_IDS, codes.dropna().unique())
+    return np.isin(CUI_CODEs[':END_ID'].to_numpy(), code[code >= 0])
+
 
 # Use groupby to convert the DataFrame from CUI_CODES (assignments from concept to code)
 # to a DataFrame of assignments from code to concept.
@@ -816,14 +794,23 @@ CUI_CODEs = CUI_CODEs.dropna().drop_duplicates().reset_index(drop=True)
 
 ulog.print_and_logger_info('-- Converting CUI-CODE assignments to CODE-CUI assignments...')
 
-CODE_CUIs = CUI_CODEs.groupby(':END_ID', sort=False)[':START_ID'].progress_apply(list).reset_index(name='CUI_CODEs')
+# OCTOBER 2026
+# The CUIs of each node_id are looked up in the multimap from the uppercase forms of codes to CUIs, instead of
+# grouping all of CUI_CODEs into lists. If CUI-CODEs has a code in more than one case, the CUIs of all the cases
+# are in one list.
+node_ids = node_metadata['node_id'].drop_duplicates()
+positions, cuis = ucodeindex.lookup_cuis_by_upper_code(index=CODE_INDEX, multimap=CODE_CUI_MULTIMAP, codes=node_ids)
+node_ids, cuis = uid.group_lists(keys=pd.Series(node_ids.to_numpy()[positions], dtype=object), values=cuis)
+CODE_CUIs = pd.DataFrame({'node_id': node_ids, 'CUI_CODEs': cuis})
 
 # JAS the call to upper is new.
 ulog.print_and_logger_info('-- Merging CODE-CUIs with node metadata...')
-node_metadata = node_metadata.merge(CODE_CUIs, how='left', left_on='node_id', right_on=CODE_CUIs[':END_ID'].str.upper())
+node_metadata = node_metadata.merge(CODE_CUIs, how='left', on='node_id')
 
 del CODE_CUIs
-del node_metadata[':END_ID']
+del node_ids
+del positions
+del cuis
 
 # Identify CUIs for non-UMLS nodes that were previously ingested.
 # original comment:
@@ -846,11 +833,18 @@ del node_metadata[':END_ID']
 
 ulog.print_and_logger_info('-- Identifying non-UMLS cross-references from CUI-CODEs.csv...')
 
-node_xref_cui = explode_dbxrefs.merge(CUI_CODEs, how='inner', left_on='node_dbxrefs',
-                                      right_on=CUI_CODEs[':END_ID'].str.upper())
-# JAS FEB 2023 Adding group_keys=False to silence the FutureWarning.
-node_xref_cui = node_xref_cui.groupby('node_id', sort=False, group_keys=False)[':START_ID'].progress_apply(list).reset_index(name='XrefCUIs')
-node_xref_cui['XrefCUIs'] = node_xref_cui['XrefCUIs'].apply(lambda x: pd.unique(x)).apply(list)
+# OCTOBER 2026
+# The CUIs of the cross-references are looked up in the multimap from the uppercase forms of codes to CUIs. The
+# distinct CUIs of each node are then grouped into lists.
+positions, cuis = ucodeindex.lookup_cuis_by_upper_code(index=CODE_INDEX, multimap=CODE_CUI_MULTIMAP,
+                                                       codes=explode_dbxrefs['node_dbxrefs'])
+node_xref_cui = pd.DataFrame({'node_id': explode_dbxrefs['node_id'].to_numpy()[positions],
+                              'CUI': cuis}).drop_duplicates()
+node_ids, cuis = uid.group_lists(keys=node_xref_cui['node_id'], values=node_xref_cui['CUI'].to_numpy())
+node_xref_cui = pd.DataFrame({'node_id': node_ids, 'XrefCUIs': cuis})
+del node_ids
+del positions
+del cuis
 node_metadata = node_metadata.merge(node_xref_cui, how='left', on='node_id')
 del node_xref_cui
 del explode_dbxrefs
@@ -944,30 +938,7 @@ node_metadata_duplicates = node_metadata.groupby(['CUI']).count().reset_index()
 node_metadata_duplicates = node_metadata_duplicates[node_metadata_duplicates['node_id'] > 1]
 
 ulog.print_and_logger_info('--- Assigning alternate CUIs for codes mapped to the same CUI...')
-# For each CUI with multiple codes assigned to it:
-for cui in tqdm(node_metadata_duplicates['CUI']):
-    dfduplicatenodes = node_metadata[node_metadata['CUI'] == cui]
-    cui_assigned = []
-    # For each code in the group, find the first CUI that has not already been assigned either to the
-    # code itself or another code in the group.
-    for index, rows in dfduplicatenodes.iterrows():
-        assigned = False
-        for c in rows['cuis']:
-            if not (c in cui_assigned):
-                if not assigned:
-                    cui_assigned.append(c)
-                    assigned = True
-        # If no CUI was assigned, map to the new CUI minted for the code. This is to address an edge case first
-        # encountered in MP, in which CL:0000792 is both defined in the node file and listed
-        # as a dbxref for MP nodes MP:0010169,MP:0008397, and MP:0010168.
-        if not assigned:
-            # Assign the new CUI. Because this has been converted to a list for building cuilist,
-            # convert to a string.
-            c = ''.join(rows['base64cui'])
-            cui_assigned.append(c)
-
-    # Revise CUI assignments to the codes in the group.
-    node_metadata.loc[node_metadata['CUI'] == cui, 'CUI'] = cui_assigned
+node_metadata['CUI'] = ucuidup.resolve_duplicate_cuis(dfnodes=node_metadata, duplicate_cuis=node_metadata_duplicates['CUI'])
 
 # -----------------------------------------
 
@@ -1023,7 +994,9 @@ subjnode1 = subjnode1[['subject', 'CUI']]
 subjnode1 = subjnode1.drop_duplicates(subset=['subject'])
 
 # Check for subject nodes in CUI_CODEs--i.e., of type 2. Matching CUIs will be in a field named ':END_ID'.
-subjnode2 = edgelist.merge(CUI_CODEs, how='inner', left_on='subject', right_on=':END_ID')
+# OCTOBER 2026 - Only the assignments of codes that match subjects are decoded.
+subjnode2 = edgelist.merge(decode_cui_codes(select_cui_codes_by_code(edgelist['subject'])), how='inner',
+                           left_on='subject', right_on=':END_ID')
 # Add evidence_class
 subjnode2 = subjnode2[['subject', ':START_ID']]
 subjnode2 = subjnode2.drop_duplicates(subset=['subject'])
@@ -1068,7 +1041,9 @@ objnode1 = objnode1[['object', 'CUI']]
 objnode1 = objnode1.drop_duplicates(subset=['object'])
 
 # Check for object nodes in CUI_CODEs--i.e., of type 2. Matching CUIs will be in a field named ':END_ID'.
-objnode2 = edgelist.merge(CUI_CODEs, how='inner', left_on='object', right_on=':END_ID')
+# OCTOBER 2026 - Only the assignments of codes that match objects are decoded.
+objnode2 = edgelist.merge(decode_cui_codes(select_cui_codes_by_code(edgelist['object'])), how='inner',
+                          left_on='object', right_on=':END_ID')
 objnode2 = objnode2[['object', ':START_ID']]
 objnode2 = objnode2.drop_duplicates(subset=['object'])
 
@@ -1220,15 +1195,15 @@ del newCODEs
 # In[21]:
 
 ulog.print_and_logger_info('-- Appending to CUIs.csv...')
-CUIs = CUI_CODEs[[':START_ID']].dropna().drop_duplicates().reset_index(drop=True)
-CUIs.columns = ['CUI:ID']
 
 newCUIs = node_metadata[['CUI']]
 newCUIs.columns = ['CUI:ID']
 
 # Here we isolate only the rows not already matching in existing files
-df = newCUIs.drop_duplicates().merge(CUIs.drop_duplicates(), on=CUIs.columns.to_list(), how='left', indicator=True)
-newCUIs = df.loc[df._merge == 'left_only', df.columns != '_merge']
+# OCTOBER 2026 - The dictionary of encoded CUIs contains each CUI in CUI_CODEs once, so the CUIs that are not
+# already in CUI_CODEs are those that are not in the dictionary.
+newCUIs = newCUIs.drop_duplicates()
+newCUIs = newCUIs.loc[uid.lookup_identifiers(CUI_IDS, newCUIs['CUI:ID']) < 0]
 newCUIs.reset_index(drop=True, inplace=True)
 
 newCUIs = newCUIs.dropna().drop_duplicates().reset_index(drop=True)
@@ -1273,8 +1248,15 @@ newCUI_CODEscuis.columns = [':START_ID', ':END_ID']
 newCUI_CODEs = pd.concat([newCUI_CODEsCUI, newCUI_CODEscuis], axis=0).dropna().drop_duplicates().reset_index(drop=True)
 
 # Here we isolate only the rows not already matching in existing files
-df = newCUI_CODEs.merge(CUI_CODEs, on=CUI_CODEs.columns.to_list(), how='left', indicator=True)
-newCUI_CODEs = df.loc[df._merge == 'left_only', df.columns != '_merge']
+# OCTOBER 2026 - The comparison uses the encoded CUIs and codes. CUIs and codes that are not in CUI_CODEs have
+# code -1, which matches no row of CUI_CODEs. The encoded rows are probed against the row set of CUI_CODEs
+# (see ubkg_row_sets) instead of merged with CUI_CODEs.
+df = pd.DataFrame({':START_ID': uid.lookup_identifiers(CUI_IDS, newCUI_CODEs[':START_ID']),
+                   ':END_ID': uid.lookup_identifiers(CODE_IDS, newCUI_CODEs[':END_ID'])})
+isnew = ~urowsets.is_in_row_set(rowset=urowsets.build_row_set(CUI_CODEs), df=df,
+                                columns=CUI_CODEs.columns.to_list())
+newCUI_CODEs = newCUI_CODEs.loc[isnew]
+del isnew
 newCUI_CODEs = newCUI_CODEs.dropna().drop_duplicates().reset_index(drop=True)
 
 # write/append - comment out during development
@@ -1290,6 +1272,9 @@ del newCUI_CODEsCUI
 del newCUI_CODEscuis
 del df
 del newCUI_CODEs
+del CUI_CODEs
+del CODE_CUI_MULTIMAP
+del CODE_INDEX
 
 # #### Load SUIs from csv
 
@@ -1303,10 +1288,16 @@ del newCUI_CODEs
 
 # In[23]:
 
-SUIs = pd.read_csv(csv_path("SUIs.csv"))
+# OCTOBER 2026
+# Instead of reading SUIs.csv into a DataFrame, the labels and synonyms of the ingestion are checked against an
+# index of the terms in SUIs.csv, which is maintained alongside SUIs.csv. (See ubkg_term_index.) Only the terms
+# appended since the index was last read are parsed. Terms appended during this ingestion are added to the index in
+# memory.
+# SUIs = pd.read_csv(csv_path("SUIs.csv"))
 # SUIs supposedly unique but...discovered 5 NaN names in SUIs.csv and drop them here
 # ?? from ASCII converstion for Oracle to Pandas conversion on original UMLS-Graph-Extracts ??
-SUIs = SUIs.dropna().drop_duplicates().reset_index(drop=True)
+# SUIs = SUIs.dropna().drop_duplicates().reset_index(drop=True)
+TERM_INDEX = utermindex.read_term_index(csvpath=csv_path('SUIs.csv'), in_memory=KEEP_CSVS_IN_MEMORY)
 
 # SEPT 2023 - SUI:ID removed
 # #### Write SUIs (SUI:ID,name) part 1, from label - with existence check
@@ -1321,7 +1312,8 @@ if node_metadata_has_labels:
 
     # SEPT 2023 - SUI:ID removed.
     # newSUIs = node_metadata.merge(SUIs, how='left', left_on='node_label', right_on='name')[['node_id', 'node_label', 'CUI', 'SUI:ID', 'name']]
-    newSUIs = node_metadata.merge(SUIs, how='left', left_on='node_label', right_on='name:ID')[['node_id', 'node_label', 'CUI', 'name:ID']]
+    # newSUIs = node_metadata.merge(SUIs, how='left', left_on='node_label', right_on='name:ID')[['node_id', 'node_label', 'CUI', 'name:ID']]
+    newSUIs = node_metadata[['node_id', 'node_label', 'CUI']]
 
     # June 2023
     # Drop duplicates. This became an issue with the Data Distillery ingests.
@@ -1336,15 +1328,20 @@ if node_metadata_has_labels:
     # change field names and isolate non-matched ones (don't exist in SUIs file)
     # SEPT 2023 - SUI:ID removed; name now name:ID
     # newSUIs.columns = ['node_id', 'name', 'CUI', 'SUI:ID', 'OLDname']
-    newSUIs.columns = ['node_id', 'name:ID', 'CUI', 'OLDname']
+    # newSUIs.columns = ['node_id', 'name:ID', 'CUI', 'OLDname']
     # newSUIs = newSUIs[newSUIs['OLDname'].isnull()][['node_id', 'name', 'CUI', 'SUI:ID']]
-    newSUIs = newSUIs[newSUIs['OLDname'].isnull()][['node_id', 'name:ID', 'CUI']]
+    # newSUIs = newSUIs[newSUIs['OLDname'].isnull()][['node_id', 'name:ID', 'CUI']]
+    # OCTOBER 2026 - Labels that are not in the term index.
+    newSUIs.columns = ['node_id', 'name:ID', 'CUI']
+    newSUIs = newSUIs[~utermindex.contains_terms(index=TERM_INDEX, terms=newSUIs['name:ID'])]
     newSUIs = newSUIs.dropna().drop_duplicates().reset_index(drop=True)
     # newSUIs = newSUIs[['SUI:ID', 'name']]
     newSUIs = newSUIs[['name:ID']]
 
     # update the SUIs dataframe to total those that will be in SUIs.csv
-    SUIs = pd.concat([SUIs, newSUIs], axis=0).reset_index(drop=True)
+    # SUIs = pd.concat([SUIs, newSUIs], axis=0).reset_index(drop=True)
+    # OCTOBER 2026 - update the term index
+    utermindex.add_terms(index=TERM_INDEX, terms=newSUIs['name:ID'])
 
     # write out newSUIs - comment out during development
     if newSUIs.shape[0] > TQDM_THRESHOLD:
@@ -1381,7 +1378,11 @@ if node_metadata_has_labels:
     # SEPT 2023 - SUI:ID replaced with name.
     # newCUI_SUIs = newCUI_SUIs.merge(SUIs, how='left', left_on='node_label', right_on='name')[
     # ['CUI', 'SUI:ID']].dropna().drop_duplicates().reset_index(drop=True)
-    newCUI_SUIs = newCUI_SUIs.merge(SUIs, how='left', left_on='node_label', right_on='name:ID')[
+    # newCUI_SUIs = newCUI_SUIs.merge(SUIs, how='left', left_on='node_label', right_on='name:ID')[
+        # ['CUI', 'name:ID']].dropna().drop_duplicates().reset_index(drop=True)
+    # OCTOBER 2026 - Labels that are in the term index.
+    newCUI_SUIs = newCUI_SUIs[utermindex.contains_terms(index=TERM_INDEX, terms=newCUI_SUIs['node_label'])]
+    newCUI_SUIs = newCUI_SUIs.rename(columns={'node_label': 'name:ID'})[
         ['CUI', 'name:ID']].dropna().drop_duplicates().reset_index(drop=True)
 
     # SEPT 2023 - Drop empty terms.
@@ -1418,17 +1419,23 @@ if node_metadata_has_labels:
 
 ulog.print_and_logger_info('-- Appending terms to CODE-SUIs.csv...')
 
-CODE_SUIs = pd.read_csv(csv_path("CODE-SUIs.csv"))
+if USE_CSV_CACHE or KEEP_CSVS_IN_MEMORY:
+    CODE_SUIs = read_ontology_csv("CODE-SUIs.csv")
+else:
+    CODE_SUIs = pd.read_csv(csv_path("CODE-SUIs.csv"))
 # AUGUST 2023 - Include ACR for HGNC codes.
 # SEPT 2023 - ACR processing is no longer done.
 # CODE_SUIs = CODE_SUIs[((CODE_SUIs[':TYPE'] == 'PT') | (CODE_SUIs[':TYPE'] == 'SY') | (CODE_SUIs[':TYPE'] == 'ACR'))]
 CODE_SUIs = CODE_SUIs[((CODE_SUIs[':TYPE'] == 'PT') | (CODE_SUIs[':TYPE'] == 'SY'))]
 CODE_SUIs = CODE_SUIs.dropna().drop_duplicates().reset_index(drop=True)
+# OCTOBER 2026 - Row set of CODE_SUIs, for the existence checks of new CODE-SUIs. (See ubkg_row_sets.)
+CODE_SUIs_ROWSET = urowsets.build_row_set(CODE_SUIs)
 
 # #### Write CODE-SUIs (:END_ID,:START_ID,:TYPE,CUI) part 1, from label - with existence check
 # This establishes term types of type PT.
 
-def getnewsuisfortermtype(termtype: str, owlsab: str, dfnode: pd.DataFrame, dfsuis: pd.DataFrame, dfcodesuis: pd.DataFrame) -> pd.DataFrame:
+def getnewsuisfortermtype(termtype: str, owlsab: str, dfnode: pd.DataFrame, termindex: dict, dfcodesuis: pd.DataFrame,
+                          codesuisrowset: np.ndarray) -> pd.DataFrame:
 
     # September 2023
     # Identifies new terms of a specified type for codes ingested for a SAB.
@@ -1496,8 +1503,12 @@ def getnewsuisfortermtype(termtype: str, owlsab: str, dfnode: pd.DataFrame, dfsu
     # SEPT 2023 - SUI:ID replaced with name
     # dfnewcodesuis = dfnode.merge(dfsuis, how='left', left_on='node_label', right_on='name')[
        # ['SUI:ID', 'node_id', 'CUI']].dropna().drop_duplicates().reset_index(drop=True)
-    dfnewcodesuis = dfnode.merge(dfsuis, how='left', left_on='node_label', right_on='name:ID')[
-        ['name:ID', 'node_id', 'CUI']].dropna().drop_duplicates().reset_index(drop=True)
+    # dfnewcodesuis = dfnode.merge(dfsuis, how='left', left_on='node_label', right_on='name:ID')[
+        # ['name:ID', 'node_id', 'CUI']].dropna().drop_duplicates().reset_index(drop=True)
+    # OCTOBER 2026 - Labels that are in the term index (termindex).
+    dfnewcodesuis = dfnode.loc[utermindex.contains_terms(index=termindex, terms=dfnode['node_label']),
+                               ['node_label', 'node_id', 'CUI']].rename(columns={'node_label': 'name:ID'})
+    dfnewcodesuis = dfnewcodesuis.dropna().drop_duplicates().reset_index(drop=True)
 
     # Apply the default filter based on specified type.
     # If the SAB for the code is not the same as the ingesting ontology, append the SAB to the term type.
@@ -1526,9 +1537,10 @@ def getnewsuisfortermtype(termtype: str, owlsab: str, dfnode: pd.DataFrame, dfsu
 
     # Filter to only the rows not already matching in existing files--
     # i.e., those for which all columns have identical values.
-    dfnew = dfnewcodesuis.drop_duplicates().merge(dfcodesuis.drop_duplicates(), on=dfcodesuis.columns.to_list(), how='left',
-                                              indicator=True)
-    dfnewcodesuis = dfnew.loc[dfnew._merge == 'left_only', dfnew.columns != '_merge']
+    # OCTOBER 2026 - The rows are probed against the row set of dfcodesuis (codesuisrowset) instead of merged
+    # with dfcodesuis.
+    dfnewcodesuis = urowsets.select_new_rows(df=dfnewcodesuis.drop_duplicates(), rowset=codesuisrowset,
+                                             columns=dfcodesuis.columns.to_list())
     dfnewcodesuis.reset_index(drop=True, inplace=True)
 
     # Logic:
@@ -1570,8 +1582,8 @@ def getnewsuisfortermtype(termtype: str, owlsab: str, dfnode: pd.DataFrame, dfsu
 
 if node_metadata_has_labels:
     # Obtain code terms for new codes for which existing terms of type PT do not exist.
-    newCODE_SUIs = getnewsuisfortermtype(termtype='PT', owlsab=OWL_SAB, dfnode=node_metadata, dfsuis=SUIs,
-                                         dfcodesuis=CODE_SUIs)
+    newCODE_SUIs = getnewsuisfortermtype(termtype='PT', owlsab=OWL_SAB, dfnode=node_metadata, termindex=TERM_INDEX,
+                                         dfcodesuis=CODE_SUIs, codesuisrowset=CODE_SUIs_ROWSET)
 
     # Some SABs, including UBERON, correctly use node_label for HGNC approved names, which
     # results in this script erroneously assigning ACR_SAB labels. Because it is not possible
@@ -1613,8 +1625,8 @@ if node_metadata_has_synonyms:
     # SEPT 2023 - SUI:ID removed.
     # newSUIs = explode_syns.merge(SUIs, how='left', left_on='node_synonyms', right_on='name')[
     # ['node_id', 'node_synonyms', 'CUI', 'SUI:ID', 'name']]
-    newSUIs = explode_syns.merge(SUIs, how='left', left_on='node_synonyms', right_on='name:ID')[
-        ['node_id', 'node_synonyms', 'CUI', 'name:ID']]
+    # newSUIs = explode_syns.merge(SUIs, how='left', left_on='node_synonyms', right_on='name:ID')[
+        # ['node_id', 'node_synonyms', 'CUI', 'name:ID']]
 
     # for Term.name that don't join with node_synonyms update the SUI:ID with base64 of node_synonyms
     # SEPT 2023 - SUI:ID removed
@@ -1625,14 +1637,19 @@ if node_metadata_has_synonyms:
     # SEPT 2023 - SUI:ID removed.
     # newSUIs.columns = ['node_id', 'name', 'CUI', 'SUI:ID', 'OLDname']
     # newSUIs = newSUIs[newSUIs['OLDname'].isnull()][['node_id', 'name', 'CUI', 'SUI:ID']]
-    newSUIs.columns = ['node_id', 'name:ID', 'CUI', 'OLDname']
-    newSUIs = newSUIs[newSUIs['OLDname'].isnull()][['node_id', 'name:ID', 'CUI']]
+    # newSUIs.columns = ['node_id', 'name:ID', 'CUI', 'OLDname']
+    # newSUIs = newSUIs[newSUIs['OLDname'].isnull()][['node_id', 'name:ID', 'CUI']]
+    # OCTOBER 2026 - Synonyms that are not in the term index.
+    newSUIs = explode_syns[~utermindex.contains_terms(index=TERM_INDEX, terms=explode_syns['node_synonyms'])]
+    newSUIs.columns = ['node_id', 'name:ID', 'CUI']
     newSUIs = newSUIs.dropna().drop_duplicates().reset_index(drop=True)
     # newSUIs = newSUIs[['SUI:ID', 'name']]
     newSUIs = newSUIs[['name:ID']]
 
     # update the SUIs dataframe to total those that will be in SUIs.csv
-    SUIs = pd.concat([SUIs, newSUIs], axis=0).reset_index(drop=True)
+    # SUIs = pd.concat([SUIs, newSUIs], axis=0).reset_index(drop=True)
+    # OCTOBER 2026 - update the term index
+    utermindex.add_terms(index=TERM_INDEX, terms=newSUIs['name:ID'])
 
     # write out newSUIs - comment out during development
     if newSUIs.shape[0] > TQDM_THRESHOLD:
@@ -1654,8 +1671,12 @@ if node_metadata_has_synonyms:
     # newCODE_SUIs = explode_syns.merge(SUIs, how='left', left_on='node_synonyms', right_on='name')[
     # ['SUI:ID', 'node_id', 'CUI']].dropna().drop_duplicates().reset_index(drop=True)
 
-    newCODE_SUIs = explode_syns.merge(SUIs, how='left', left_on='node_synonyms', right_on='name:ID')[
-        ['name:ID', 'node_id', 'CUI']].dropna().drop_duplicates().reset_index(drop=True)
+    # newCODE_SUIs = explode_syns.merge(SUIs, how='left', left_on='node_synonyms', right_on='name:ID')[
+        # ['name:ID', 'node_id', 'CUI']].dropna().drop_duplicates().reset_index(drop=True)
+    # OCTOBER 2026 - Synonyms that are in the term index.
+    newCODE_SUIs = explode_syns.loc[utermindex.contains_terms(index=TERM_INDEX, terms=explode_syns['node_synonyms']),
+                                    ['node_synonyms', 'node_id', 'CUI']].rename(columns={'node_synonyms': 'name:ID'})
+    newCODE_SUIs = newCODE_SUIs.dropna().drop_duplicates().reset_index(drop=True)
 
     newCODE_SUIs.insert(2, ':TYPE', 'SY')
     # neo4j-admin import looks for columns named :START_ID and :END_ID.
@@ -1663,9 +1684,9 @@ if node_metadata_has_synonyms:
 
     # Compare the new and old retaining only new--i.e., drop rows that have the exact same values in both new and existing
     # frames.
-    df = newCODE_SUIs.drop_duplicates().merge(CODE_SUIs.drop_duplicates(), on=CODE_SUIs.columns.to_list(), how='left',
-                                          indicator=True)
-    newCODE_SUIs = df.loc[df._merge == 'left_only', df.columns != '_merge']
+    # OCTOBER 2026 - The rows are probed against the row set of CODE_SUIs instead of merged with CODE_SUIs.
+    newCODE_SUIs = urowsets.select_new_rows(df=newCODE_SUIs.drop_duplicates(), rowset=CODE_SUIs_ROWSET,
+                                            columns=CODE_SUIs.columns.to_list())
     # SEPT 2023 - Drop empty synonyms.
     newCODE_SUIs = newCODE_SUIs.replace({'': np.nan})
     newCODE_SUIs = newCODE_SUIs.dropna(subset=[':END_ID'])
@@ -1695,16 +1716,21 @@ node_metadata.reset_index(drop=True, inplace=True)
 node_metadata_has_definitions = len(node_metadata['node_definition'].value_counts()) > 0
 
 if node_metadata_has_definitions:
-    DEFs = pd.read_csv(csv_path("DEFs.csv"))
-    DEFrel = pd.read_csv(csv_path("DEFrel.csv")).rename(columns={':START_ID': 'CUI', ':END_ID': 'ATUI:ID'})
-    DEF_REL = DEFs.merge(DEFrel, how='inner', on='ATUI:ID')[
-        ['SAB', 'DEF', 'CUI']].dropna().drop_duplicates().reset_index(drop=True)
+    if USE_CSV_CACHE or KEEP_CSVS_IN_MEMORY:
+        DEFs = read_ontology_csv("DEFs.csv")
+        DEFrel = read_ontology_csv("DEFrel.csv")
+    else:
+        DEFs = pd.read_csv(csv_path("DEFs.csv"))
+        DEFrel = pd.read_csv(csv_path("DEFrel.csv"))
+    DEFrel = DEFrel.rename(columns={':START_ID': 'CUI', ':END_ID': 'ATUI:ID'})
+    # OCTOBER 2026 - Only the row set of the existing definitions is kept. (See ubkg_row_sets.)
+    DEF_REL_ROWSET = urowsets.build_row_set(DEFs.merge(DEFrel, how='inner', on='ATUI:ID')[
+        ['SAB', 'DEF', 'CUI']].dropna())
     newDEF_REL = node_metadata[['SAB', 'node_definition', 'CUI']].rename(columns={'node_definition': 'DEF'})
 
     # Compare the new and old retaining only new
-    df = newDEF_REL.drop_duplicates().merge(DEF_REL.drop_duplicates(), on=DEF_REL.columns.to_list(), how='left',
-                                            indicator=True)
-    newDEF_REL = df.loc[df._merge == 'left_only', df.columns != '_merge']
+    newDEF_REL = urowsets.select_new_rows(df=newDEF_REL.drop_duplicates(), rowset=DEF_REL_ROWSET,
+                                          columns=['SAB', 'DEF', 'CUI'])
     newDEF_REL.reset_index(drop=True, inplace=True)
 
     # Add identifier
@@ -1729,25 +1755,31 @@ if node_metadata_has_definitions:
 
     del DEFs
     del DEFrel
-    del DEF_REL
+    del DEF_REL_ROWSET
     del newDEF_REL
 
 
+# OCTOBER 2026 - Save the cache of converted codes for the next SAB.
+if USE_CODE_ID_CACHE:
+    uparse.save_code_id_cache(path=csv_path('codeids.cache.jsonl'))
+
 # JAS Sept 2023
 # Remove duplicate rows from all CSVs.
-
-uclean.remove_duplicates(csvpath=csv_path('CODE-SUIs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('CODEs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('CUI-CODEs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('CUI-CUIs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('CUI-SUIs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('CUI-TUIs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('CUIs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('DEFrel.csv'))
-uclean.remove_duplicates(csvpath=csv_path('DEFs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('SUIs.csv'))
-uclean.remove_duplicates(csvpath=csv_path('TUIrel.csv'))
-uclean.remove_duplicates(csvpath=csv_path('TUIs.csv'))
+# OCTOBER 2026 - Only the rows appended since the last deduplication are checked, against a row index that is
+# maintained alongside each CSV. (See ubkg_clean_csv.remove_duplicates_incremental.)
+
+uclean.remove_duplicates_incremental(csvpath=csv_path('CODE-SUIs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('CODEs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('CUI-CODEs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('CUI-CUIs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('CUI-SUIs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('CUI-TUIs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('CUIs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('DEFrel.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('DEFs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('SUIs.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('TUIrel.csv'))
+uclean.remove_duplicates_incremental(csvpath=csv_path('TUIs.csv'))
 
 # --------------------------------------------------
 # QC reporting, Workflow point 3
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Developer utility to check and benchmark the assignment of alternate CUIs to codes that are mapped to the same CUI
+# in the OWLNETS-UMLS-GRAPH script (ubkg_cui_duplicates.resolve_duplicate_cuis).
+# Arguments:
+# 1. (optional) number of codes in the synthetic node frames. The default is 5,000.
+# 2. (optional) number of seeded frames checked. The default is 20.
+
+# The reference is the former loop, which, for each duplicated CUI, filtered the node DataFrame for the codes mapped
+# to the CUI and iterated the matches with iterrows. Each seeded frame maps its codes to a small pool of CUIs, so
+# that most CUIs are duplicated and codes are often reassigned to other duplicated CUIs. The script asserts that both
+# functions choose the same CUIs for each frame, and prints the times for the largest frame.
+
+import sys
+import time
+import random
+import pandas as pd
+
+import ubkg_cui_duplicates as ucuidup
+
+if len(sys.argv) > 1:
+    n = int(sys.argv[1])
+else:
+    n = 5000
+if len(sys.argv) > 2:
+    seeds = int(sys.argv[2])
+else:
+    seeds = 20
+
+
+def resolve_duplicate_cuis_loop(dfnodes: pd.DataFrame, duplicate_cuis: pd.Series) -> list:
+
+    # The former loop of the OWLNETS-UMLS-GRAPH script, which updated node_metadata in place.
+
+    node_metadata = dfnodes.copy()
+    # For each CUI with multiple codes assigned to it:
+    for cui in duplicate_cuis:
+        dfduplicatenodes = node_metadata[node_metadata['CUI'] == cui]
+        cui_assigned = []
+        # For each code in the group, find the first CUI that has not already been assigned either to the
+        # code itself or another code in the group.
+        for index, rows in dfduplicatenodes.iterrows():
+            assigned = False
+            for c in rows['cuis']:
+                if not (c in cui_assigned):
+                    if not assigned:
+                        cui_assigned.append(c)
+                        assigned = True
+            # If no CUI was assigned, map to the new CUI minted for the code.
+            if not assigned:
+                c = ''.join(rows['base64cui'])
+                cui_assigned.append(c)
+
+        # Revise CUI assignments to the codes in the group.
+        node_metadata.loc[node_metadata['CUI'] == cui, 'CUI'] = cui_assigned
+
+    return node_metadata['CUI'].tolist()
+
+
+def get_collision_frame(size: int, seed: int) -> pd.DataFrame:
+
+    # Returns a synthetic node frame in which the codes are mapped to a pool of CUIs of about a quarter of the number
+    # of codes. Each code lists its CUI and up to three other CUIs of the pool.
+
+    rng = random.Random(seed)
+    pool = [f'C{i:07d}' for i in range(max(2, size // 4))]
+    cuis = []
+    for i in range(size):
+        cuilist = [rng.choice(pool)] + rng.sample(pool, rng.randint(0, min(3, len(pool))))
+        cuis.append(list(dict.fromkeys(cuilist)))
+    return pd.DataFrame({'node_id': [f'SAB:{i}' for i in range(size)],
+                         'CUI': [c[0] for c in cuis],
+                         'cuis': cuis,
+                         'base64cui': [f'SAB:{i} CUI' for i in range(size)]})
+
+
+def get_duplicate_cuis(dfnodes: pd.DataFrame) -> pd.Series:
+    # Returns the duplicated CUIs, as the OWLNETS-UMLS-GRAPH script finds them.
+    duplicates = dfnodes.groupby(['CUI']).count().reset_index()
+    return duplicates[duplicates['node_id'] > 1]['CUI']
+
+
+# Check the CUI choices on seeded frames of increasing size.
+for seed in range(seeds):
+    frame = get_collision_frame(size=max(10, n * (seed + 1) // seeds), seed=seed)
+    duplicates = get_duplicate_cuis(frame)
+    expected = resolve_duplicate_cuis_loop(frame, duplicates)
+    actual = list(ucuidup.resolve_duplicate_cuis(dfnodes=frame, duplicate_cuis=duplicates))
+    assert actual == expected, f'CUI choices differ for seed {seed}'
+print(f'CUI choices identical for {seeds} seeded frames of up to {n} codes')
+
+frame = get_collision_frame(size=n, seed=seeds)
+duplicates = get_duplicate_cuis(frame)
+
+start = time.perf_counter()
+resolve_duplicate_cuis_loop(frame, duplicates)
+loop = time.perf_counter() - start
+print(f'loop: {n} codes, {len(duplicates)} duplicated CUIs in {loop:.2f} seconds')
+
+start = time.perf_counter()
+ucuidup.resolve_duplicate_cuis(dfnodes=frame, duplicate_cuis=duplicates)
+elapsed = time.perf_counter() - start
+print(f'grouped: {n} codes, {len(duplicates)} duplicated CUIs in {elapsed:.3f} seconds '
+      f'({loop / elapsed:,.0f} times faster)')
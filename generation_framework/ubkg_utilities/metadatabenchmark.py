@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Developer utility to benchmark the assembly of class metadata (synonyms and dbxrefs) in the owlnets_script.
+# Arguments:
+# 1. (optional) number of classes in the synthetic ontology. The default is 200,000.
+# 2. (optional) number of synonyms per class. The default is 3.
+# 3. (optional) number of classes for which the former scan of the synonyms is timed. The default is 200.
+
+# The synonym dictionary has the format returned by PheKnowLator: keyed by synonym, with the IRI of the class as the
+# value. The time of the scan for all of the classes is extrapolated from the sample.
+
+import sys
+import time
+
+import ubkg_owl_metadata as uowlmeta
+
+if len(sys.argv) > 1:
+    n = int(sys.argv[1])
+else:
+    n = 200000
+if len(sys.argv) > 2:
+    per_class = int(sys.argv[2])
+else:
+    per_class = 3
+if len(sys.argv) > 3:
+    sample = int(sys.argv[3])
+else:
+    sample = 200
+
+classes = [f'http://purl.obolibrary.org/obo/CHEBI_{i}' for i in range(n)]
+synonyms = {f'synonym {j} of chebi {i}': classes[i] for i in range(n) for j in range(per_class)}
+
+start = time.perf_counter()
+for cls in classes[:sample]:
+    syns = '|'.join([k for k, v in synonyms.items() if str(cls) in v])
+scan = (time.perf_counter() - start) * n / sample
+print(f'scan: {n} classes, {len(synonyms)} synonyms in {scan:.1f} seconds (extrapolated from {sample} classes)')
+
+start = time.perf_counter()
+inverted = uowlmeta.invert_class_metadata(metadata=synonyms, classes=classes)
+for cls in classes:
+    syns = '|'.join(inverted.get(str(cls), []))
+elapsed = time.perf_counter() - start
+print(f'inverted: {n} classes, {len(synonyms)} synonyms in {elapsed:.1f} seconds ({scan / elapsed:,.0f} times faster)')
+
+# Check that the inversion gives the same result as the scan for the sample.
+for cls in classes[:sample]:
+    assert '|'.join([k for k, v in synonyms.items() if str(cls) in v]) == '|'.join(inverted.get(str(cls), []))
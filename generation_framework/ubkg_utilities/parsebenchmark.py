@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Developer utility to benchmark the codeReplacements function.
+# Arguments:
+# 1. SAB
+# 2. (optional) number of IRIs to convert. The default is 10,000,000.
+# 3. (optional) number of distinct codes from which the IRIs are sampled. The default is the number of IRIs.
+
+# The IRIs are sampled from a set of examples of the formats that codeReplacements converts, each followed by a
+# numeric code.
+
+import pandas as pd
+import numpy as np
+import ubkg_parsetools as up
+import sys
+import time
+
+SAMPLE_IRIS = [
+    'http://purl.obolibrary.org/obo/CL_',
+    'http://purl.obolibrary.org/obo/UBERON_',
+    'http://purl.obolibrary.org/obo/GO_',
+    'http://purl.obolibrary.org/obo/CHEBI_',
+    'http://purl.obolibrary.org/obo/NCBITaxon_',
+    'http://purl.obolibrary.org/obo/mondo#ordo_clinical_subtype_',
+    'http://identifiers.org/hgnc/',
+    'http://ncicb.nci.nih.gov/xml/owl/EVS/Thesaurus.owl#C',
+    'http://edamontology.org/format_',
+    'http://www.orpha.net/ORDO/Orphanet_',
+    'https://www.uniprot.org/uniprot/P',
+    'http://api.brain-map.org/api/v2/data/Structure/',
+    'http://www.pantherdb.org/panther/family.do?clsAccession=PTHR',
+    'UMLS:C',
+    'MESH:D',
+    'NCIT:C',
+    'HGNC:',
+    'REFSEQ:NR_',
+    'EDAM:format_',
+    'HPO HP:'
+]
+
+sab = sys.argv[1]
+if len(sys.argv) > 2:
+    n = int(sys.argv[2])
+else:
+    n = 10000000
+if len(sys.argv) > 3:
+    distinct = int(sys.argv[3])
+else:
+    distinct = n
+
+rng = np.random.default_rng(0)
+iris = np.array([SAMPLE_IRIS[i % len(SAMPLE_IRIS)] + str(i).zfill(7) for i in range(distinct)], dtype=object)
+x = pd.Series(iris[rng.integers(0, distinct, n)])
+
+start = time.perf_counter()
+up.codeReplacements(x, sab)
+elapsed = time.perf_counter() - start
+print(f'codeReplacements: {n} IRIs for {sab} in {elapsed:.1f} seconds ({n / elapsed:,.0f} IRIs per second)')
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for maintaining a journal of the build of a UBKG context, so that a build that fails can be resumed.
+
+# The build of a context appends to the ontology CSVs, SAB by SAB. If the build fails during a SAB, the CSVs may
+# contain some of the rows of the SAB. To resume the build, the CSVs must be returned to their state after the last
+# SAB that completed.
+
+# The journal is a file of JSON lines in the directory of the ontology CSVs. A build writes:
+# 1. a 'start' entry, with the list of ontologies in the build and a checkpoint of the CSVs before the first SAB
+# 2. a 'complete' entry after each SAB, with the position of the SAB in the list and a checkpoint of the CSVs
+
+# The checkpoint of a CSV records its size in bytes, its header, and a hash of the bytes that precede the end of the
+# file (the same check used by the row index of ubkg_clean_csv). Hashing the entire CSV for every SAB would take
+# minutes for the largest CSVs.
+
+# To resume, the CSVs are truncated to the sizes in the last checkpoint. The sidecar files of the CSVs (the row
+# indexes of ubkg_clean_csv, the caches of ubkg_csv_cache, and the indexes of ubkg_code_index and ubkg_term_index)
+# record the offset and check of the content that they cover, so they are either still valid after truncation or
+# are rebuilt.
+
+import os
+import json
+from datetime import datetime
+
+import ubkg_logging as ulog
+import ubkg_clean_csv as uclean
+
+JOURNAL_FILE = 'build_journal.jsonl'
+
+
+def get_journal_path(csvdir: str) -> str:
+    # Returns the path to the journal for a directory of ontology CSVs.
+    return os.path.join(csvdir, JOURNAL_FILE)
+
+
+def get_csv_checkpoint(csvdir: str) -> dict:
+
+    # Returns a checkpoint of the ontology CSVs in a directory: a dict, keyed by file name, of the size, header, and
+    # check hash of each CSV.
+
+    checkpoint = {}
+    if not os.path.isdir(csvdir):
+        return checkpoint
+
+    for filename in sorted(os.listdir(csvdir)):
+        if not filename.endswith('.csv'):
+            continue
+        csvpath = os.path.join(csvdir, filename)
+        size = os.path.getsize(csvpath)
+        with open(csvpath, 'rb') as fp:
+            header = fp.readline().decode('utf-8')
+            check = uclean.get_row_index_check(fp, size)
+        checkpoint[filename] = {'size': size, 'header': header, 'check': check}
+
+    return checkpoint
+
+
+def write_journal_entry(csvdir: str, entry: dict):
+
+    # Appends an entry to the journal. The entry is flushed to disk before the next SAB starts.
+
+    entry['time'] = datetime.now().isoformat(timespec='seconds')
+    with open(get_journal_path(csvdir), 'a') as fp:
+        fp.write(json.dumps(entry) + '\n')
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def start_journal(csvdir: str, ontology_names: list):
+    # Writes the start entry for a build.
+    write_journal_entry(csvdir, {'event': 'start', 'ontologies': ontology_names, 'position': -1,
+                                 'csvs': get_csv_checkpoint(csvdir)})
+
+
+def write_checkpoint(csvdir: str, ontology_name: str, position: int):
+    # Writes the entry for a SAB that completed.
+    write_journal_entry(csvdir, {'event': 'complete', 'ontology': ontology_name, 'position': position,
+                                 'csvs': get_csv_checkpoint(csvdir)})
+
+
+def read_last_checkpoint(csvdir: str, ontology_names: list) -> dict:
+
+    # Reads the journal and returns the last checkpoint of the most recent build.
+    # Exits if there is no journal or if the most recent build was of a different list of ontologies.
+
+    journalpath = get_journal_path(csvdir)
+    if not os.path.exists(journalpath):
+        ulog.print_and_logger_info(f'ERROR: There is no build journal {journalpath} from which to resume.')
+        exit(1)
+
+    entries = []
+    with open(journalpath, 'r') as fp:
+        for line in fp:
+            # A line that was only partially written when the build failed is ignored.
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    starts = [i for i, e in enumerate(entries) if e['event'] == 'start']
+    if len(starts) == 0:
+        ulog.print_and_logger_info(f'ERROR: The build journal {journalpath} has no start entry.')
+        exit(1)
+
+    start = entries[starts[-1]]
+    if start['ontologies'] != ontology_names:
+        ulog.print_and_logger_info('ERROR: The ontologies to process differ from those of the build in the journal: '
+                                   f"{', '.join(start['ontologies'])}")
+        exit(1)
+
+    return entries[-1]
+
+
+def restore_csv_checkpoint(csvdir: str, checkpoint: dict):
+
+    # Truncates the ontology CSVs to the sizes in a checkpoint, removing rows that were appended after the
+    # checkpoint. Exits without truncating if any CSV was changed before its checkpoint size--e.g., because its
+    # header was rewritten--because it cannot be restored by truncation.
+
+    truncations = []
+    for filename, csv in checkpoint['csvs'].items():
+        csvpath = os.path.join(csvdir, filename)
+        if not os.path.exists(csvpath):
+            ulog.print_and_logger_info(f'ERROR: Cannot resume: {csvpath} no longer exists.')
+            exit(1)
+
+        size = os.path.getsize(csvpath)
+        with open(csvpath, 'rb') as fp:
+            header = fp.readline().decode('utf-8')
+            check = None
+            if size >= csv['size']:
+                check = uclean.get_row_index_check(fp, csv['size'])
+        if header != csv['header'] or check != csv['check']:
+            ulog.print_and_logger_info(f'ERROR: Cannot resume: {csvpath} was changed before byte {csv["size"]}. '
+                                       'Restore the ontology CSVs and build from the start.')
+            exit(1)
+
+        if size > csv['size']:
+            truncations.append((csvpath, size, csv['size']))
+
+    for csvpath, size, checkpoint_size in truncations:
+        ulog.print_and_logger_info(f'-- Truncating {csvpath} from {size} to {checkpoint_size} bytes...')
+        with open(csvpath, 'r+b') as fp:
+            fp.truncate(checkpoint_size)
+
+    # OCTOBER 2026
+    # Rows saved by a deduplication that failed belong to the SAB that is built again, so they are discarded.
+    for filename in checkpoint['csvs']:
+        uclean.remove_dedup_tail(os.path.join(csvdir, filename))
@@ -3,27 +3,202 @@
 
 # UBKG functions for cleaning CSV files.
 
-import pandas as pd
-import ubkg_extract as uextract
+import os
+import hashlib
+import heapq
+import json
+import shutil
+import struct
+import tempfile
+import zlib
+import numpy as np
+from tqdm import tqdm
 import ubkg_logging as ulog
 
-def remove_duplicates(csvpath: str):
+# OCTOBER 2026
+# Memory budget in bytes for the deduplication of a CSV. Files that are too large to be deduplicated within the budget
+# are deduplicated by hash partitions spilled to disk.
+DEDUP_MEMORY_BYTES = 4 * 1024 * 1024 * 1024
+
+# Approximate ratio of the memory used by a set of rows to the size of the rows in the file.
+DEDUP_MEMORY_FACTOR = 4
+
+# Format of the prefix of a row in a partition file: the sequence number of the row in the CSV and the length of the row.
+PARTITION_ROW_PREFIX = struct.Struct('<QI')
+
+# OCTOBER 2026
+# Number of bytes prior to the offset of appended rows that are used to validate a row index. (See
+# remove_duplicates_incremental.)
+ROW_INDEX_CHECK_BYTES = 4096
+
+
+def read_csv_records(fp, bar: tqdm = None):
+
+    # OCTOBER 2026
+    # Generator that returns the records of a CSV file opened in binary mode, as bytes that end with a newline.
+
+    # A record can span multiple lines if a quoted field contains newlines--e.g., in DEFs.csv. A line continues the
+    # prior record if the record so far has an odd number of quote characters. (An escaped quote is doubled, and so
+    # does not change the parity.)
+
+    # Blank lines are skipped, as they would be by pandas.
+
+    record = b''
+    quotes = 0
+    for line in fp:
+        if bar is not None:
+            bar.update(len(line))
+        if not line.endswith(b'\n'):
+            line = line + b'\n'
+        record = record + line
+        quotes = quotes + line.count(b'"')
+        if quotes % 2 == 0:
+            if record.strip() != b'':
+                yield record
+            record = b''
+            quotes = 0
+
+    if record.strip() != b'':
+        yield record
+
+
+def write_partition_record(fp, seq: int, record: bytes):
+    # Writes a record to a partition file, prefixed with its sequence number and length.
+    fp.write(PARTITION_ROW_PREFIX.pack(seq, len(record)))
+    fp.write(record)
+
+
+def read_partition_records(fp):
+    # Generator that returns (sequence number, record) tuples from a partition file.
+    while True:
+        prefix = fp.read(PARTITION_ROW_PREFIX.size)
+        if len(prefix) < PARTITION_ROW_PREFIX.size:
+            return
+        seq, length = PARTITION_ROW_PREFIX.unpack(prefix)
+        yield seq, fp.read(length)
+
+
+def dedup_in_memory(csvpath: str, outpath: str) -> tuple[int, int]:
+
+    # OCTOBER 2026
+    # Writes the unique records of a CSV to outpath, keeping the first occurrence of each record in its original
+    # order. The header is always written.
+
+    # Returns: tuple of (rows before, rows after), excluding the header.
+
+    rowsbefore = 0
+    seen = set()
+    with open(csvpath, 'rb') as fin, open(outpath, 'wb') as fout, \
+            tqdm(total=os.path.getsize(csvpath), desc='Deduplicating', unit='B', unit_scale=True,
+                 unit_divisor=1024) as bar:
+        records = read_csv_records(fin, bar)
+        for header in records:
+            fout.write(header)
+            break
+        for record in records:
+            rowsbefore += 1
+            if record not in seen:
+                seen.add(record)
+                fout.write(record)
+
+    return rowsbefore, len(seen)
+
+
+def dedup_with_partitions(csvpath: str, outpath: str, partitions: int) -> tuple[int, int]:
+
+    # OCTOBER 2026
+    # Writes the unique records of a CSV to outpath, keeping the first occurrence of each record in its original
+    # order, with memory bounded by the size of the largest partition.
+
+    # Logic:
+    # 1. Spill each record, with its sequence number, to one of a number of partition files, based on a hash of the
+    #    record. Duplicate records are always in the same partition.
+    # 2. Deduplicate each partition in memory. Because records are written to a partition in sequence, the first
+    #    occurrence of a record is the one kept.
+    # 3. Merge the deduplicated partitions by sequence number, which restores the original order.
+
+    # Returns: tuple of (rows before, rows after), excluding the header.
+
+    tmpdir = tempfile.mkdtemp(prefix='dedup_', dir=os.path.dirname(os.path.abspath(outpath)))
+    try:
+        rowsbefore = 0
+        spillpaths = [os.path.join(tmpdir, f'spill_{p}.bin') for p in range(partitions)]
+        uniquepaths = [os.path.join(tmpdir, f'unique_{p}.bin') for p in range(partitions)]
+
+        # 1. Spill.
+        ulog.print_and_logger_info(f'-- Spilling rows to {partitions} partitions in {tmpdir}...')
+        spills = [open(p, 'wb') for p in spillpaths]
+        with open(csvpath, 'rb') as fin, \
+                tqdm(total=os.path.getsize(csvpath), desc='Partitioning', unit='B', unit_scale=True,
+                     unit_divisor=1024) as bar:
+            records = read_csv_records(fin, bar)
+            header = b''
+            for header in records:
+                break
+            for record in records:
+                write_partition_record(spills[zlib.crc32(record) % partitions], rowsbefore, record)
+                rowsbefore += 1
+        for fp in spills:
+            fp.close()
+
+        # 2. Deduplicate each partition.
+        rowsafter = 0
+        for spillpath, uniquepath in zip(tqdm(spillpaths, desc='Deduplicating partitions'), uniquepaths):
+            seen = set()
+            with open(spillpath, 'rb') as fin, open(uniquepath, 'wb') as fout:
+                for seq, record in read_partition_records(fin):
+                    if record not in seen:
+                        seen.add(record)
+                        write_partition_record(fout, seq, record)
+            rowsafter += len(seen)
+            os.remove(spillpath)
+
+        # 3. Merge.
+        ulog.print_and_logger_info('-- Merging partitions...')
+        uniques = [open(p, 'rb') for p in uniquepaths]
+        with open(outpath, 'wb') as fout:
+            fout.write(header)
+            for seq, record in tqdm(heapq.merge(*[read_partition_records(fp) for fp in uniques]), total=rowsafter,
+                                    desc='Merging'):
+                fout.write(record)
+        for fp in uniques:
+            fp.close()
+
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return rowsbefore, rowsafter
+
+
+def remove_duplicates(csvpath: str, memory_budget: int = DEDUP_MEMORY_BYTES):
 
     # Removes duplicate rows from a CSV.
 
+    # OCTOBER 2026
+    # The CSV was originally read fully into a DataFrame and deduplicated with drop_duplicates, which exhausted
+    # memory for large ontology CSVs. Rows are now compared as bytes, record by record, with memory bounded by
+    # memory_budget: if the file is too large to deduplicate within the budget, rows are hash-partitioned to
+    # temporary files in the directory of the CSV.
+    # The header and the first occurrence of each row, in the original order, are retained.
+
     ulog.print_and_logger_info(f'Removing duplicate rows from {csvpath}...')
-    ulog.print_and_logger_info('-- Reading file...')
-    dfcsv = uextract.read_csv_with_progress_bar(path=csvpath)
-    rowsbefore = dfcsv.shape[0]
 
-    dfcsv = dfcsv.drop_duplicates().reset_index(drop=True)
-    rowsafter = dfcsv.shape[0]
+    outpath = csvpath + '.dedup'
+    file_size = os.path.getsize(csvpath)
+    partitions = -(-file_size * DEDUP_MEMORY_FACTOR // memory_budget)
+
+    if partitions <= 1:
+        rowsbefore, rowsafter = dedup_in_memory(csvpath=csvpath, outpath=outpath)
+    else:
+        rowsbefore, rowsafter = dedup_with_partitions(csvpath=csvpath, outpath=outpath, partitions=partitions)
 
     duplicaterows = rowsbefore - rowsafter
 
     if duplicaterows > 0:
         ulog.print_and_logger_info('-- Writing deduplicated file back...')
-        uextract.to_csv_with_progress_bar(df=dfcsv,path=csvpath, mode='w', header=True, index=False)
+        os.replace(outpath, csvpath)
+    else:
+        os.remove(outpath)
 
     ulog.print_and_logger_info(f'-- {rowsbefore-rowsafter} duplicate rows removed.')
 
@@ -31,4 +206,216 @@ def remove_duplicates(csvpath: str):
     return
 
 
+def get_row_fingerprint(record: bytes) -> int:
+    # OCTOBER 2026
+    # Returns a 64-bit fingerprint of a CSV record.
+    return int.from_bytes(hashlib.blake2b(record, digest_size=8).digest(), 'little')
+
+
+def get_row_index_paths(csvpath: str) -> tuple[str, str]:
+    # OCTOBER 2026
+    # Returns the paths to the sidecar files of the row index for a CSV:
+    # 1. a NumPy array of the sorted fingerprints of the rows of the CSV
+    # 2. a JSON file of metadata on the CSV at the time the index was written
+    return csvpath + '.rowhash.npy', csvpath + '.rowhash.json'
+
+
+def get_row_index_check(fp, offset: int) -> str:
+    # OCTOBER 2026
+    # Returns a hash of the bytes of a CSV that precede offset. This is used to check that the part of the CSV
+    # covered by a row index has not been changed--e.g., by a rewrite of the header that fills columns.
+    start = max(offset - ROW_INDEX_CHECK_BYTES, 0)
+    fp.seek(start)
+    return hashlib.md5(fp.read(offset - start)).hexdigest()
+
+
+def read_row_index(csvpath: str):
+
+    # OCTOBER 2026
+    # Reads the row index for a CSV.
+    # Returns a tuple of (byte offset at which new rows start, sorted array of fingerprints), or None if the index
+    # does not exist or no longer matches the CSV.
+
+    npypath, jsonpath = get_row_index_paths(csvpath)
+    if not (os.path.exists(npypath) and os.path.exists(jsonpath)):
+        return None
+
+    with open(jsonpath, 'r') as fp:
+        meta = json.load(fp)
+    offset = meta['offset']
+
+    if offset > os.path.getsize(csvpath):
+        return None
 
+    with open(csvpath, 'rb') as fp:
+        header = fp.readline()
+        if header.decode('utf-8') != meta['header'] or get_row_index_check(fp, offset) != meta['check']:
+            return None
+
+    return offset, np.load(npypath, mmap_mode='r')
+
+
+def write_row_index(csvpath: str, fingerprints: np.ndarray):
+
+    # OCTOBER 2026
+    # Writes the row index for a CSV, with the current end of the CSV as the offset at which new rows start.
+
+    npypath, jsonpath = get_row_index_paths(csvpath)
+    offset = os.path.getsize(csvpath)
+    with open(csvpath, 'rb') as fp:
+        header = fp.readline()
+        meta = {'offset': offset, 'header': header.decode('utf-8'), 'check': get_row_index_check(fp, offset)}
+
+    np.save(npypath + '.tmp.npy', fingerprints)
+    os.replace(npypath + '.tmp.npy', npypath)
+    with open(jsonpath, 'w') as fp:
+        json.dump(meta, fp)
+
+
+def build_row_index(csvpath: str):
+
+    # OCTOBER 2026
+    # Builds the row index for a CSV from all of its rows.
+
+    ulog.print_and_logger_info(f'-- Building row index for {csvpath}...')
+    with open(csvpath, 'rb') as fin, \
+            tqdm(total=os.path.getsize(csvpath), desc='Indexing', unit='B', unit_scale=True,
+                 unit_divisor=1024) as bar:
+        records = read_csv_records(fin, bar)
+        for header in records:
+            break
+        fingerprints = np.fromiter((get_row_fingerprint(r) for r in records), dtype=np.uint64)
+
+    write_row_index(csvpath, np.unique(fingerprints))
+
+
+def get_dedup_tail_paths(csvpath: str) -> tuple[str, str]:
+    # OCTOBER 2026
+    # Returns the paths to the file of the deduplicated appended rows of a CSV and to its JSON file, which records the
+    # byte offset at which the rows belong and the check hash of the bytes that precede the offset.
+    return csvpath + '.dedup_tail', csvpath + '.dedup_tail.json'
+
+
+def write_dedup_tail(csvpath: str, offset: int, records: list):
+
+    # OCTOBER 2026
+    # Saves the deduplicated appended rows of a CSV before the CSV is truncated. The rows are written to a temporary
+    # file that is renamed only after it and its JSON file are complete, so the tail file exists only if it is
+    # complete.
+
+    tailpath, jsonpath = get_dedup_tail_paths(csvpath)
+    with open(tailpath + '.tmp', 'wb') as fp:
+        for record in records:
+            fp.write(record)
+        fp.flush()
+        os.fsync(fp.fileno())
+    with open(csvpath, 'rb') as fp:
+        check = get_row_index_check(fp, offset)
+    with open(jsonpath + '.tmp', 'w') as fp:
+        json.dump({'offset': offset, 'check': check}, fp)
+    os.replace(jsonpath + '.tmp', jsonpath)
+    os.replace(tailpath + '.tmp', tailpath)
+
+
+def apply_dedup_tail(csvpath: str, offset: int):
+
+    # OCTOBER 2026
+    # Replaces the rows of a CSV after byte offset with the saved deduplicated appended rows.
+
+    tailpath, _ = get_dedup_tail_paths(csvpath)
+    with open(csvpath, 'r+b') as fout, open(tailpath, 'rb') as fin:
+        fout.truncate(offset)
+        fout.seek(offset)
+        shutil.copyfileobj(fin, fout)
+        fout.flush()
+        os.fsync(fout.fileno())
+
+
+def remove_dedup_tail(csvpath: str):
+    # OCTOBER 2026
+    # Removes the saved deduplicated appended rows of a CSV.
+    tailpath, jsonpath = get_dedup_tail_paths(csvpath)
+    for path in [tailpath, tailpath + '.tmp', jsonpath, jsonpath + '.tmp']:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def restore_dedup_tail(csvpath: str, offset: int):
+
+    # OCTOBER 2026
+    # If a deduplication failed (e.g., because of a crash or a full disk) after it truncated the CSV, this
+    # restores the appended rows. The saved rows are discarded without being restored if they belong at a different
+    # offset or the CSV was changed before the offset. In all cases, the saved rows are then removed.
+
+    tailpath, jsonpath = get_dedup_tail_paths(csvpath)
+    if offset is not None and os.path.exists(tailpath) and os.path.exists(jsonpath):
+        with open(jsonpath, 'r') as fp:
+            meta = json.load(fp)
+        size = os.path.getsize(csvpath)
+        with open(csvpath, 'rb') as fp:
+            # After a failure, the CSV ends between the offset and the end of the saved rows.
+            matches = meta['offset'] == offset and offset <= size <= offset + os.path.getsize(tailpath) \
+                and get_row_index_check(fp, offset) == meta['check']
+        if matches:
+            ulog.print_and_logger_info(f'-- Restoring deduplicated rows of {csvpath} saved by a failed deduplication...')
+            apply_dedup_tail(csvpath, offset)
+    remove_dedup_tail(csvpath)
+
+
+def remove_duplicates_incremental(csvpath: str, memory_budget: int = DEDUP_MEMORY_BYTES):
+
+    # OCTOBER 2026
+    # Removes duplicate rows from a CSV to which rows have been appended since the last deduplication.
+
+    # A sidecar row index for the CSV stores the 64-bit fingerprints of the rows of the CSV, which are already unique,
+    # and the byte offset of the end of the CSV at the time the index was written--i.e., the offset at which
+    # newly appended rows start. Only the appended rows are read and checked against the index and each other, so
+    # the cost is proportional to the number of new rows instead of the size of the CSV.
+
+    # If there is no index, or the index no longer matches the CSV (e.g., because the header was rewritten), the
+    # entire CSV is deduplicated with remove_duplicates and the index is rebuilt.
+
+    # Rows are compared by fingerprint. (See ubkg_row_sets for the probability of a collision.)
+
+    # The deduplicated appended rows are saved to a tail file before the CSV is truncated, so that a failure between
+    # the truncation and the rewrite does not lose them: the next deduplication of the CSV restores them.
+
+    index = read_row_index(csvpath)
+    restore_dedup_tail(csvpath, None if index is None else index[0])
+    if index is None:
+        remove_duplicates(csvpath=csvpath, memory_budget=memory_budget)
+        build_row_index(csvpath)
+        return
+
+    offset, fingerprints = index
+    ulog.print_and_logger_info(f'Removing duplicate rows appended to {csvpath} after byte {offset}...')
+
+    # Read the appended rows and their fingerprints.
+    with open(csvpath, 'rb') as fin:
+        fin.seek(offset)
+        newrecords = list(read_csv_records(fin))
+    newfingerprints = np.fromiter((get_row_fingerprint(r) for r in newrecords), dtype=np.uint64,
+                                  count=len(newrecords))
+
+    # Keep the first occurrence of each fingerprint among the appended rows that is not already in the index.
+    _, first = np.unique(newfingerprints, return_index=True)
+    keep = np.zeros(len(newrecords), dtype=bool)
+    keep[first] = True
+    if len(fingerprints) > 0:
+        pos = np.minimum(np.searchsorted(fingerprints, newfingerprints), len(fingerprints) - 1)
+        keep &= fingerprints[pos] != newfingerprints
+
+    duplicaterows = len(newrecords) - int(keep.sum())
+    if duplicaterows > 0:
+        ulog.print_and_logger_info('-- Writing deduplicated appended rows back...')
+        write_dedup_tail(csvpath, offset, [record for record, k in zip(newrecords, keep) if k])
+        apply_dedup_tail(csvpath, offset)
+        remove_dedup_tail(csvpath)
+
+    ulog.print_and_logger_info(f'-- {duplicaterows} duplicate rows removed.')
+
+    # Add the fingerprints of the appended rows to the index.
+    newfingerprints = np.sort(newfingerprints[keep])
+    write_row_index(csvpath, np.insert(fingerprints, np.searchsorted(fingerprints, newfingerprints), newfingerprints))
+
+    return
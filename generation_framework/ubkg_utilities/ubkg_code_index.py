@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for maintaining an index of the assignments of codes to CUIs in CUI-CODEs.csv.
+
+# The index contains:
+# 1. The rows of CUI-CODEs.csv, with CUIs and codes encoded as integers (see ubkg_identifiers).
+# 2. The dictionaries of CUIs, of codes, and of the uppercase forms of the codes, and the map from each code to its
+#    uppercase form.
+# 3. A multimap in compressed sparse row (CSR) form from the uppercase form of each code to its CUIs, which answers a
+#    batch of lookups of codes with array operations, instead of a Python list of CUIs per code.
+
+# The index can be persisted in a directory named CUI-CODEs.csv.index, which contains:
+# 1. A text file for each dictionary (cuis.txt, codes.txt, uppercodes.txt), with one identifier per line.
+# 2. Binary files of int32 codes: the uppercase form of each code (codeupper.bin) and the rows (cuirows.bin and
+#    coderows.bin).
+# 3. A manifest file (manifest.json) that records the number of entries and the size in bytes of each file, and the
+#    byte offset, header and check hash of the part of the CSV that was indexed.
+# Dictionaries only grow at their ends, and rows are only appended, so the files are appended to instead of
+# rewritten. When the index is read, only the rows that were appended to the CSV after the offset are parsed.
+# If the CSV no longer matches the manifest--e.g., because it was replaced or deduplicated--the index is rebuilt.
+
+# The CSR multimap is derived from the rows each time the index is read, because appended rows change the offsets of
+# all the keys after them.
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+import ubkg_logging as ulog
+import ubkg_clean_csv as uclean
+import ubkg_csv_cache as ucache
+import ubkg_identifiers as uid
+
+# Version of the format of the persisted index.
+CODE_INDEX_VERSION = 1
+
+# Dictionaries of the index and the files in which they are persisted.
+CODE_INDEX_DICTIONARIES = {'cui_ids': 'cuis.txt', 'code_ids': 'codes.txt', 'upper_ids': 'uppercodes.txt'}
+
+# Arrays of the index and the files in which they are persisted.
+CODE_INDEX_ARRAYS = {'code_upper': 'codeupper.bin', 'cui_rows': 'cuirows.bin', 'code_rows': 'coderows.bin'}
+
+# Type of the codes in the persisted arrays.
+CODE_INDEX_DTYPE = np.int32
+
+# Indexes kept in memory between SABs when the OWLNETS-UMLS-GRAPH script runs in process, keyed by CSV path.
+INDEX_MEMORY = {}
+
+
+def get_index_dir(csvpath: str) -> str:
+    # Returns the path to the directory of the persisted index for a CSV.
+    return csvpath + '.index'
+
+
+def new_code_index(header: str) -> dict:
+
+    # Returns an empty index.
+
+    index = {'offset': 0, 'header': header, 'check': None, 'saved': None}
+    for key in CODE_INDEX_DICTIONARIES:
+        index[key] = pd.Index([], dtype=object)
+    for key in CODE_INDEX_ARRAYS:
+        index[key] = np.zeros(0, dtype=CODE_INDEX_DTYPE)
+    return index
+
+
+def extend_code_index(index: dict, cuicodes: pd.DataFrame):
+
+    # Adds rows of CUI-CODEs to an index.
+    # Arguments:
+    #   index: index from new_code_index or read_code_index
+    #   cuicodes: DataFrame with columns :START_ID (CUI) and :END_ID (code)
+
+    cuicodes = cuicodes.dropna()
+    cuirows, index['cui_ids'] = uid.extend_identifiers(index['cui_ids'], cuicodes[':START_ID'])
+    count = len(index['code_ids'])
+    coderows, index['code_ids'] = uid.extend_identifiers(index['code_ids'], cuicodes[':END_ID'])
+    # Only the codes that are new to the dictionary are converted to uppercase.
+    codeupper, index['upper_ids'] = uid.derive_identifiers(index['code_ids'][count:], lambda s: s.str.upper(),
+                                                           derived=index['upper_ids'])
+
+    index['code_upper'] = np.concatenate([index['code_upper'], codeupper.astype(CODE_INDEX_DTYPE)])
+    index['cui_rows'] = np.concatenate([index['cui_rows'], cuirows.astype(CODE_INDEX_DTYPE)])
+    index['code_rows'] = np.concatenate([index['code_rows'], coderows.astype(CODE_INDEX_DTYPE)])
+
+
+def build_code_index(cuicodes: pd.DataFrame) -> dict:
+
+    # Builds an index from a DataFrame of CUI-CODEs.
+
+    index = new_code_index(header=None)
+    extend_code_index(index=index, cuicodes=cuicodes)
+    return index
+
+
+def read_code_index_store(csvpath: str, header: str) -> dict:
+
+    # Reads the persisted index for a CSV.
+    # Returns the index, or None if the index does not exist or no longer matches the CSV.
+
+    indexdir = get_index_dir(csvpath)
+    manifestpath = os.path.join(indexdir, 'manifest.json')
+    if not os.path.exists(manifestpath):
+        return None
+
+    with open(manifestpath, 'r') as fp:
+        manifest = json.load(fp)
+
+    if manifest['version'] != CODE_INDEX_VERSION or manifest['header'] != header:
+        return None
+    if not ucache.csv_matches(csvpath=csvpath, offset=manifest['offset'], header=manifest['header'],
+                              check=manifest['check']):
+        return None
+
+    index = new_code_index(header=header)
+    index['offset'] = manifest['offset']
+    index['check'] = manifest['check']
+
+    for key, file in CODE_INDEX_DICTIONARIES.items():
+        with open(os.path.join(indexdir, file), 'rb') as fp:
+            text = fp.read(manifest['sizes'][file]).decode('utf-8')
+        values = text[:-1].split('\n') if len(text) > 0 else []
+        if len(values) != manifest['counts'][file]:
+            return None
+        index[key] = pd.Index(values, dtype=object)
+
+    for key, file in CODE_INDEX_ARRAYS.items():
+        values = np.fromfile(os.path.join(indexdir, file), dtype=CODE_INDEX_DTYPE, count=manifest['counts'][file])
+        if len(values) != manifest['counts'][file]:
+            return None
+        index[key] = values
+
+    index['saved'] = manifest
+    return index
+
+
+def write_code_index_store(csvpath: str, index: dict):
+
+    # Persists an index, appending to the files of the persisted index the entries added since it was read.
+
+    indexdir = get_index_dir(csvpath)
+    saved = index['saved']
+    if saved is None:
+        shutil.rmtree(indexdir, ignore_errors=True)
+        os.makedirs(indexdir)
+
+    counts = {}
+    sizes = {}
+    parts = [(index[key], file, True) for key, file in CODE_INDEX_DICTIONARIES.items()] + \
+            [(index[key], file, False) for key, file in CODE_INDEX_ARRAYS.items()]
+    for values, file, is_text in parts:
+        path = os.path.join(indexdir, file)
+        start = 0 if saved is None else saved['counts'][file]
+        # Discard anything written after the last manifest--e.g., by a build that failed.
+        with open(path, 'ab') as fp:
+            fp.truncate(0 if saved is None else saved['sizes'][file])
+            if is_text:
+                fp.write(''.join(v + '\n' for v in values[start:]).encode('utf-8'))
+            else:
+                fp.write(values[start:].astype(CODE_INDEX_DTYPE).tobytes())
+        counts[file] = len(values)
+        sizes[file] = os.path.getsize(path)
+
+    manifest = {'version': CODE_INDEX_VERSION, 'offset': index['offset'], 'header': index['header'],
+                'check': index['check'], 'counts': counts, 'sizes': sizes}
+    manifestpath = os.path.join(indexdir, 'manifest.json')
+    with open(manifestpath + '.tmp', 'w') as fp:
+        json.dump(manifest, fp)
+    os.replace(manifestpath + '.tmp', manifestpath)
+    index['saved'] = manifest
+
+
+def read_code_index(csvpath: str, persist: bool = True, in_memory: bool = False) -> dict:
+
+    # Reads the index of CUI-CODEs.csv, parsing only the rows appended since the index was last read.
+
+    # Arguments:
+    #   csvpath: full path to CUI-CODEs.csv
+    #   persist: read and update the persisted index on disk
+    #   in_memory: keep the index in INDEX_MEMORY for the next read in the same process
+
+    file_size = os.path.getsize(csvpath)
+    with open(csvpath, 'rb') as fp:
+        header = fp.readline().decode('utf-8')
+    columns = header.rstrip('\r\n').split(',')
+
+    index = INDEX_MEMORY.pop(csvpath, None)
+    if index is not None and not ucache.csv_matches(csvpath=csvpath, offset=index['offset'], header=index['header'],
+                                                    check=index['check']):
+        index = None
+    if index is None and persist:
+        index = read_code_index_store(csvpath=csvpath, header=header)
+        if index is None:
+            ulog.print_and_logger_info(f'-- Building code index in {get_index_dir(csvpath)}...')
+    if index is None:
+        index = new_code_index(header=header)
+
+    if index['offset'] < file_size:
+        ulog.print_and_logger_info(f'-- Indexing {file_size - index["offset"]} bytes appended to {csvpath}...')
+        cuicodes = ucache.read_csv_tail(csvpath=csvpath, offset=index['offset'], columns=columns)
+        extend_code_index(index=index, cuicodes=cuicodes)
+        index['offset'] = file_size
+        with open(csvpath, 'rb') as fp:
+            index['check'] = uclean.get_row_index_check(fp, file_size)
+        if persist:
+            write_code_index_store(csvpath=csvpath, index=index)
+
+    if in_memory:
+        INDEX_MEMORY[csvpath] = index
+
+    return index
+
+
+def get_cui_codes(index: dict) -> pd.DataFrame:
+
+    # Returns the distinct rows of CUI-CODEs, encoded, in order of first appearance.
+
+    cuicodes = pd.DataFrame({':START_ID': index['cui_rows'], ':END_ID': index['code_rows']})
+    return cuicodes.drop_duplicates().reset_index(drop=True)
+
+
+def get_code_cui_multimap(index: dict, cuicodes: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+
+    # Builds the multimap from the uppercase form of each code to its CUIs.
+    # Arguments:
+    #   index: index from read_code_index or build_code_index
+    #   cuicodes: distinct rows of CUI-CODEs, from get_cui_codes
+
+    # Returns: the CSR multimap (offsets and values). The CUIs of a code are distinct and in the order of their rows.
+
+    upper = pd.DataFrame({'upper': index['code_upper'][cuicodes[':END_ID'].to_numpy()],
+                          'cui': cuicodes[':START_ID'].to_numpy()}).drop_duplicates()
+    return uid.build_multimap(keys=upper['upper'].to_numpy(), values=upper['cui'].to_numpy(),
+                              size=len(index['upper_ids']))
+
+
+def lookup_cuis_by_upper_code(index: dict, multimap: tuple, codes: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+
+    # Looks up the CUIs of a batch of codes, matching the codes to the uppercase forms of the codes in CUI-CODEs.
+    # Arguments:
+    #   index: index from read_code_index or build_code_index
+    #   multimap: multimap from get_code_cui_multimap
+    #   codes: Series of codes
+
+    # Returns: an array of the positions in codes and an array of the matching CUIs (as strings), with one entry per
+    # match.
+
+    offsets, values = multimap
+    keys = uid.lookup_identifiers(index['upper_ids'], codes)
+    positions, cuis = uid.lookup_multimap(offsets=offsets, values=values, keys=keys)
+    return positions, uid.decode_identifiers(index['cui_ids'], cuis)
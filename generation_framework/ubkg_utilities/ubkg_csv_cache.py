@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for maintaining a columnar cache of the ontology CSVs.
+
+# The OWLNETS-UMLS-GRAPH script reads large ontology CSVs (e.g., CUI-CODEs.csv, SUIs.csv) for every SAB that it
+# ingests. Because the script only appends to these CSVs, most of the content of a CSV has already been parsed in the
+# ingestion of a prior SAB.
+
+# The cache for a CSV is a directory named <CSV file>.cache that contains:
+# 1. A set of segment files in Arrow IPC (Feather) format. Each segment contains the rows of a byte range of the CSV.
+# 2. A manifest file (manifest.json) that lists the segments and records the byte offset of the end of the
+#    last segment, the header of the CSV, and a hash of the bytes that precede the offset.
+
+# When a CSV is read through the cache, the segments are read with memory mapping, and only the rows that were
+# appended to the CSV after the last segment are parsed from text. The appended rows are then written as a new
+# segment. If the CSV no longer matches the manifest--e.g., because the CSV was replaced or its header was rewritten--
+# the cache is rebuilt from the entire CSV.
+
+# The CSVs remain the artifacts for the neo4j-admin import; the cache is only used to read them.
+
+# All columns are read as strings.
+
+# The cache requires the pyarrow package (see requirements.txt). In an environment in which pyarrow is not installed,
+# read_csv_from_segments falls back to reading CSVs without the cache.
+
+# When the OWLNETS-UMLS-GRAPH script is run in the process of build_csv.py (the in-process mode), the DataFrames read
+# from CSVs are also kept in memory (MEMORY_CACHE) between SABs, in the same way as the segments of the columnar
+# cache: the ingestion of the next SAB only parses the rows that were appended to each CSV.
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+import ubkg_logging as ulog
+import ubkg_clean_csv as uclean
+
+# Number of segments after which the segments of a cache are compacted into a single segment.
+CACHE_MAX_SEGMENTS = 16
+
+# In-memory cache of DataFrames read from CSVs, keyed by CSV path. Each entry is a dict with the byte offset read,
+# the CSV header, the check hash, and the DataFrame.
+MEMORY_CACHE = {}
+
+
+def get_cache_dir(csvpath: str) -> str:
+    # Returns the path to the cache directory for a CSV.
+    return csvpath + '.cache'
+
+
+def read_cache_manifest(csvpath: str) -> dict:
+
+    # Reads the manifest of the cache for a CSV.
+    # Returns the manifest, or None if the cache does not exist or no longer matches the CSV.
+
+    manifestpath = os.path.join(get_cache_dir(csvpath), 'manifest.json')
+    if not os.path.exists(manifestpath):
+        return None
+
+    with open(manifestpath, 'r') as fp:
+        manifest = json.load(fp)
+
+    if not csv_matches(csvpath=csvpath, offset=manifest['offset'], header=manifest['header'],
+                       check=manifest['check']):
+        return None
+
+    return manifest
+
+
+def csv_matches(csvpath: str, offset: int, header: str, check: str) -> bool:
+
+    # Checks whether the bytes of a CSV that precede offset are the bytes that were cached.
+
+    if offset > os.path.getsize(csvpath):
+        return False
+    with open(csvpath, 'rb') as fp:
+        if fp.readline().decode('utf-8') != header:
+            return False
+        return uclean.get_row_index_check(fp, offset) == check
+
+
+def write_cache_manifest(csvpath: str, segments: list, offset: int, header: str):
+
+    # Writes the manifest of the cache for a CSV.
+
+    with open(csvpath, 'rb') as fp:
+        check = uclean.get_row_index_check(fp, offset)
+    manifest = {'segments': segments, 'offset': offset, 'header': header, 'check': check}
+
+    manifestpath = os.path.join(get_cache_dir(csvpath), 'manifest.json')
+    with open(manifestpath + '.tmp', 'w') as fp:
+        json.dump(manifest, fp)
+    os.replace(manifestpath + '.tmp', manifestpath)
+
+
+def read_csv_tail(csvpath: str, offset: int, columns: list) -> pd.DataFrame:
+
+    # Parses the rows of a CSV that start at byte offset. If offset is 0, the header is read from the CSV.
+
+    with open(csvpath, 'rb') as fp:
+        fp.seek(offset)
+        if offset == 0:
+            return pd.read_csv(fp, dtype=str)
+        return pd.read_csv(fp, dtype=str, header=None, names=columns)
+
+
+def read_csv_from_segments(path: str, header: str, columns: list) -> pd.DataFrame:
+
+    # Reads an ontology CSV through its columnar cache, updating the cache with rows appended since the last read.
+    # Returns None if pyarrow is not installed.
+
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        ulog.print_and_logger_info('-- The pyarrow package is not installed; reading without the CSV cache...')
+        return None
+
+    cachedir = get_cache_dir(path)
+    file_size = os.path.getsize(path)
+
+    manifest = read_cache_manifest(path)
+    if manifest is None:
+        ulog.print_and_logger_info(f'-- Building CSV cache in {cachedir}...')
+        shutil.rmtree(cachedir, ignore_errors=True)
+        os.makedirs(cachedir)
+        segments = []
+        offset = 0
+    else:
+        segments = manifest['segments']
+        offset = manifest['offset']
+        ulog.print_and_logger_info(f'-- Reading {len(segments)} cached segments from {cachedir}...')
+
+    # Read the cached segments.
+    tables = [feather.read_table(os.path.join(cachedir, s), memory_map=True) for s in segments]
+
+    # Parse and cache the rows appended since the last read.
+    if offset < file_size:
+        ulog.print_and_logger_info(f'-- Parsing {file_size - offset} bytes appended to {path}...')
+        dftail = read_csv_tail(csvpath=path, offset=offset, columns=columns)
+        # All columns are strings. The schema is explicit because the columns of a segment without rows (e.g., from
+        # a CSV with only a header) would otherwise have the Arrow null type, which later segments cannot be cast to.
+        schema = pa.schema([(str(column), pa.string()) for column in dftail.columns])
+        table = pa.Table.from_pandas(dftail, schema=schema, preserve_index=False)
+        tables.append(table)
+        segment = f'segment_{len(segments):04d}_{offset}.arrow'
+        feather.write_feather(table, os.path.join(cachedir, segment), compression='uncompressed')
+        segments.append(segment)
+
+    if len(tables) == 0:
+        return pd.DataFrame(columns=columns, dtype=object)
+
+    # Segments cached before the schema was explicit may have null columns.
+    schema = pa.schema([(field.name, pa.string()) for field in tables[-1].schema])
+    table = pa.concat_tables([t if t.schema == schema else t.cast(schema) for t in tables])
+
+    # Compact the segments.
+    if len(segments) > CACHE_MAX_SEGMENTS:
+        ulog.print_and_logger_info(f'-- Compacting {len(segments)} segments in {cachedir}...')
+        segment = f'segment_{file_size}.arrow'
+        feather.write_feather(table, os.path.join(cachedir, segment), compression='uncompressed')
+        for s in segments:
+            os.remove(os.path.join(cachedir, s))
+        segments = [segment]
+
+    write_cache_manifest(csvpath=path, segments=segments, offset=file_size, header=header)
+
+    # Arrow converts null strings to None; restore NaN, as would be read by pandas.
+    df = table.to_pandas()
+    return df.where(df.notna(), np.nan)
+
+
+def read_csv_with_cache(path: str, columnar: bool = True, in_memory: bool = False) -> pd.DataFrame:
+
+    # Reads an ontology CSV, parsing only the rows appended since the last read.
+
+    # Arguments:
+    #   path: full path to CSV file
+    #   columnar: use the columnar cache on disk
+    #   in_memory: keep the DataFrame in MEMORY_CACHE for the next read in the same process
+
+    # Returns: DataFrame. The DataFrame is a shallow copy of the DataFrame in MEMORY_CACHE, so callers should not
+    # modify values in place.
+
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as fp:
+        header = fp.readline().decode('utf-8')
+    columns = header.rstrip('\r\n').split(',')
+
+    entry = MEMORY_CACHE.pop(path, None)
+    if entry is not None and csv_matches(csvpath=path, offset=entry['offset'], header=entry['header'],
+                                         check=entry['check']):
+        df = entry['df']
+        if entry['offset'] < file_size:
+            ulog.print_and_logger_info(f'-- Parsing {file_size - entry["offset"]} bytes appended to {path}...')
+            dftail = read_csv_tail(csvpath=path, offset=entry['offset'], columns=columns)
+            df = pd.concat([df, dftail], axis=0, ignore_index=True)
+    else:
+        df = None
+        if columnar:
+            df = read_csv_from_segments(path=path, header=header, columns=columns)
+        if df is None:
+            df = read_csv_tail(csvpath=path, offset=0, columns=columns)
+
+    if in_memory:
+        with open(path, 'rb') as fp:
+            check = uclean.get_row_index_check(fp, file_size)
+        MEMORY_CACHE[path] = {'offset': file_size, 'header': header, 'check': check, 'df': df}
+
+    return df.copy(deep=False)
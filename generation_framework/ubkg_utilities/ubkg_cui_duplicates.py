@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG function for assigning alternate CUIs to codes that the OWLNETS-UMLS-GRAPH script maps to the same CUI.
+# The former per-CUI loop is kept as the reference in cuiduplicatesbenchmark.py.
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+
+def resolve_duplicate_cuis(dfnodes: pd.DataFrame, duplicate_cuis: pd.Series) -> np.ndarray:
+
+    # Assigns alternate CUIs to the codes in groups of codes that are mapped to the same CUI.
+    # Returns the array of CUIs for the rows of dfnodes.
+
+    # This replaces a loop that, for each duplicated CUI, filtered the entire node DataFrame for the codes mapped
+    # to the CUI and iterated the matches with iterrows--i.e., a full scan of the DataFrame for every duplicated CUI.
+    # The codes mapped to each duplicated CUI are now found once, with a hash (groupby) of the CUIs, and each group
+    # is resolved from lists.
+
+    # The CUI choices are identical to those of the loop:
+    # 1. Duplicated CUIs are processed in sorted order.
+    # 2. The codes in a group are processed in the order of the rows of dfnodes. Each code is assigned the first
+    #    CUI in its cuis list that has not already been assigned to another code in the group; if there is none,
+    #    the code is assigned its new CUI.
+    # 3. Because the loop filtered on the current CUI assignments, a code that is reassigned to a duplicated CUI
+    #    that has not yet been processed joins the group of that CUI.
+
+    cuiarray = dfnodes['CUI'].to_numpy(dtype=object, copy=True)
+    cuislist = dfnodes['cuis'].tolist()
+    base64cuilist = dfnodes['base64cui'].tolist()
+
+    duplicate_cuis = sorted(duplicate_cuis)
+    positions = dfnodes.groupby('CUI', sort=False).indices
+    pending = {cui: list(positions[cui]) for cui in duplicate_cuis}
+
+    for cui in tqdm(duplicate_cuis):
+        group = sorted(pending.pop(cui))
+        cui_assigned = set()
+        for pos in group:
+            assigned = None
+            for c in cuislist[pos]:
+                if c not in cui_assigned:
+                    assigned = c
+                    break
+            # If no CUI was assigned, map to the new CUI minted for the code. This is to address an edge case first
+            # encountered in MP, in which CL:0000792 is both defined in the node file and listed
+            # as a dbxref for MP nodes MP:0010169,MP:0008397, and MP:0010168.
+            if assigned is None:
+                # Assign the new CUI. Because this has been converted to a list for building cuilist,
+                # convert to a string.
+                assigned = ''.join(base64cuilist[pos])
+            cui_assigned.add(assigned)
+            cuiarray[pos] = assigned
+            # A code reassigned to a duplicated CUI that has not yet been processed joins that group.
+            if assigned != cui and assigned in pending:
+                pending[assigned].append(pos)
+
+    return cuiarray
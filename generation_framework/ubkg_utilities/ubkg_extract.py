@@ -7,9 +7,10 @@
 import requests
 import os
 import gzip
+import io
+import contextlib
 from tqdm import tqdm
 import pandas as pd
-import numpy as np
 import gdown
 import fileinput
 import sys
@@ -193,24 +194,118 @@ def get_gzipped_file(gzip_url: str, zip_path: str, extract_path: str, zipfilenam
     return extract_from_gzip(zipfilename=zip_full_path, outputpath=extract_path, outfilename=outfilename)
 
 
-def to_csv_with_progress_bar(df: pd.DataFrame, path: str, sep: str = ',', header: bool = True, index: bool = True, mode: str = 'w'):
+# OCTOBER 2026
+# Size in bytes of the write buffer used by to_csv_with_progress_bar.
+WRITE_BUFFER_BYTES = 8 * 1024 * 1024
+
+
+@contextlib.contextmanager
+def open_csv_for_write(path: str, mode: str = 'w', compression: str = None, buffer_size: int = WRITE_BUFFER_BYTES,
+                       encoding: str = 'utf-8'):
+
+    # OCTOBER 2026
+    # Opens a buffered text handle for writing or appending to a CSV file, with optional compression.
+    # Use as a context manager.
+
+    # Arguments:
+    #   path: full path to CSV file.
+    #   mode: 'w' (write) or 'a' (append)
+    #   compression: None, 'gzip', or 'zstd'. If None, the compression is inferred from a file extension of .gz or
+    #                .zst.
+    #   buffer_size: size in bytes of the write buffer
+    #   encoding: text encoding
+
+    # Appending to a compressed file adds a new gzip member or zstd frame to the file. Both formats allow
+    # concatenated members/frames.
+
+    # The zstd compression uses the zstandard package (see requirements.txt).
+
+    if compression is None:
+        if path.lower().endswith('.gz'):
+            compression = 'gzip'
+        elif path.lower().endswith('.zst'):
+            compression = 'zstd'
+
+    if compression is None:
+        with open(path, mode, buffering=buffer_size, encoding=encoding, newline='') as fp:
+            yield fp
+        return
+
+    if compression not in ['gzip', 'zstd']:
+        raise ValueError(f'Unsupported compression for {path}: {compression}')
+
+    with open(path, mode + 'b', buffering=buffer_size) as raw:
+        if compression == 'gzip':
+            stream = gzip.GzipFile(fileobj=raw, mode=mode + 'b')
+        else:
+            import zstandard
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        with io.TextIOWrapper(stream, encoding=encoding, newline='') as fp:
+            yield fp
+
+
+def to_csv_with_progress_bar(df: pd.DataFrame, path: str, sep: str = ',', header: bool = True, index: bool = True,
+                             mode: str = 'w', compression: str = None, buffer_size: int = WRITE_BUFFER_BYTES):
 
     # Wraps the pandas to_csv with a tqdm progress bar.
 
     # df: DataFrame to write to CSV.
     # path: full path to CSV file.
-
-    chunks = np.array_split(df.index, 100)  # split into 100 chunks
-    for chunk, subset in enumerate(tqdm(chunks, desc='Writing')):
-        if chunk == 0:
-            #First row, which may be part of an append of the contents of df to an existing file.
-            df.loc[subset].to_csv(path, header=header, mode=mode, index=index, sep=sep)
-        else:
-            df.loc[subset].to_csv(path, header=None, mode='a', index=index, sep=sep)
+    # OCTOBER 2026
+    # compression: None, 'gzip', or 'zstd' (see open_csv_for_write)
+    # buffer_size: size in bytes of the write buffer
+
+    # OCTOBER 2026
+    # The DataFrame was originally split into 100 chunks by index label, and each chunk (obtained with loc) was
+    # written with a separate call to to_csv that re-opened the file. The chunks are now positional slices
+    # (obtained with iloc) written to a single open, buffered file handle.
+
+    rows = df.shape[0]
+    chunk_rows = max(-(-rows // 100), 1)  # split into 100 chunks
+
+    with open_csv_for_write(path=path, mode=mode, compression=compression, buffer_size=buffer_size) as fp:
+        # Write the first chunk, which may be part of an append of the contents of df to an existing file, with the
+        # header. This also writes the header for an empty DataFrame.
+        df.iloc[0:chunk_rows].to_csv(fp, header=header, index=index, sep=sep)
+        with tqdm(total=rows, desc='Writing') as bar:
+            bar.update(min(chunk_rows, rows))
+            for start in range(chunk_rows, rows, chunk_rows):
+                df.iloc[start:start + chunk_rows].to_csv(fp, header=False, index=index, sep=sep)
+                bar.update(min(chunk_rows, rows - start))
 
     return
 
 
+# OCTOBER 2026
+# Identifier columns in the ontology CSVs. These columns are always read as strings so that pandas does not have to
+# infer (and possibly mix) types across chunks.
+UBKG_CSV_DTYPES = {':START_ID': str, ':END_ID': str, ':TYPE': str, 'SAB': str, 'CodeID:ID': str, 'CUI:ID': str}
+
+# Target size in bytes of each chunk read by read_csv_with_progress_bar.
+READ_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def get_chunksize(path: str, chunk_bytes: int = READ_CHUNK_BYTES, sample_bytes: int = 1024 * 1024) -> int:
+
+    # OCTOBER 2026
+    # Estimates the number of rows in a chunk of approximately chunk_bytes, based on the average length of the rows
+    # in a sample from the start of the file.
+
+    # Arguments:
+    #   path: full path to CSV file.
+    #   chunk_bytes: target number of bytes per chunk
+    #   sample_bytes: number of bytes to sample from the start of the file
+
+    # Returns: number of rows per chunk, with a floor of 1000 (the original fixed chunk size).
+
+    with open(path, 'rb') as fp:
+        sample = fp.read(sample_bytes)
+
+    rows = max(sample.count(b'\n'), 1)
+    row_bytes = max(len(sample) // rows, 1)
+    return max(chunk_bytes // row_bytes, 1000)
+
+
 def read_csv_with_progress_bar(path: str, rows_to_read: int = 0, comment: str = None, sep: str = ',', on_bad_lines: str = 'skip', encoding: str = 'utf-8', index_col: int = None) -> pd.DataFrame:
 
     # Wraps the pandas read_csv with a tqdm progress bar.
@@ -224,22 +319,32 @@ def read_csv_with_progress_bar(path: str, rows_to_read: int = 0, comment: str =
 
     # Returns: DataFrame
 
-    # Get the number of lines in the file.
-    with open(path, 'r') as fp:
-        lines = len(fp.readlines())
+    # OCTOBER 2026
+    # The progress bar was originally sized by counting lines with readlines(), which loaded the entire file into
+    # memory as a list of strings before pandas read the file a second time. The progress bar is now sized by the
+    # file size in bytes and advanced by the bytes that pandas consumes from a single open file handle.
+
+    # OCTOBER 2026
+    # The file was originally read in fixed chunks of 1000 rows, so that files like CUI-CUIs.csv resulted in the
+    # concatenation of tens of thousands of small DataFrames. The chunk size is now scaled to a fixed number of
+    # bytes. Identifier columns of the ontology CSVs are read as strings.
 
-    # Determine number of rows to read from the CSV.
+    # Determine number of rows to read from the CSV. A value of None results in a read of all rows.
     if rows_to_read == 0:
-        nrows = lines
+        nrows = None
     else:
         nrows = rows_to_read
 
-    # Read file in chunks, updating progress bar after each chunk.
+    file_size = os.path.getsize(path)
+    chunksize = get_chunksize(path=path)
+
+    # Read file in chunks, updating progress bar after each chunk with the position of the file handle.
     listdf = []
-    with tqdm(total=lines, desc='Reading') as bar:
-        for chunk in pd.read_csv(path, skip_blank_lines=True, chunksize=1000, comment=comment, sep=sep, nrows=nrows, on_bad_lines=on_bad_lines, encoding=encoding, index_col=index_col):
+    with open(path, 'rb') as fp, tqdm(total=file_size, desc='Reading', unit='B', unit_scale=True,
+                                     unit_divisor=1024) as bar:
+        for chunk in pd.read_csv(fp, skip_blank_lines=True, chunksize=chunksize, comment=comment, sep=sep, nrows=nrows, on_bad_lines=on_bad_lines, encoding=encoding, index_col=index_col, dtype=UBKG_CSV_DTYPES):
             listdf.append(chunk)
-            bar.update(chunk.shape[0])
+            bar.update(fp.tell() - bar.n)
 
     return pd.concat(listdf, axis=0, ignore_index=True)
 
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for caching the rdflib Graph that the owlnets_script parses from an OWL file.
+
+# Parsing a large OWL file (e.g., CHEBI or PR) into an rdflib Graph takes much longer than the rest of the
+# owlnets_script, and the file is parsed again each time that the script is rerun--e.g., after a failure, or to
+# change the OWL-NETS settings. The cache stores the triples of the parsed Graph, dictionary-encoded, alongside the
+# OWL file, and is loaded instead of parsing the OWL file if the MD5 of the OWL file is unchanged.
+
+# The cache is a directory named <OWL file>.graph, which contains:
+# 1. A text file of the terms of the Graph (terms.jsonl), with one JSON list per line: the kind of the term (see
+#    TERM_KINDS), its value, and--for literals--its language and datatype.
+# 2. A binary file of the triples (triples.bin), with the subject, predicate and object of each triple encoded as
+#    int32 positions in the list of terms.
+# 3. A manifest file (manifest.json) that records the version of the format, the MD5 of the OWL file, the number
+#    of terms and triples, and the namespace prefixes bound in the Graph.
+# The MD5 of the OWL file is calculated when the cache is read instead of read from the .md5 file written by
+# download_owl, because the file that is parsed may be the expansion of a downloaded GZip archive, and because the
+# .md5 file is not checked when the script runs with --ignore_owl_md5.
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from rdflib import Graph, URIRef, BNode, Literal
+
+# Version of the format of the cache.
+GRAPH_CACHE_VERSION = 1
+
+# Data type of the encoded triples.
+GRAPH_CACHE_DTYPE = np.int32
+
+# Kinds of the terms of a Graph.
+TERM_KINDS = {'uri': URIRef, 'bnode': BNode, 'literal': Literal}
+
+# Size of the blocks of the OWL file read to calculate its MD5.
+MD5_BLOCK_SIZE = 1 << 20
+
+
+def get_file_md5(path: str) -> str:
+
+    # Returns the MD5 of a file, reading the file in blocks.
+
+    md5 = hashlib.md5()
+    with open(path, 'rb') as fp:
+        for block in iter(lambda: fp.read(MD5_BLOCK_SIZE), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def get_graph_cache_dir(owl_file: str) -> str:
+    # Returns the path to the cache directory for an OWL file.
+    return owl_file + '.graph'
+
+
+def encode_term(term) -> list:
+
+    # Returns the record of an rdflib term for terms.jsonl.
+
+    if isinstance(term, Literal):
+        return ['literal', str(term), term.language, None if term.datatype is None else str(term.datatype)]
+    if isinstance(term, BNode):
+        return ['bnode', str(term)]
+    return ['uri', str(term)]
+
+
+def decode_term(record: list):
+
+    # Returns the rdflib term for a record of terms.jsonl.
+
+    if record[0] == 'literal':
+        # A literal with a language has no other datatype.
+        if record[2] is not None:
+            return Literal(record[1], lang=record[2])
+        return Literal(record[1], datatype=None if record[3] is None else URIRef(record[3]))
+    return TERM_KINDS[record[0]](record[1])
+
+
+def write_graph_cache(graph: Graph, owl_file: str, md5: str):
+
+    # Writes the cache of the Graph parsed from an OWL file.
+    # Arguments:
+    #   graph: the Graph
+    #   owl_file: path to the OWL file
+    #   md5: MD5 of the OWL file
+
+    cachedir = get_graph_cache_dir(owl_file)
+    tmpdir = cachedir + '.tmp'
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    os.makedirs(tmpdir)
+
+    termids = {}
+    triples = np.empty((len(graph), 3), dtype=GRAPH_CACHE_DTYPE)
+    with open(os.path.join(tmpdir, 'terms.jsonl'), 'w', encoding='utf-8') as fp:
+        for row, triple in enumerate(graph):
+            for col, term in enumerate(triple):
+                termid = termids.get(term)
+                if termid is None:
+                    termid = len(termids)
+                    termids[term] = termid
+                    fp.write(json.dumps(encode_term(term)) + '\n')
+                triples[row, col] = termid
+    triples.tofile(os.path.join(tmpdir, 'triples.bin'))
+
+    manifest = {'version': GRAPH_CACHE_VERSION, 'md5': md5, 'terms': len(termids), 'triples': len(triples),
+                'namespaces': [[prefix, str(namespace)] for prefix, namespace in graph.namespaces()]}
+    with open(os.path.join(tmpdir, 'manifest.json'), 'w') as fp:
+        json.dump(manifest, fp)
+
+    shutil.rmtree(cachedir, ignore_errors=True)
+    os.replace(tmpdir, cachedir)
+
+
+def read_graph_cache(owl_file: str, md5: str) -> Graph:
+
+    # Reads the cache of the Graph parsed from an OWL file.
+    # Arguments:
+    #   owl_file: path to the OWL file
+    #   md5: MD5 of the OWL file
+
+    # Returns: the Graph, or None if there is no cache, or the cache is for a different version of the OWL file.
+
+    cachedir = get_graph_cache_dir(owl_file)
+    manifestpath = os.path.join(cachedir, 'manifest.json')
+    if not os.path.exists(manifestpath):
+        return None
+    with open(manifestpath, 'r') as fp:
+        manifest = json.load(fp)
+    if manifest.get('version') != GRAPH_CACHE_VERSION or manifest.get('md5') != md5:
+        return None
+
+    with open(os.path.join(cachedir, 'terms.jsonl'), 'r', encoding='utf-8') as fp:
+        terms = [decode_term(json.loads(line)) for line in fp]
+    triples = np.fromfile(os.path.join(cachedir, 'triples.bin'), dtype=GRAPH_CACHE_DTYPE)
+    if len(terms) != manifest['terms'] or len(triples) != 3 * manifest['triples']:
+        return None
+
+    graph = Graph()
+    for prefix, namespace in manifest['namespaces']:
+        graph.bind(prefix, namespace, override=True)
+    graph.addN((terms[s], terms[p], terms[o], graph) for s, p, o in triples.reshape(-1, 3).tolist())
+    return graph
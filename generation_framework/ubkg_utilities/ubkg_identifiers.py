@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for encoding identifiers (e.g., CUIs and CodeIDs) as integers.
+
+# The ontology CSVs identify concepts and codes with strings. A DataFrame column of strings stores a Python object
+# for every row, so a large frame such as CUI-CODEs has a memory cost of roughly 60-80 bytes per identifier per row,
+# and every merge or drop_duplicates on the frame hashes and compares the strings.
+
+# An identifier dictionary is a pandas Index of the distinct strings of a column. A column is encoded as an array
+# of integer codes, each of which is the position of a string in the dictionary. Each distinct string is stored only
+# once, and merges and drop_duplicates on the encoded columns compare integers.
+
+# Codes are int32 unless the dictionary has more than 2^31 - 1 entries. Strings that are not in a dictionary
+# have code -1, so they never match an encoded column. Columns are decoded to strings only for the rows that are
+# written to the CSVs or merged with frames that are not encoded.
+
+import numpy as np
+import pandas as pd
+
+
+def get_code_dtype(size: int):
+
+    # Returns the smallest integer type for the codes of a dictionary.
+    # Arguments:
+    #   size: the number of entries in the dictionary
+
+    if size < np.iinfo(np.int32).max:
+        return np.int32
+    return np.int64
+
+
+def encode_identifiers(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+
+    # Builds the dictionary of a column of identifiers and encodes the column.
+    # Arguments:
+    #   values: Series of strings, without nulls
+
+    # Returns: the array of codes, and the dictionary. Entries of the dictionary are in order of first appearance.
+
+    codes, dictionary = pd.factorize(values, sort=False)
+    return codes.astype(get_code_dtype(len(dictionary))), pd.Index(dictionary, dtype=object)
+
+
+def extend_identifiers(dictionary: pd.Index, values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+
+    # Encodes a column of identifiers with an existing dictionary, adding the identifiers that are not in the
+    # dictionary to its end. The codes of the existing entries do not change.
+    # Arguments:
+    #   dictionary: Index from encode_identifiers
+    #   values: Series of strings, without nulls
+
+    # Returns: the array of codes, and the extended dictionary.
+
+    codes = dictionary.get_indexer(values)
+    missing = codes < 0
+    if missing.any():
+        newcodes, newvalues = pd.factorize(values[missing], sort=False)
+        codes[missing] = newcodes + len(dictionary)
+        dictionary = dictionary.append(pd.Index(newvalues, dtype=object))
+    return codes.astype(get_code_dtype(len(dictionary))), dictionary
+
+
+def lookup_identifiers(dictionary: pd.Index, values) -> np.ndarray:
+
+    # Encodes identifiers with an existing dictionary.
+    # Arguments:
+    #   dictionary: Index from encode_identifiers
+    #   values: array-like of strings
+
+    # Returns: the array of codes, with -1 for identifiers that are not in the dictionary (including nulls).
+
+    codes = dictionary.get_indexer(values)
+    return codes.astype(get_code_dtype(len(dictionary)))
+
+
+def decode_identifiers(dictionary: pd.Index, codes) -> np.ndarray:
+
+    # Decodes an array of codes to strings.
+    # Arguments:
+    #   dictionary: Index from encode_identifiers
+    #   codes: array-like of codes. The codes must be valid--i.e., not -1.
+
+    return dictionary.to_numpy()[np.asarray(codes)]
+
+
+def derive_identifiers(dictionary: pd.Index, func, derived: pd.Index = None) -> tuple[np.ndarray, pd.Index]:
+
+    # Builds a dictionary of transformed identifiers--e.g., of the uppercase forms of codes.
+    # The transformation is applied once per entry of the dictionary instead of once per row of a column.
+    # Arguments:
+    #   dictionary: Index from encode_identifiers
+    #   func: function that transforms a Series of strings--e.g., lambda s: s.str.upper()
+    #   derived: (optional) existing derived dictionary to extend
+
+    # Returns: an array that maps each code of dictionary to a code of the derived dictionary, and the derived
+    # dictionary.
+
+    values = pd.Series(dictionary.to_numpy(), dtype=object)
+    transformed = func(values)
+    # Entries that the transformation does not change share the strings of the dictionary.
+    transformed = values.where(transformed == values, transformed)
+    if derived is None:
+        return encode_identifiers(transformed)
+    return extend_identifiers(derived, transformed)
+
+
+def build_multimap(keys: np.ndarray, values: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+
+    # Builds a multimap from integer keys to values in compressed sparse row (CSR) form: the values of key k are
+    # values[offsets[k]:offsets[k + 1]], in the order in which they appear in the arguments.
+    # Arguments:
+    #   keys: array of codes, from 0 to size - 1. Rows with key -1 are ignored.
+    #   values: array of values, with one value per key
+    #   size: the number of distinct keys--e.g., the size of the dictionary of the keys
+
+    # Returns: the arrays of offsets (with size + 1 entries) and of values.
+
+    keys = np.asarray(keys)
+    values = np.asarray(values)
+    valid = keys >= 0
+    if not valid.all():
+        keys = keys[valid]
+        values = values[valid]
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, values[order]
+
+
+def lookup_multimap(offsets: np.ndarray, values: np.ndarray, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+
+    # Looks up a batch of keys in a multimap from build_multimap.
+    # Arguments:
+    #   offsets, values: multimap from build_multimap
+    #   keys: array of codes. Keys of -1 match no values.
+
+    # Returns: an array of the positions in keys and an array of the matching values, with one entry per match,
+    # ordered by position, then by the order of the values of each key.
+
+    keys = np.asarray(keys)
+    valid = keys >= 0
+    starts = np.where(valid, offsets[np.where(valid, keys, 0)], 0)
+    counts = np.where(valid, offsets[np.where(valid, keys, 0) + 1], 0) - starts
+    positions = np.repeat(np.arange(len(keys)), counts)
+    # The index of each match is the start of its key plus its rank among the matches of the key.
+    firsts = np.cumsum(counts) - counts
+    matches = np.repeat(starts - firsts, counts) + np.arange(counts.sum())
+    return positions, values[matches]
+
+
+def group_lists(keys: pd.Series, values: np.ndarray) -> tuple[np.ndarray, list]:
+
+    # Groups values into lists by key, as would groupby(sort=False)[...].apply(list), without a Python call per group.
+    # Arguments:
+    #   keys: Series of keys. Null keys are ignored.
+    #   values: array of values, with one value per key
+
+    # Returns: the array of distinct keys, in order of first appearance, and the list of the lists of values of the
+    # keys, in the order in which the values appear in the arguments.
+
+    codes, uniques = pd.factorize(keys, sort=False)
+    if len(uniques) == 0:
+        return np.asarray(uniques, dtype=object), []
+    offsets, grouped = build_multimap(codes, values, len(uniques))
+    return np.asarray(uniques, dtype=object), [v.tolist() for v in np.split(grouped, offsets[1:-1])]
+
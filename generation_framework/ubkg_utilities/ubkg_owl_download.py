@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for downloading OWL files in the owlnets_script.
+
+# The owlnets_script formerly downloaded OWL files by executing wget, which had no timeout (and so sometimes hung),
+# downloaded the entire file again on each run, and could not resume a download that failed. The MD5 of the file was
+# calculated afterwards by reading the entire file again.
+
+# download_owl_file instead downloads with requests:
+# 1. Conditional requests: the ETag and Last-Modified headers of the last download are saved in a state file
+#    (<file>.download.json). If the file on disk is unchanged since the last download, the request includes
+#    If-None-Match and If-Modified-Since headers, and a 304 (Not Modified) response leaves the file in place.
+# 2. Resumption: the file is downloaded to part files (<file>.part0, <file>.part1, ...), with a state file
+#    (<file>.part.json) that records the ETag or Last-Modified of the download and the byte range of each part. If a
+#    download fails, the next download requests only the missing bytes of each part (with Range and If-Range
+#    headers), provided that the server supports ranges and the file has not changed.
+# 3. Parallel ranges: for a large file from a server that supports ranges, the file can be downloaded in several
+#    ranges at once.
+# 4. Streaming MD5: the MD5 is calculated from the bytes as they are downloaded (for a single part) or as the parts are
+#    joined (for several parts), instead of by reading the file again.
+# Requests have a connect and read timeout, and are retried for errors such as Service Unavailable.
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+# For retry loop
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# Timeouts in seconds for the connection to the server, and for each read from the connection.
+DOWNLOAD_TIMEOUT = (30, 300)
+
+# Size of the blocks in which a response is read and written.
+DOWNLOAD_BLOCK_SIZE = 1 << 20
+
+# Minimum size of a part in a parallel download. Smaller files are downloaded in fewer parts.
+MIN_PART_BYTES = 32 << 20
+
+
+def get_download_session() -> requests.Session:
+
+    # Returns a session that retries requests for errors that often are returned by overloaded servers, with the
+    # retry strategy of ubkg_extract.getresponsejson.
+
+    retry = Retry(
+        total=6,
+        backoff_factor=2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET']
+    )
+    adapter = HTTPAdapter(max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # Download the bytes of the file as published--e.g., without the decompression of a gzip Content-Encoding--so that
+    # sizes and ranges refer to the same bytes.
+    session.headers['Accept-Encoding'] = 'identity'
+    return session
+
+
+def read_json(path: str) -> dict:
+    # Returns the content of a JSON state file, or None if the file does not exist or is incomplete.
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as fp:
+        try:
+            return json.load(fp)
+        except json.JSONDecodeError:
+            return None
+
+
+def write_json(path: str, content: dict):
+    # Writes a JSON state file.
+    with open(path + '.tmp', 'w') as fp:
+        json.dump(content, fp)
+    os.replace(path + '.tmp', path)
+
+
+def get_download_state(path: str) -> dict:
+
+    # Returns the state of the last completed download of a file, or None if the file was changed after the download.
+
+    state = read_json(path + '.download.json')
+    if state is None or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    if stat.st_size != state['size'] or stat.st_mtime_ns != state['mtime']:
+        return None
+    return state
+
+
+def get_validator(response: requests.Response) -> str:
+    # Returns the value for an If-Range header from a response: the ETag if it is a strong ETag, or the Last-Modified.
+    etag = response.headers.get('ETag')
+    if etag is not None and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def get_parts(length: int, chunks: int) -> list:
+
+    # Returns the byte ranges (first, last) of the parts of a download of a file with a known length.
+
+    chunks = max(1, min(chunks, length // MIN_PART_BYTES))
+    size = -(-length // chunks)
+    return [[start, min(start + size, length) - 1] for start in range(0, length, size)]
+
+
+def remove_parts(path: str, count: int):
+    # Removes the part files and part state of a download.
+    for k in range(count):
+        if os.path.exists(f'{path}.part{k}'):
+            os.remove(f'{path}.part{k}')
+    if os.path.exists(path + '.part.json'):
+        os.remove(path + '.part.json')
+
+
+def download_part(session: requests.Session, url: str, path: str, part: list, validator: str,
+                  md5=None, response: requests.Response = None, single: bool = True) -> int:
+
+    # Downloads the missing bytes of a part of a file.
+    # Arguments:
+    #   session, url: session and URL of the download
+    #   path: path to the part file
+    #   part: range (first, last) of the part; last is None if the length of the file is not known
+    #   validator: ETag or Last-Modified for the If-Range header, or None if the server does not support ranges
+    #   md5: hash to update with the bytes of the part, including those already in the part file
+    #   response: a response to the request for the entire file, which is used instead of a new request
+    #   single: the part is the entire file
+
+    # Returns: the number of bytes in the part file.
+
+    first, last = part
+    existing = os.path.getsize(path) if os.path.exists(path) else 0
+    if last is not None and existing == last - first + 1:
+        if md5 is not None:
+            update_md5_from_file(md5, path)
+        if response is not None:
+            response.close()
+        return existing
+
+    if response is None or existing > 0:
+        if response is not None:
+            response.close()
+        headers = {}
+        if validator is not None:
+            rangelast = '' if last is None else str(last)
+            headers['Range'] = f'bytes={first + existing}-{rangelast}'
+            headers['If-Range'] = validator
+        response = session.get(url, stream=True, headers=headers, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+
+    mode = 'ab'
+    if response.status_code != 206:
+        # The server sent the entire file: the file changed, or the server does not support ranges.
+        if not single:
+            response.close()
+            raise requests.exceptions.RequestException(f'The server did not return the range of part {path}.')
+        mode = 'wb'
+        existing = 0
+
+    if md5 is not None and existing > 0:
+        update_md5_from_file(md5, path)
+
+    with response, open(path, mode) as fp:
+        for block in response.iter_content(chunk_size=DOWNLOAD_BLOCK_SIZE):
+            fp.write(block)
+            if md5 is not None:
+                md5.update(block)
+
+    return os.path.getsize(path)
+
+
+def update_md5_from_file(md5, path: str):
+    # Updates a hash with the content of a file.
+    with open(path, 'rb') as fp:
+        for block in iter(lambda: fp.read(DOWNLOAD_BLOCK_SIZE), b''):
+            md5.update(block)
+
+
+def download_owl_file(url: str, path: str, chunks: int = 1, conditional: bool = True) -> dict:
+
+    # Downloads a file.
+    # Arguments:
+    #   url: URL of the file
+    #   path: path to which to download the file
+    #   chunks: maximum number of byte ranges to download in parallel
+    #   conditional: skip the download if the file has not changed since the last download
+
+    # Returns: the state of the download, with keys:
+    #   status: 'downloaded' or 'not modified'
+    #   md5, size: MD5 and size of the file
+    #   etag, last_modified: headers of the download
+
+    session = get_download_session()
+
+    headers = {}
+    state = get_download_state(path) if conditional else None
+    if state is not None:
+        if state.get('etag') is not None:
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified') is not None:
+            headers['If-Modified-Since'] = state['last_modified']
+
+    response = session.get(url, stream=True, headers=headers, timeout=DOWNLOAD_TIMEOUT)
+    if response.status_code == 304 and state is not None:
+        response.close()
+        state['status'] = 'not modified'
+        return state
+    response.raise_for_status()
+
+    # Ranges are requested from the URL after redirects.
+    url = response.url
+    length = response.headers.get('Content-Length')
+    length = None if length is None or 'Content-Encoding' in response.headers else int(length)
+    validator = None
+    if response.headers.get('Accept-Ranges') == 'bytes' and length is not None:
+        validator = get_validator(response)
+
+    # Resume a download of the same version of the file, or start a new download.
+    partstate = read_json(path + '.part.json')
+    if partstate is not None and (validator is None or partstate['validator'] != validator
+                                  or partstate['length'] != length):
+        remove_parts(path, len(partstate['parts']))
+        partstate = None
+    if partstate is None:
+        if validator is None:
+            parts = [[0, None if length is None else length - 1]]
+        else:
+            parts = get_parts(length, chunks)
+        partstate = {'validator': validator, 'length': length, 'parts': parts}
+        write_json(path + '.part.json', partstate)
+    parts = partstate['parts']
+
+    if len(parts) == 1:
+        # Single part: calculate the MD5 while downloading.
+        md5 = hashlib.md5()
+        download_part(session=session, url=url, path=f'{path}.part0', part=parts[0], validator=validator, md5=md5,
+                      response=response)
+        os.replace(f'{path}.part0', path)
+    else:
+        response.close()
+        with ThreadPoolExecutor(max_workers=len(parts)) as executor:
+            futures = [executor.submit(download_part, session=session, url=url, path=f'{path}.part{k}', part=part,
+                                       validator=validator, single=False) for k, part in enumerate(parts)]
+            for future in futures:
+                future.result()
+        # Join the parts, calculating the MD5.
+        md5 = hashlib.md5()
+        with open(path + '.tmp', 'wb') as out:
+            for k in range(len(parts)):
+                with open(f'{path}.part{k}', 'rb') as fp:
+                    for block in iter(lambda: fp.read(DOWNLOAD_BLOCK_SIZE), b''):
+                        out.write(block)
+                        md5.update(block)
+        os.replace(path + '.tmp', path)
+
+    remove_parts(path, len(parts))
+
+    size = os.path.getsize(path)
+    if length is not None and size != length:
+        raise requests.exceptions.RequestException(f'Downloaded {size} bytes of {url}; expected {length}.')
+
+    state = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified'),
+             'size': size, 'mtime': os.stat(path).st_mtime_ns, 'md5': md5.hexdigest()}
+    write_json(path + '.download.json', state)
+    state['status'] = 'downloaded'
+    return state
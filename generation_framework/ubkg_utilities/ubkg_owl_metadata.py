@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for assembling the metadata of the classes of an ontology in the owlnets_script.
+
+# PheKnowLator returns the synonyms and dbxrefs of an ontology as dictionaries keyed by the synonym or dbxref, with
+# the IRI of the class as the value. To find the synonyms of a class, the owlnets_script formerly scanned the entire
+# dictionary for each class, which takes time proportional to (classes x synonyms)--hours for CHEBI and PR.
+# invert_class_metadata instead builds, in one pass over the dictionary, a dictionary keyed by class.
+
+# The scan tested whether the IRI of the class was a substring of the value (str(cls) in v), so a class also matched
+# values for which its IRI is a prefix--e.g., the synonyms of CHEBI_10 were also listed for CHEBI_1. The inversion
+# keeps this behavior, so that the OWLNETS files do not change: for each value, only the prefixes with the lengths of
+# the class IRIs are checked.
+
+
+def get_matching_classes(value: str, classes: set, lengths: list) -> list:
+
+    # Returns the classes whose IRIs are prefixes of a value, in order of length.
+    # Arguments:
+    #   value: IRI of a class, from a PheKnowLator metadata dictionary
+    #   classes: set of the IRIs of the classes
+    #   lengths: sorted list of the distinct lengths of the IRIs of the classes
+
+    matches = []
+    for length in lengths:
+        if length > len(value):
+            break
+        if value[:length] in classes:
+            matches.append(value[:length])
+    return matches
+
+
+def invert_class_metadata(metadata: dict, classes) -> dict:
+
+    # Inverts a PheKnowLator metadata dictionary (e.g., the first element of the return of
+    # gets_ontology_class_synonyms).
+    # Arguments:
+    #   metadata: dictionary keyed by synonym or dbxref, with the IRI of a class as the value
+    #   classes: iterable of the classes of the ontology
+
+    # Returns: a dictionary keyed by the IRI of each class that has metadata, with the list of its synonyms or
+    # dbxrefs, in the order of the metadata dictionary.
+
+    classes = {str(cls) for cls in classes}
+    lengths = sorted({len(cls) for cls in classes})
+    # Many keys share a value, so the classes that match a value are found once.
+    matches = {}
+
+    inverted = {}
+    for key, value in metadata.items():
+        if isinstance(value, str):
+            if value not in matches:
+                matches[value] = get_matching_classes(value=value, classes=classes, lengths=lengths)
+            clsmatches = matches[value]
+        else:
+            # A collection of classes: the scan tested membership in the collection.
+            clsmatches = [str(v) for v in value if str(v) in classes]
+        for cls in clsmatches:
+            inverted.setdefault(cls, []).append(key)
+    return inverted
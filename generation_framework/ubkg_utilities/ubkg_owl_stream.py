@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for the streaming extraction mode of the owlnets_script.
+
+# The owlnets_script parses the entire OWL file into an rdflib Graph before PheKnowLator runs OWL-NETS. For large
+# ontologies (e.g., CHEBI), the Graph takes many GB of memory. The streaming mode instead reads the OWL file once,
+# element by element (RDF/XML) or line by line (N-Triples), and writes the OWLNETS files directly:
+# 1. OWLNETS_edgelist.txt: for each named class, its rdfs:subClassOf edges to named classes, and an edge for each
+#    owl:someValuesFrom restriction in a subClassOf (or in an owl:equivalentClass intersection, in RDF/XML), with the
+#    property of the restriction as the predicate.
+# 2. OWLNETS_node_metadata.txt: the label, definition (IAO_0000115), synonyms and dbxrefs of each class in an edge.
+#    As with PheKnowLator, synonyms and dbxrefs are in lowercase.
+# 3. OWLNETS_relations.txt: the label and definition of each object property in an edge.
+
+# The streaming mode covers the patterns that most OBO ontologies use. It does not run the other decoding of OWL-NETS
+# (e.g., of unions, cardinality restrictions, or annotated axioms), and so can write fewer edges than the rdflib
+# mode. It is selected per SAB, in the owlnets_mode key of ontologies.json.
+
+# Memory is bounded by the set of nodes and relations in the edges and, for N-Triples, by the metadata of the classes,
+# which are only known at the end of the file. Element trees of RDF/XML are discarded after each top-level element,
+# and the metadata of classes is spooled to a temporary file until the nodes in the edges are known.
+
+import os
+import re
+import json
+import xml.etree.ElementTree as ET
+from tqdm import tqdm
+
+import ubkg_logging as ulog
+
+RDF = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+RDFS = 'http://www.w3.org/2000/01/rdf-schema#'
+OWL = 'http://www.w3.org/2002/07/owl#'
+
+RDF_ABOUT = '{' + RDF + '}about'
+RDF_RESOURCE = '{' + RDF + '}resource'
+RDF_DESCRIPTION = RDF + 'Description'
+RDF_TYPE = RDF + 'type'
+RDFS_LABEL = RDFS + 'label'
+RDFS_SUBCLASSOF = RDFS + 'subClassOf'
+OWL_CLASS = OWL + 'Class'
+OWL_OBJECT_PROPERTY = OWL + 'ObjectProperty'
+OWL_RESTRICTION = OWL + 'Restriction'
+OWL_ON_PROPERTY = OWL + 'onProperty'
+OWL_SOME_VALUES_FROM = OWL + 'someValuesFrom'
+OWL_EQUIVALENT_CLASS = OWL + 'equivalentClass'
+OWL_ONTOLOGY = OWL + 'Ontology'
+OBO_DEFINITION = 'http://purl.obolibrary.org/obo/IAO_0000115'
+OBO_DBXREF = 'http://www.geneontology.org/formats/oboInOwl#hasDbXref'
+
+# Metadata of the relations that OWL-NETS adds to every graph.
+DEFAULT_RELATIONS = {
+    RDFS_SUBCLASSOF: {'label': 'subClassOf', 'definitions': 'None', 'namespace': 'www.w3.org'},
+    RDF_TYPE: {'label': 'type', 'definitions': 'None', 'namespace': 'www.w3.org'}
+}
+
+# Pattern of a triple in N-Triples: subject (IRI or blank node), predicate (IRI), and object (IRI, blank node, or
+# literal with an optional language tag or datatype).
+NT_TRIPLE = re.compile(r'^\s*(<[^>]*>|_:\S+)\s+<([^>]*)>\s+'
+                       r'(<[^>]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?)\s*\.\s*$')
+NT_ESCAPE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+NT_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def get_stream_format(owl_file: str) -> str:
+
+    # Returns the format of an OWL file for the streaming mode: 'xml' for RDF/XML, 'nt' for N-Triples, or None if the
+    # file is in another format (e.g., Turtle or OWL/XML).
+
+    if owl_file.lower().endswith('.nt'):
+        return 'nt'
+    with open(owl_file, 'rb') as fp:
+        start = fp.read(65536)
+    if re.search(rb'<(\w+:)?RDF[\s>]', start) is not None:
+        return 'xml'
+    return None
+
+
+def get_tag_iri(tag: str) -> str:
+    # Converts an ElementTree tag ({namespace}local) to an IRI.
+    return tag[1:].replace('}', '', 1) if tag.startswith('{') else tag
+
+
+def get_class_namespace(iri: str) -> str:
+
+    # Returns the namespace of a class, in the same way as the rdflib mode of the owlnets_script.
+
+    path_last = iri.split('/')[-1]
+    if '_' in path_last:
+        namespace_candidate = re.findall(r'^(.*?)(?=\W|_)', path_last)
+        if len(namespace_candidate) > 0:
+            return namespace_candidate[0].upper()
+    parts = iri.split('/')
+    return parts[2] if len(parts) > 2 else 'None'
+
+
+def get_relation_namespace(iri: str) -> str:
+
+    # Returns the namespace of an object property, in the same way as the rdflib mode of the owlnets_script.
+
+    if 'obo' in iri and len(iri.split('/')) > 5:
+        return iri.split('/')[-2].upper()
+    if '_' in iri:
+        namespace_candidate = re.findall(r'^(.*?)(?=\W|_)', iri.split('/')[-1])
+        if len(namespace_candidate) > 0:
+            return namespace_candidate[0].upper()
+    parts = iri.split('/')
+    return parts[2] if len(parts) > 2 else 'None'
+
+
+def get_node_metadata(iri: str, label: str, definition: str, synonyms: list, dbxrefs: list) -> dict:
+    # Returns the metadata of a class, in the format of the entity_metadata of the owlnets_script.
+    return {'label': label if label is not None else 'None',
+            'synonyms': '|'.join(synonyms) if len(synonyms) > 0 else 'None',
+            'dbxrefs': '|'.join(dbxrefs) if len(dbxrefs) > 0 else 'None',
+            'namespace': get_class_namespace(iri),
+            'definitions': definition if definition is not None else 'None'}
+
+
+def get_relation_metadata(iri: str, label: str, definition: str) -> dict:
+    # Returns the metadata of an object property, in the format of the entity_metadata of the owlnets_script.
+    return {'label': label if label is not None else 'None',
+            'namespace': get_relation_namespace(iri),
+            'definitions': definition if definition is not None else 'None'}
+
+
+def is_named_class(iri: str) -> bool:
+    # Checks whether the object of an edge is a named class--i.e., not a blank node or an OWL term like owl:Thing.
+    return iri is not None and not iri.startswith('_:') and not iri.startswith(OWL)
+
+
+def get_restriction_edge(subject: str, restriction: ET.Element) -> tuple:
+
+    # Returns the edge for an owl:someValuesFrom restriction element, or None.
+
+    if get_tag_iri(restriction.tag) != OWL_RESTRICTION:
+        return None
+    onproperty = restriction.find('{' + OWL + '}onProperty')
+    somevalues = restriction.find('{' + OWL + '}someValuesFrom')
+    if onproperty is None or somevalues is None:
+        return None
+    target = somevalues.get(RDF_RESOURCE)
+    if onproperty.get(RDF_RESOURCE) is None or not is_named_class(target):
+        return None
+    return subject, onproperty.get(RDF_RESOURCE), target
+
+
+def get_rdfxml_class_records(subject: str, elem: ET.Element):
+
+    # Yields the records for an owl:Class element: an edge record for each edge and a node record.
+
+    label = None
+    definition = None
+    synonyms = []
+    dbxrefs = []
+    for child in elem:
+        predicate = get_tag_iri(child.tag)
+        resource = child.get(RDF_RESOURCE)
+        if predicate == RDFS_LABEL:
+            if label is None:
+                label = child.text or ''
+        elif predicate == OBO_DEFINITION:
+            if definition is None:
+                definition = child.text or ''
+        elif predicate == OBO_DBXREF and resource is None:
+            dbxrefs.append((child.text or '').lower())
+        elif 'synonym' in predicate.lower() and resource is None:
+            synonyms.append((child.text or '').lower())
+        elif predicate == RDFS_SUBCLASSOF:
+            if resource is not None:
+                if is_named_class(resource):
+                    yield 'edge', subject, RDFS_SUBCLASSOF, resource
+            else:
+                for restriction in child:
+                    edge = get_restriction_edge(subject, restriction)
+                    if edge is not None:
+                        yield ('edge',) + edge
+        elif predicate == OWL_EQUIVALENT_CLASS and resource is None:
+            # An intersection of named classes and restrictions is decoded into subClassOf edges and restriction
+            # edges, as OWL-NETS does.
+            for intersection in child.iter('{' + OWL + '}intersectionOf'):
+                for member in intersection:
+                    about = member.get(RDF_ABOUT)
+                    if about is not None:
+                        if is_named_class(about):
+                            yield 'edge', subject, RDFS_SUBCLASSOF, about
+                    else:
+                        edge = get_restriction_edge(subject, member)
+                        if edge is not None:
+                            yield ('edge',) + edge
+
+    yield 'node', subject, get_node_metadata(iri=subject, label=label, definition=definition, synonyms=synonyms,
+                                             dbxrefs=dbxrefs)
+
+
+def get_rdfxml_records(elem: ET.Element):
+
+    # Yields the records for a top-level element of an RDF/XML file.
+
+    subject = elem.get(RDF_ABOUT)
+    if subject is None:
+        return
+
+    types = set()
+    if get_tag_iri(elem.tag) != RDF_DESCRIPTION:
+        types.add(get_tag_iri(elem.tag))
+    for child in elem:
+        if get_tag_iri(child.tag) == RDF_TYPE and child.get(RDF_RESOURCE) is not None:
+            types.add(child.get(RDF_RESOURCE))
+
+    if OWL_CLASS in types:
+        yield from get_rdfxml_class_records(subject, elem)
+    elif OWL_OBJECT_PROPERTY in types:
+        label = None
+        definition = None
+        for child in elem:
+            predicate = get_tag_iri(child.tag)
+            if predicate == RDFS_LABEL and label is None:
+                label = child.text or ''
+            elif predicate == OBO_DEFINITION and definition is None:
+                definition = child.text or ''
+        yield 'relation', subject, get_relation_metadata(iri=subject, label=label, definition=definition)
+
+
+def iterate_rdfxml_top_level(owl_file: str):
+
+    # Yields the top-level elements (children of rdf:RDF) of an RDF/XML file, discarding each after it is processed.
+
+    depth = 0
+    root = None
+    for event, elem in ET.iterparse(owl_file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            yield elem
+            root.clear()
+
+
+def stream_rdfxml(owl_file: str):
+
+    # Yields the records of an RDF/XML file: ('edge', subject, predicate, object), ('node', iri, metadata) and
+    # ('relation', iri, metadata).
+
+    for elem in iterate_rdfxml_top_level(owl_file):
+        yield from get_rdfxml_records(elem)
+
+
+def find_rdfxml_imports(owl_file: str) -> list:
+
+    # Returns the IRIs of the owl:imports of an RDF/XML file, reading only the ontology header.
+
+    for elem in iterate_rdfxml_top_level(owl_file):
+        if get_tag_iri(elem.tag) == OWL_ONTOLOGY:
+            return [i.get(RDF_RESOURCE) for i in elem.findall('{' + OWL + '}imports')]
+    return []
+
+
+def find_ntriples_imports(owl_file: str) -> list:
+
+    # Returns the IRIs of the owl:imports of an N-Triples file.
+
+    imports = []
+    with open(owl_file, 'r', encoding='utf-8') as fp:
+        for line in fp:
+            if OWL + 'imports' in line:
+                match = NT_TRIPLE.match(line)
+                if match is not None and match.group(2) == OWL + 'imports':
+                    imports.append(get_nt_term(match.group(3))[0])
+    return imports
+
+
+def get_nt_term(term: str) -> tuple:
+
+    # Converts a term of an N-Triples triple to a string.
+    # Returns the string, and whether the term is a literal.
+
+    if term.startswith('<'):
+        return term[1:-1], False
+    if term.startswith('_:'):
+        return term, False
+    literal = term[1:term.rfind('"')]
+    return NT_ESCAPE.sub(unescape_nt_match, literal), True
+
+
+def unescape_nt_match(match) -> str:
+    # Converts an escape sequence in an N-Triples literal.
+    escape = match.group(1)
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return NT_ESCAPES.get(escape, escape)
+
+
+def stream_ntriples(owl_file: str):
+
+    # Yields the records of an N-Triples file, in the format of stream_rdfxml.
+
+    # Edges to named classes are yielded as they are read. Restrictions are blank nodes that can be defined after the
+    # subClassOf that refers to them, so their edges are yielded at the end of the file, with the nodes and relations.
+
+    classes = set()
+    properties = set()
+    labels = {}
+    definitions = {}
+    synonyms = {}
+    dbxrefs = {}
+    onproperty = {}
+    somevalues = {}
+    restrictions = []
+    skipped = 0
+
+    with open(owl_file, 'r', encoding='utf-8') as fp:
+        for line in fp:
+            if line.strip() == '' or line.lstrip().startswith('#'):
+                continue
+            match = NT_TRIPLE.match(line)
+            if match is None:
+                skipped += 1
+                continue
+            subject, _ = get_nt_term(match.group(1))
+            predicate = match.group(2)
+            obj, is_literal = get_nt_term(match.group(3))
+
+            if predicate == RDF_TYPE:
+                if obj == OWL_CLASS:
+                    classes.add(subject)
+                elif obj == OWL_OBJECT_PROPERTY:
+                    properties.add(subject)
+            elif is_literal:
+                if predicate == RDFS_LABEL:
+                    labels.setdefault(subject, obj)
+                elif predicate == OBO_DEFINITION:
+                    definitions.setdefault(subject, obj)
+                elif predicate == OBO_DBXREF:
+                    dbxrefs.setdefault(subject, []).append(obj.lower())
+                elif 'synonym' in predicate.lower():
+                    synonyms.setdefault(subject, []).append(obj.lower())
+            elif subject.startswith('_:'):
+                if predicate == OWL_ON_PROPERTY:
+                    onproperty[subject] = obj
+                elif predicate == OWL_SOME_VALUES_FROM:
+                    somevalues[subject] = obj
+            elif predicate == RDFS_SUBCLASSOF:
+                if obj.startswith('_:'):
+                    restrictions.append((subject, obj))
+                elif is_named_class(obj):
+                    yield 'edge', subject, RDFS_SUBCLASSOF, obj
+
+    if skipped > 0:
+        ulog.print_and_logger_info(f'-- Skipped {skipped} lines of {owl_file} that are not N-Triples.')
+
+    for subject, restriction in restrictions:
+        if restriction in onproperty and is_named_class(somevalues.get(restriction)):
+            yield 'edge', subject, onproperty[restriction], somevalues[restriction]
+
+    for iri in classes:
+        yield 'node', iri, get_node_metadata(iri=iri, label=labels.get(iri), definition=definitions.get(iri),
+                                             synonyms=synonyms.get(iri, []), dbxrefs=dbxrefs.get(iri, []))
+    for iri in properties:
+        yield 'relation', iri, get_relation_metadata(iri=iri, label=labels.get(iri), definition=definitions.get(iri))
+
+
+def write_owlnets_files(owl_file: str, working_dir: str, delete_definitions: bool = False) -> dict:
+
+    # Writes the OWLNETS files for an OWL file in the streaming mode.
+    # Arguments:
+    #   owl_file: path to the OWL file, in RDF/XML or N-Triples
+    #   working_dir: directory for the OWLNETS files
+    #   delete_definitions: omit the definitions columns, as with the --delete_definitions argument of the
+    #                       owlnets_script
+
+    # Returns: a dict of the numbers of edges, nodes and relations written.
+
+    stream_format = get_stream_format(owl_file)
+    if stream_format == 'xml':
+        records = stream_rdfxml(owl_file)
+    elif stream_format == 'nt':
+        records = stream_ntriples(owl_file)
+    else:
+        raise ValueError(f'{owl_file} is not in RDF/XML or N-Triples format.')
+
+    edge_list_filename = os.path.join(working_dir, 'OWLNETS_edgelist.txt')
+    node_metadata_filename = os.path.join(working_dir, 'OWLNETS_node_metadata.txt')
+    relation_filename = os.path.join(working_dir, 'OWLNETS_relations.txt')
+    spool_filename = node_metadata_filename + '.spool'
+
+    nodes = set()
+    relation_ids = set()
+    relations = dict(DEFAULT_RELATIONS)
+    edge_count = 0
+
+    ulog.print_and_logger_info(f"Streaming {owl_file}; writing edge list results to '{edge_list_filename}'")
+    with open(edge_list_filename, 'w') as out, open(spool_filename, 'w') as spool:
+        out.write('subject' + '\t' + 'predicate' + '\t' + 'object' + '\n')
+        for record in tqdm(records, desc='Streaming', unit=' records'):
+            if record[0] == 'edge':
+                _, subject, predicate, obj = record
+                out.write(subject + '\t' + predicate + '\t' + obj + '\n')
+                nodes.add(subject)
+                nodes.add(obj)
+                relation_ids.add(predicate)
+                edge_count += 1
+            elif record[0] == 'node':
+                # Labels and definitions can contain line breaks, so the spool has one JSON record per line.
+                spool.write(json.dumps([record[1], record[2]]) + '\n')
+            else:
+                relations[record[1]] = record[2]
+
+    ulog.print_and_logger_info(f"Write node metadata results to '{node_metadata_filename}'")
+    node_count = 0
+    with open(spool_filename, 'r') as spool, open(node_metadata_filename, 'w') as out:
+        if delete_definitions is True:
+            out.write('node_id' + '\t' + 'node_namespace' + '\t' + 'node_label' + '\t' +
+                      'node_synonyms' + '\t' + 'node_dbxrefs' + '\n')
+        else:
+            out.write('node_id' + '\t' + 'node_namespace' + '\t' + 'node_label' + '\t' +
+                      'node_definition' + '\t' + 'node_synonyms' + '\t' + 'node_dbxrefs' + '\n')
+        for line in spool:
+            x, metadata = json.loads(line)
+            if x not in nodes:
+                continue
+            if delete_definitions is True:
+                out.write(x + '\t' + metadata['namespace'] + '\t' + metadata['label'] + '\t' +
+                          metadata['synonyms'] + '\t' + metadata['dbxrefs'] + '\n')
+            else:
+                out.write(x + '\t' + metadata['namespace'] + '\t' + metadata['label'] + '\t' +
+                          metadata['definitions'] + '\t' + metadata['synonyms'] + '\t' + metadata['dbxrefs'] + '\n')
+            node_count += 1
+    os.remove(spool_filename)
+
+    ulog.print_and_logger_info(f"Writing relation metadata results to '{relation_filename}'")
+    relation_count = 0
+    with open(relation_filename, 'w') as out:
+        if delete_definitions is True:
+            out.write('relation_id' + '\t' + 'relation_namespace' + '\t' + 'relation_label' + '\n')
+        else:
+            out.write('relation_id' + '\t' + 'relation_namespace' + '\t' + 'relation_label' + '\t' +
+                      'relation_definition' + '\n')
+        for x in relation_ids:
+            if x not in relations:
+                ulog.print_and_logger_info(f"ERROR: relation {x} is not declared as an owl:ObjectProperty in "
+                                           f"{owl_file}")
+                continue
+            if delete_definitions is True:
+                out.write(x + '\t' + relations[x]['namespace'] + '\t' + relations[x]['label'] + '\n')
+            else:
+                out.write(x + '\t' + relations[x]['namespace'] + '\t' + relations[x]['label'] + '\t' +
+                          relations[x]['definitions'] + '\n')
+            relation_count += 1
+
+    return {'edges': edge_count, 'nodes': node_count, 'relations': relation_count}
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for maintaining the manifest of the inputs to the OWLNETS files of a SAB, so that build_csv.py can
+# skip the conversion of an OWL file that has not changed since the OWLNETS files were written.
+
+# The manifest is a JSON file in the OWLNETS directory of the SAB (OWLNETS_manifest.json) that records:
+# 1. the inputs to the conversion:
+#    a. the MD5 of the OWL file
+#    b. a hash of the entry for the SAB in ontologies.json
+#    c. a hash of each file of the converter (the owlnets_script and the modules that it uses), and the version of
+#       the PheKnowLator package (pkt_kg), which runs OWL-NETS
+#    d. the options of build_csv.py that change the OWLNETS files (e.g., --with_imports)
+# 2. the size and modification time of each OWLNETS file written by the conversion, so that OWLNETS files that were
+#    changed or removed after the conversion are written again.
+# If the inputs of a build match those of the manifest, the OWLNETS files are current, and the conversion is skipped.
+
+# The MD5 of the OWL file is that of the file in the OWL directory of the SAB. Before the manifest is compared,
+# check_owl_source makes a conditional request for the OWL file at its URL (see ubkg_owl_download), which downloads
+# the file only if it changed since the last download. A new release of the OWL file therefore changes the MD5 and
+# invalidates the manifest. If the URL cannot be reached, the file in the OWL directory is used.
+# The owlnets_script saves an OWL file whose URL has no extension (e.g., a download?apikey=... file from NCBO
+# BioPortal) as <SAB>.OWL, so check_owl_source downloads such a file to <SAB>.OWL.
+# Known limitation: an OWL file that is a GZip archive without a .gz extension (e.g., HGNCNR) is expanded by the
+# owlnets_script, which keeps the archive as <SAB>.OWL.gz. The MD5 of the downloaded archive cannot be compared with
+# that of the expanded file, so the conversion of such a file is never skipped.
+
+import os
+import json
+import hashlib
+import importlib.metadata
+import requests
+
+import ubkg_logging as ulog
+
+# The MD5 of files, as calculated for the cache of the parsed Graph
+import ubkg_graph_cache as ugraphcache
+# Conditional downloads of OWL files
+import ubkg_owl_download as uowldownload
+
+OWLNETS_MANIFEST_FILE = 'OWLNETS_manifest.json'
+
+# Packages whose versions are inputs of the conversion.
+CONVERTER_PACKAGES = ['pkt_kg']
+
+
+def get_manifest_path(owlnetsdir: str) -> str:
+    # Returns the path to the manifest in the OWLNETS directory of a SAB.
+    return os.path.join(owlnetsdir, OWLNETS_MANIFEST_FILE)
+
+
+def get_owl_source_file(owldir: str, owl_url: str, sab: str) -> str:
+
+    # Returns the path to the OWL file in the OWL directory of a SAB, or None if there is no OWL file.
+    # The owlnets_script saves the OWL file with the name of the last part of the URL, unless that name has no
+    # extension, in which case it renames the file to <SAB>.OWL.
+
+    for filename in [owl_url.rsplit('/', 1)[-1], sab + '.OWL']:
+        path = os.path.join(owldir, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def get_owl_download_path(owldir: str, owl_url: str, sab: str) -> str:
+
+    # Returns the path to which the owlnets_script saves the OWL file of a SAB: the name of the last part of the URL,
+    # or <SAB>.OWL if that name has no extension.
+
+    filename = owl_url.rsplit('/', 1)[-1]
+    if '.' not in filename[-5:]:
+        filename = sab + '.OWL'
+    return os.path.join(owldir, filename)
+
+
+def check_owl_source(owldir: str, owl_url: str, sab: str) -> bool:
+
+    # Updates the OWL file in the OWL directory of a SAB from its URL, if the file at the URL changed since the last
+    # download. Files that are not at HTTP URLs are not checked.
+    # Returns: False if the OWL file cannot be compared with the manifest (a GZip archive that the owlnets_script
+    # expanded); otherwise, True.
+
+    if not owl_url.startswith(('http://', 'https://')):
+        return True
+    path = get_owl_download_path(owldir=owldir, owl_url=owl_url, sab=sab)
+    if os.path.exists(path + '.gz') and not owl_url.lower().endswith('.gz'):
+        ulog.print_and_logger_info(f'-- {owl_url} is a GZip archive that was expanded to {path}; the OWL file is '
+                                   f'converted again.')
+        return False
+    try:
+        download = uowldownload.download_owl_file(url=owl_url, path=path, conditional=True)
+    except requests.exceptions.RequestException as e:
+        ulog.print_and_logger_info(f'-- Unable to check {owl_url} for changes ({e}); using the OWL file in {owldir}.')
+        return True
+    if download['status'] == 'not modified':
+        ulog.print_and_logger_info(f'-- {owl_url} has not changed since the last download.')
+    else:
+        ulog.print_and_logger_info(f"-- Downloaded {owl_url} (MD5 {download['md5']}).")
+    return True
+
+
+def get_owlnets_outputs(owlnetsdir: str) -> dict:
+
+    # Returns the size and modification time of each OWLNETS file in the OWLNETS directory of a SAB.
+
+    outputs = {}
+    if not os.path.isdir(owlnetsdir):
+        return outputs
+    for filename in sorted(os.listdir(owlnetsdir)):
+        if filename.startswith('OWLNETS_') and filename != OWLNETS_MANIFEST_FILE:
+            stat = os.stat(os.path.join(owlnetsdir, filename))
+            outputs[filename] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+    return outputs
+
+
+def get_package_version(package: str) -> str:
+    # Returns the installed version of a package, or None if the package is not installed.
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def get_manifest_inputs(source_file: str, ontology_record: dict, converter_files: list, options: dict) -> dict:
+
+    # Returns the inputs of the conversion of an OWL file to OWLNETS files.
+    # Arguments:
+    #   source_file: path to the OWL file, or None if the OWL file has not been downloaded
+    #   ontology_record: entry for the SAB in ontologies.json
+    #   converter_files: paths to the files of the converter
+    #   options: options of the build that change the OWLNETS files
+
+    record = json.dumps(ontology_record, sort_keys=True).encode('utf-8')
+    return {'source_md5': None if source_file is None else ugraphcache.get_file_md5(source_file),
+            'ontology': hashlib.md5(record).hexdigest(),
+            'converter': {path: ugraphcache.get_file_md5(path) for path in converter_files},
+            'packages': {package: get_package_version(package) for package in CONVERTER_PACKAGES},
+            'options': options}
+
+
+def manifest_matches(owlnetsdir: str, inputs: dict) -> bool:
+
+    # Checks whether the OWLNETS files of a SAB are current: i.e., the manifest has the same inputs, and the OWLNETS
+    # files are those that were written by the conversion.
+
+    if inputs['source_md5'] is None:
+        return False
+    manifestpath = get_manifest_path(owlnetsdir)
+    if not os.path.exists(manifestpath):
+        return False
+    with open(manifestpath, 'r') as fp:
+        try:
+            manifest = json.load(fp)
+        except json.JSONDecodeError:
+            return False
+    outputs = get_owlnets_outputs(owlnetsdir)
+    return manifest.get('inputs') == inputs and len(outputs) > 0 and manifest.get('outputs') == outputs
+
+
+def write_manifest(owlnetsdir: str, inputs: dict):
+
+    # Writes the manifest of the OWLNETS files of a SAB after a conversion.
+
+    manifest = {'inputs': inputs, 'outputs': get_owlnets_outputs(owlnetsdir)}
+    manifestpath = get_manifest_path(owlnetsdir)
+    with open(manifestpath + '.tmp', 'w') as fp:
+        json.dump(manifest, fp, indent=2)
+    os.replace(manifestpath + '.tmp', manifestpath)
+
+
+def remove_manifest(owlnetsdir: str):
+    # Removes the manifest of the OWLNETS files of a SAB--e.g., before a conversion that might fail.
+    manifestpath = get_manifest_path(owlnetsdir)
+    if os.path.exists(manifestpath):
+        os.remove(manifestpath)
@@ -3,6 +3,9 @@
 import numpy as np
 import pandas as pd
 import os
+import re
+import json
+import hashlib
 
 # UBKG logging utility
 import ubkg_logging as ulog
@@ -14,9 +17,18 @@ import ubkg_logging as ulog
 # skowlnets
 
 
+# OCTOBER 2026 - The prefix mappings, read once per process by getprefixes.
+PREFIXES = None
+
+
 def getprefixes() -> pd.DataFrame:
     # Reads a resource file of SAB/prefixes.
 
+    # OCTOBER 2026 - The file is read only once per process.
+    global PREFIXES
+    if PREFIXES is not None:
+        return PREFIXES
+
     # Find absolute path to file.
     file = 'prefixes.csv'
     fpath = os.path.dirname(os.getcwd())
@@ -32,57 +44,28 @@ def getprefixes() -> pd.DataFrame:
     else:
         # Using print here instead of logging to allow functioning with parsetester.py.
         print('ubkg_parsetools: missing prefixes.csv file in the ubkg_utilities directory.')
-
-    return df
-
-
-def codeReplacements(x: pd.Series, ingestSAB: str):
-
-    # This function converts strings that correspond to either codes or CUIs for concepts to a format
-    # recognized by the knowledge graph.
-
-    # The standard format is SAB:code.
-
-    # Arguments:
-    #  x - Pandas Series object containing information on either:
-    #      a node (subject or object)
-    #      a dbxref
-    #  ingestSAB: the SAB for a set of assertions.
-    #
-
-    # JULY 2023 -
-    # 1. Assume that data from SABs from UMLS have been reformatted so that
-    #    HGNC HGNC:CODE -> HGNC CODE
-    #    GO GO:CODE -> GO CODE
-    #    HPO HP:CODE -> HPO CODE
-    # 2. Establishes the colon as the exclusive delimiter between SAB and code.
-    # -------
-
-    # Because of the variety of formats used for codes in various sources, this standardization is
-    # complicated.
-
-    # For the majority of nodes, especially those from either UMLS or from OBO-compliant OWL files in RDF/XML
-    # serialization,
-    # the formatting is straightforward. However, there are a number of special cases, which are handled below.
-
-    # For some SABs, the reformatting is complicated enough to warrant a resource file named prefixes.csv, which
-    # should be in the application folder.
-
-    # ---------------
-    # DEFAULT
-    # Convert the code string to the CodeID format.
-    # The colon, underscore, and space characters are reserved as delimters between SAB and code in input sources--e.g.,
-    #   SAB:CODE
-    #   SAB_CODE
-    #   SAB CODE
-    # However, the underscore is also used in code strings in some cases--e.g., RefSeq, with REFSEQ:NR_number.
-
-    # In addition, the hash and backslash figure are delimiters in URIs--e.g., ...#/SAB_CODE
-
-    # Start by reformatting as SAB<space>CODE. The exclusive delimiter (colon) will be added at the end of this
-    # script.
-    ret = x.str.replace(':', ' ').str.replace('#', ' ').str.replace('_', ' ').str.split('/').str[-1]
-
+        return df
+
+    PREFIXES = df
+    return PREFIXES
+
+
+# OCTOBER 2026
+# codeReplacements was originally a sequence of about 40 vectorized passes over the Series of codes--str.replace
+# calls for the default conversions, followed by np.where calls for the special cases, each of which allocated new
+# arrays--and a final loop over the elements. The conversions are now expressed as ordered tables of rules that are
+# compiled once per ingestSAB into a matcher that converts each code in a single pass.
+# The output is identical to that of the passes:
+# 1. The default conversions are applied in order to each code, as the str.replace calls were.
+# 2. Each special case rule replaced the converted value of every code that matched it, so a later rule takes
+#    precedence over an earlier one. The matcher finds the last special case rule that matches a code; only if no
+#    special case rule matches is the default conversion used.
+# 3. As in the str.contains calls, the patterns of the special case rules are regular expressions.
+
+# Default conversions, in order. Each is a tuple of (pattern, replacement, literal). If literal is None, the pattern
+# is replaced as a string; otherwise, the pattern is a regular expression that only matches strings that contain
+# literal.
+CODE_DEFAULT_REPLACEMENTS = [
     # --------------
     # SPECIAL CONVERSIONS: UMLS SABS
     # 1. Standardize SABs--e.g., convert NCBITaxon (from IRIs) to NCBI (in UMLS); MESH to MSH; etc.
@@ -94,47 +77,53 @@ def codeReplacements(x: pd.Series, ingestSAB: str):
     # July 2023 - replaced space with colon for delimiter.
 
     # NCI Thesaurus
-    ret = ret.str.replace('NCIT ', 'NCI:', regex=False)
+    ('NCIT ', 'NCI:', None),
     # MESH
-    ret = ret.str.replace('MESH ', 'MSH:', regex=False)
+    ('MESH ', 'MSH:', None),
 
     # GO (conversion deprecated July 2023; incoming format is now GO:code)
-    # ret = ret.str.replace('GO ', 'GO GO:', regex=False)
+    # ('GO ', 'GO GO:', None),
 
     # NCBI Taxonomy
-    ret = ret.str.replace('NCBITaxon ', 'NCBI:', regex=False)
+    ('NCBITaxon ', 'NCBI:', None),
     # UMLS
-    ret = ret.str.replace('.*UMLS.*\s', 'UMLS:', regex=True)
+    (r'.*UMLS.*\s', 'UMLS:', 'UMLS'),
     # SNOMED
-    ret = ret.str.replace('.*SNOMED.*\s', 'SNOMEDCT_US:', regex=True)
+    (r'.*SNOMED.*\s', 'SNOMEDCT_US:', 'SNOMED'),
 
     # HPO (deprecated July 2023; incoming format is now HPO:CODE)
-    # ret = ret.str.replace('HP ', 'HPO HP:', regex=False)
+    # ('HP ', 'HPO HP:', None),
 
     # FMA
-    ret = ret.str.replace('^fma', 'FMA:', regex=True)
+    ('^fma', 'FMA:', 'fma'),
 
     # HGNC
     # Note that non-UMLS sets of assertions may also refer to HGNC codes differently. See below.
-    ret = ret.str.replace('Hugo.owl HGNC ', 'HGNC:', regex=False)
+    ('Hugo.owl HGNC ', 'HGNC:', None),
 
     # Deprecated July 2023; the incoming format is now HGNC:code.
-    # ret = ret.str.replace('HGNC ', 'HGNC HGNC:', regex=False)
+    # ('HGNC ', 'HGNC HGNC:', None),
     # Changed July 2023
-    # ret = ret.str.replace('gene symbol report?hgnc id=', 'HGNC HGNC:', regex=False)
-    ret = ret.str.replace('gene symbol report?hgnc id=', 'HGNC:', regex=False)
-
+    # ('gene symbol report?hgnc id=', 'HGNC HGNC:', None),
+    ('gene symbol report?hgnc id=', 'HGNC:', None)
+]
+CODE_DEFAULT_REPLACEMENTS_COMPILED = [(re.compile(p) if literal is not None else p, r, literal)
+                                      for p, r, literal in CODE_DEFAULT_REPLACEMENTS]
+
+# Special case rules that apply to all SABs, in order. Each is a tuple of (pattern, conversion). The pattern is
+# searched for in the original code; the conversion is a function of the original code.
+CODE_SPECIAL_RULES = [
     # -------------
     # SPECIAL CASES - Non-UMLS sets of assertions
 
     # Ontologies such as HRAVS refer to NCI Thesaurus nodes by IRI.
-    ret = np.where(x.str.contains('Thesaurus.owl'), 'NCI:' + x.str.split('#').str[-1], ret)
+    ('Thesaurus.owl', lambda x: 'NCI:' + x.split('#')[-1]),
 
     # UNIPROTKB
     # The HGNC codes in the UNIPROTKB ingest files were in the expected format of HGNC HGNC:code.
     # Remove duplications introduced from earlier conversions in this script.
     # Deprecated July 2023: incoming format is now HGNC:code.
-    # ret = np.where(x.str.contains('HGNC HGNC:'), x, ret)
+    # ('HGNC HGNC:', lambda x: x),
 
     # EDAM
     # EDAM uses subdomains--e.g, format_3750, which translates to a SAB of "format". Force all
@@ -148,9 +137,9 @@ def codeReplacements(x: pd.Series, ingestSAB: str):
     #    EDAM:<domain>_<id>
 
     # Case 2 (dbxref)
-    ret = np.where((x.str.contains('EDAM')), x.str.split(':').str[-1], ret)
+    ('EDAM', lambda x: x.split(':')[-1]),
     # Case 1 (subject or object node)
-    ret = np.where((x.str.contains('edam')), 'EDAM:' + x.str.replace(' ', '_').str.split('/').str[-1], ret)
+    ('edam', lambda x: 'EDAM:' + x.replace(' ', '_').split('/')[-1]),
 
     # MONDO
     # Two cases to handle:
@@ -158,137 +147,377 @@ def codeReplacements(x: pd.Series, ingestSAB: str):
     # http://identifiers.org/hgnc/<id>
     # Convert to HGNC HGNC:<id>
     # Changed July 2023
-    # ret = np.where(x.str.contains('http://identifiers.org/hgnc'),
-                   #'HGNC HGNC:' + x.str.split('/').str[-1], ret)
-    ret = np.where(x.str.contains('http://identifiers.org/hgnc'),
-                   'HGNC:' + x.str.split('/').str[-1], ret)
+    # ('http://identifiers.org/hgnc', lambda x: 'HGNC HGNC:' + x.split('/')[-1]),
+    ('http://identifiers.org/hgnc', lambda x: 'HGNC:' + x.split('/')[-1]),
     # 2. MONDO uses both OBO-3 compliant IRIs (e.g., "http://purl.obolibrary.org/obo/MONDO_0019052") and
     #    non-compliant ones (e.g., "http://purl.obolibrary.org/obo/mondo#ordo_clinical_subtype")
-    ret = np.where(x.str.contains('http://purl.obolibrary.org/obo/mondo#'),
-                   'MONDO:' + x.str.split('#').str[-1], ret)
+    ('http://purl.obolibrary.org/obo/mondo#', lambda x: 'MONDO:' + x.split('#')[-1]),
 
     # MAY 2023
     # PGO
     # Restore changes made related to GO.
     # PGO nodes are written as http://purl.obolibrary.org/obo/PGO_(code)
     # Deprecated July 2023
-    # ret = np.where(x.str.contains('PGO'),
-                   # 'PGO PGO:' + x.str.split('_').str[-1], ret)
+    # ('PGO', lambda x: 'PGO PGO:' + x.split('_')[-1]),
 
     # REFSEQ - restore underscore between NR and number.
     # JULY 2023 - Refactored for SAB:CODE refactoring
     # Assumes that code at this point is in format REFSEQ NR X, to be reformatted as REFSEQ:NR_X.
-    ret = np.where(x.str.contains('REFSEQ'), x.str.replace('REFSEQ ', 'REFSEQ:').str.replace(' ', '_'), ret)
+    ('REFSEQ', lambda x: x.replace('REFSEQ ', 'REFSEQ:').replace(' ', '_')),
 
     # July 2023
     # MSIGDB - restore underscores.
-    ret = np.where(x.str.contains('MSIGDB'), x.str.replace('MSIGDB ', 'MSIGDB:').str.replace(' ', '_'), ret)
+    ('MSIGDB', lambda x: x.replace('MSIGDB ', 'MSIGDB:').replace(' ', '_')),
 
     # January 2025
     # REACTOME - restore underscores.
-    ret = np.where(x.str.contains('REACTOME'), x.str.replace('REACTOME ', 'REACTOME:').str.replace(' ', '_'), ret)
-
+    ('REACTOME', lambda x: x.replace('REACTOME ', 'REACTOME:').replace(' ', '_')),
 
     # MAY 2023
     # HPO
     # If expected format (HPO HP:code) was used, revert to avoid duplication.
     # Deprecated July 2023: incoming code format now HPO:CODE.
-    # ret = np.where(x.str.contains('HPO HP:'),
-                    #'HPO HP:' + x.str.split(':').str[-1], ret)
+    # ('HPO HP:', lambda x: 'HPO HP:' + x.split(':')[-1]),
 
     # HCOP
     # The HCOP node_ids are formatted to resemble HGNC node_ids.
     # Deprecated July 2023; no longer needed because HGNC is now formatted as HGNC:CODE.
-    # ret = np.where(x.str.contains('HCOP'),'HCOP HCOP:' + x.str.split(':').str[-1],ret)
+    # ('HCOP', lambda x: 'HCOP HCOP:' + x.split(':')[-1]),
 
     # SEPT 2023
     # CEDAR
-    ret = np.where(x.str.contains('https://repo.metadatacenter.org/templates/'),
-                   'CEDAR:' + x.str.split('/').str[-1], ret)
-    ret = np.where(x.str.contains('https://repo.metadatacenter.org/template-fields/'),
-                   'CEDAR:' + x.str.split('/').str[-1], ret)
-    ret = np.where(x.str.contains('https://schema.metadatacenter.org/core/'),
-                   'CEDAR:' + x.str.split('/').str[-1], ret)
-    ret = np.where(x.str.contains('http://www.w3.org/2001/XMLSchema'),
-                   'XSD:' + x.str.split('#').str[-1], ret)
+    ('https://repo.metadatacenter.org/templates/', lambda x: 'CEDAR:' + x.split('/')[-1]),
+    ('https://repo.metadatacenter.org/template-fields/', lambda x: 'CEDAR:' + x.split('/')[-1]),
+    ('https://schema.metadatacenter.org/core/', lambda x: 'CEDAR:' + x.split('/')[-1]),
+    ('http://www.w3.org/2001/XMLSchema', lambda x: 'XSD:' + x.split('#')[-1]),
 
     # HRAVS
     # The HRAVS IRIs are in format ...hravs#HRAVS_X, which results in HRAVS HRAVS X.
-    ret = np.where(x.str.contains('https://purl.humanatlas.io/vocab/hravs#'),
-                   'HRAVS:' + x.str.split('_').str[-1], ret)
+    ('https://purl.humanatlas.io/vocab/hravs#', lambda x: 'HRAVS:' + x.split('_')[-1]),
     # The gzip_csv converter script translates HRAVS IRIs to hravs HRAVS X.
-    ret = np.where(x.str.upper().str.contains('HRAVS HRAVS'),
-                   'HRAVS:' + x.str.split(' ').str[-1], ret)
+    # (This rule is matched in uppercase. See compile_code_replacements.)
+    ('HRAVS HRAVS', lambda x: 'HRAVS:' + x.split(' ')[-1]),
 
     # ORDO
     # ORDO uses Orphanet as a namespace.
-    ret = np.where(x.str.contains('http://www.orpha.net/ORDO/'),
-                   'ORDO:' + x.str.split('_').str[-1], ret)
-
-
-    # PREFIXES
-    # A number of ontologies, especially those that originate from Turtle files, use prefixes that are
-    # translated to IRIs that are not formatted as expected. Obtain the original namespace prefixes for
-    # SABs.
-    # Read in file of prefix mappings.
-    dfPrefix = getprefixes()
-    # Convert for each of the prefixes.
-    for index, row in dfPrefix.iterrows():
-        if ingestSAB in ['GLYCOCOO', 'GLYCORDF']:
-            # GlyCoCOO (a Turtle) and GlyCoRDF use IRIs that delimit with hash and use underlines.
-            # "http://purl.glycoinfo.org/ontology/codao#Compound_disease_association
-            # July 2023 - refactored to use colon as SAB:code delimiter
-            ret = np.where(x.str.contains(row['prefix']), row['SAB'] + ':' +
-                           x.str.replace(' ', '_').str.replace('/', '_').str.split('#').str[-1],
-                           ret)
-        # July 2023: other prefixes are only from NPO, NPOSKCAN
-        else:
-            if ingestSAB in ['NPO', 'NPOSKCAN']:
-                # Other SABs format IRIs with a terminal backslash and the code string.
-                # A notable exception is the PantherDB format (in NPOSKCAN), for which the IRI is an API call
-                # (e.g., http://www.pantherdb.org/panther/family.do?clsAccession=PTHR10558).
-                # July 2023 - refactored to use colon as SAB:code delimiter
-                ret = np.where(x.str.contains(row['prefix']), row['SAB'] + ':' +
-                               x.str.replace(' ', '_').str.replace('/', '_').str.replace('=', '_').str.split('_').str[-1],
-                               ret)
+    ('http://www.orpha.net/ORDO/', lambda x: 'ORDO:' + x.split('_')[-1])
+]
 
+# Special case rules that apply to all SABs and that follow the prefix rules (see compile_code_replacements).
+CODE_SPECIAL_RULES_AFTER_PREFIXES = [
     # UNIPROT (not to be confused with UNIPROTKB).
     # UNIPROT IRIs are formatted differently than those in Glygen, but are in the Glygen OWL files, so they need
     # to be translated separately from GlyGen nodes.
     # July 2023 - refactored to use colon as SAB:code delimiter
-    ret = np.where(x.str.contains('uniprot.org'), 'UNIPROT:' + x.str.split('/').str[-1], ret)
+    ('uniprot.org', lambda x: 'UNIPROT:' + x.split('/')[-1]),
 
     # JAS MAY 2023 - For case of HGNC codes added as dbxrefs.
     # Deprecated July 2023; incoming codes have format HGNC:CODE.
-    # ret = np.where(x.str.contains('HGNC HGNC '), x.str.replace('HGNC HGNC ','HGNC HGNC:'), ret)
+    # ('HGNC HGNC ', lambda x: x.replace('HGNC HGNC ', 'HGNC HGNC:')),
 
     # June 2023 - CCF, which uses underscores in codes
     # (Deprecated after we switched from CCF to HRA)
-    # ret = np.where(x.str.contains('http://purl.org/ccf/'),'CCF ' + x.str.split('/').str[-1], ret)
+    # ('http://purl.org/ccf/', lambda x: 'CCF ' + x.split('/')[-1]),
     # HGNCNR was a dependency for CCF, so also deprecated
-    # ret = np.where(x.str.contains('http://purl.bioontology.org/ontology/HGNC/'), 'HGNCNR ' + x.str.split('/').str[-1], ret)
+    # ('http://purl.bioontology.org/ontology/HGNC/', lambda x: 'HGNCNR ' + x.split('/')[-1]),
 
     # July 2023 - For Data Distillery use cases, where code formats conformed to the earlier paradigms.
     # HGNC HGNC:
     # HPO HP:
     # HCOP HCOP:
-    ret = np.where(x.str.contains('HGNC HGNC:'), x.str.replace('HGNC HGNC:', 'HGNC:'), ret)
+    ('HGNC HGNC:', lambda x: x.replace('HGNC HGNC:', 'HGNC:')),
     # January 2024 - standardized to HP from HPO.
-    ret = np.where(x.str.contains('HPO HP:'), x.str.replace('HPO HP:', 'HP:'), ret)
-    ret = np.where(x.str.contains('HCOP HCOP:'), x.str.replace('HCOP HCOP:', 'HCOP:'), ret)
+    ('HPO HP:', lambda x: x.replace('HPO HP:', 'HP:')),
+    ('HCOP HCOP:', lambda x: x.replace('HCOP HCOP:', 'HCOP:')),
 
-    ret = np.where(x.str.contains('NCBI Gene'), x.str.replace('NCBI Gene', 'ENTREZ:'), ret)
+    ('NCBI Gene', lambda x: x.replace('NCBI Gene', 'ENTREZ:')),
 
     # JANUARY 2024 - GENCODE_VS
     # Restore the underscore.
-    ret = np.where(x.str.contains('GENCODE_VS'),x.str.replace('GENCODE:VS', 'GENCODE_VS'), ret)
+    ('GENCODE_VS', lambda x: x.replace('GENCODE:VS', 'GENCODE_VS')),
 
     # AUGUST 2025 - SENOTYPE_VS
     # Restore the underscore.
-    ret = np.where(x.str.contains('SENOTYPE_VS'), x.str.replace('SENOTYPE:VS', 'SENOTYPE_VS'), ret)
+    ('SENOTYPE_VS', lambda x: x.replace('SENOTYPE:VS', 'SENOTYPE_VS'))
+]
+
+# Special case rules matched in uppercase.
+CODE_UPPERCASE_PATTERNS = ['HRAVS HRAVS']
+
+# Number of characters of the literal start of a prefix by which prefixes are indexed (see compile_prefix_index).
+PREFIX_HEAD_LENGTH = 4
+
+# Compiled code replacement matchers, keyed by rule set (see get_rule_set).
+CODE_REPLACEMENT_MATCHERS = {}
+
+# Converted CodeIDs, keyed by rule set and then by the original code. The cache persists for the life of the process
+# (including between SABs when build_csv.py runs OWLNETS-UMLS-GRAPH in process), and can be saved to and loaded from a
+# file (see save_code_id_cache and load_code_id_cache).
+CODE_ID_CACHE = {}
+
+# Converted CodeIDs that have not been saved to the code cache file, keyed by rule set and then by the original code.
+CODE_ID_CACHE_NEW = {}
+
+# Number of bytes of each code cache file that have been loaded into or saved from CODE_ID_CACHE, keyed by path.
+# The offset is None if the file was saved with different rules for converting codes.
+CODE_ID_CACHE_FILES = {}
+
+
+def get_rule_set(ingestSAB: str) -> str:
+
+    # OCTOBER 2026
+    # Returns the name of the set of codeReplacements rules that applies to a SAB. SABs differ only in the rules for
+    # prefixes, so SABs with the same rule set convert a code in the same way.
+
+    if ingestSAB in ['GLYCOCOO', 'GLYCORDF']:
+        return 'GLYCO'
+    elif ingestSAB in ['NPO', 'NPOSKCAN']:
+        return 'NPO'
+    else:
+        return 'DEFAULT'
+
+
+def get_prefix_rules(ingestSAB: str) -> list:
+
+    # OCTOBER 2026
+    # Returns the special case rules for the prefixes in prefixes.csv that apply to a SAB, in the order of the file.
+
+    # PREFIXES
+    # A number of ontologies, especially those that originate from Turtle files, use prefixes that are
+    # translated to IRIs that are not formatted as expected. Obtain the original namespace prefixes for
+    # SABs.
+
+    rules = []
+    ruleset = get_rule_set(ingestSAB)
+    if ruleset == 'GLYCO':
+        # GlyCoCOO (a Turtle) and GlyCoRDF use IRIs that delimit with hash and use underlines.
+        # "http://purl.glycoinfo.org/ontology/codao#Compound_disease_association
+        # July 2023 - refactored to use colon as SAB:code delimiter
+        def convert(sab: str):
+            return lambda x: sab + ':' + x.replace(' ', '_').replace('/', '_').split('#')[-1]
+    # July 2023: other prefixes are only from NPO, NPOSKCAN
+    elif ruleset == 'NPO':
+        # Other SABs format IRIs with a terminal backslash and the code string.
+        # A notable exception is the PantherDB format (in NPOSKCAN), for which the IRI is an API call
+        # (e.g., http://www.pantherdb.org/panther/family.do?clsAccession=PTHR10558).
+        # July 2023 - refactored to use colon as SAB:code delimiter
+        def convert(sab: str):
+            return lambda x: sab + ':' + x.replace(' ', '_').replace('/', '_').replace('=', '_').split('_')[-1]
+    else:
+        return rules
+
+    # Read in file of prefix mappings.
+    dfPrefix = getprefixes()
+    # Convert for each of the prefixes.
+    for index, row in dfPrefix.iterrows():
+        rules.append((row['prefix'], convert(row['SAB'])))
+
+    return rules
+
+
+def compile_rules(rules: list) -> list:
+
+    # OCTOBER 2026
+    # Compiles a list of special case rules. Returns the rules in reverse order, as tuples of
+    # (search function, conversion).
+
+    compiled = []
+    for pattern, convert in rules:
+        if pattern in CODE_UPPERCASE_PATTERNS:
+            # Uppercase conversion does not add or remove spaces, so only codes with spaces can match.
+            search = lambda x, pattern=pattern: ' ' in x and pattern in x.upper()
+        else:
+            search = re.compile(pattern).search
+        compiled.append((search, convert))
+    compiled.reverse()
+    return compiled
+
+
+def get_literal_start(pattern: str) -> str:
+
+    # OCTOBER 2026
+    # Returns the literal characters at the start of a regular expression--i.e., the characters that any match
+    # of the expression starts with.
+    # A pattern with a top-level alternation (e.g., "abc|xyz") has no literal start, because a match can start with
+    # the characters of any alternative.
+
+    if has_top_level_alternation(pattern):
+        return ''
+    for idx, c in enumerate(pattern):
+        if c in '.^$*+?()[]{}|\\':
+            if c in '?*{':
+                # The preceding character is optional.
+                return pattern[:max(idx - 1, 0)]
+            return pattern[:idx]
+    return pattern
+
+
+def has_top_level_alternation(pattern: str) -> bool:
+
+    # OCTOBER 2026
+    # Checks whether a regular expression has an unescaped | outside of groups and character classes.
+
+    depth = 0
+    in_class = False
+    escaped = False
+    for c in pattern:
+        if escaped:
+            escaped = False
+        elif c == '\\':
+            escaped = True
+        elif in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+    return False
+
+
+def compile_prefix_index(rules: list) -> dict:
+
+    # OCTOBER 2026
+    # Compiles the rules for prefixes into an index, so that the prefixes that can match a code are found with a
+    # few lookups instead of a search for each prefix.
+
+    # A prefix can only match a code at a position where the code contains the literal start of the prefix. The
+    # index groups the prefixes by the first HEAD_LENGTH characters of their literal starts (e.g., "http"), and then
+    # by their literal starts, which are looked up in a dictionary for each length of literal start. The regular
+    # expression of a prefix found in the index is then matched at the position.
+
+    # Prefixes with a literal start shorter than HEAD_LENGTH are searched for in every code.
+
+    # Returns a dict with keys:
+    # heads: dict of head -> dict of length -> dict of literal start -> list of (rule position, match function)
+    # other: list of (rule position, search function), for the other prefixes
+
+    index = {'heads': {}, 'other': []}
+    for position, (pattern, convert) in enumerate(rules):
+        compiled = re.compile(pattern)
+        literal = get_literal_start(pattern)
+        if len(literal) < PREFIX_HEAD_LENGTH:
+            index['other'].append((position, compiled.search))
+            continue
+        lengths = index['heads'].setdefault(literal[:PREFIX_HEAD_LENGTH], {})
+        lengths.setdefault(len(literal), {}).setdefault(literal, []).append((position, compiled.match))
+
+    return index
+
+
+def search_prefix_index(index: dict, code: str) -> int:
+
+    # OCTOBER 2026
+    # Returns the position of the last prefix rule that matches a code, or -1 if no prefix rule matches.
+
+    found = -1
+    for position, search in index['other']:
+        if position > found and search(code):
+            found = position
+
+    for head, lengths in index['heads'].items():
+        start = code.find(head)
+        while start >= 0:
+            for length, literals in lengths.items():
+                for position, match in literals.get(code[start:start + length], []):
+                    if position > found and match(code, start):
+                        found = position
+            start = code.find(head, start + 1)
+
+    return found
+
+
+def compile_code_replacements(ingestSAB: str) -> tuple:
+
+    # OCTOBER 2026
+    # Compiles the rules of codeReplacements that apply to a SAB.
+    # Returns a tuple of:
+    # 1. a regular expression that matches a code if any special case rule that is not a prefix rule matches it
+    # 2. the special case rules that follow the prefix rules, compiled (see compile_rules)
+    # 3. the prefix rules, as a list of conversions and an index (see compile_prefix_index)
+    # 4. the special case rules that precede the prefix rules, compiled
+
+    ruleset = get_rule_set(ingestSAB)
+    if ruleset in CODE_REPLACEMENT_MATCHERS:
+        return CODE_REPLACEMENT_MATCHERS[ruleset]
+
+    prefix_rules = get_prefix_rules(ingestSAB)
+    prefixes = ([convert for pattern, convert in prefix_rules], compile_prefix_index(prefix_rules))
+
+    # The single regular expression is tested first, so that the rules are only searched for codes that match one.
+    rules = CODE_SPECIAL_RULES + CODE_SPECIAL_RULES_AFTER_PREFIXES
+    anyrule = re.compile('|'.join(f'(?:{p})' for p, c in rules if p not in CODE_UPPERCASE_PATTERNS))
+
+    CODE_REPLACEMENT_MATCHERS[ruleset] = (anyrule, compile_rules(CODE_SPECIAL_RULES_AFTER_PREFIXES), prefixes,
+                                          compile_rules(CODE_SPECIAL_RULES))
+    return CODE_REPLACEMENT_MATCHERS[ruleset]
+
+
+def get_special_code(x: str, ingestSAB: str) -> str:
+
+    # OCTOBER 2026
+    # Applies the last special case rule of codeReplacements that matches a code.
+    # Returns None if no special case rule matches the code.
+
+    anyrule, after_prefixes, prefixes, before_prefixes = compile_code_replacements(ingestSAB)
+
+    # Only codes with spaces can match an uppercase rule.
+    special = anyrule.search(x) is not None or ' ' in x
+
+    if special:
+        for search, convert in after_prefixes:
+            if search(x):
+                return convert(x)
+
+    converts, index = prefixes
+    if len(converts) > 0:
+        position = search_prefix_index(index, x)
+        if position >= 0:
+            return converts[position](x)
+
+    if special:
+        for search, convert in before_prefixes:
+            if search(x):
+                return convert(x)
+
+    return None
+
+
+def get_default_code(x: str) -> str:
+
+    # OCTOBER 2026
+    # Applies the default conversions of codeReplacements to a code.
+
+    # DEFAULT
+    # Convert the code string to the CodeID format.
+    # The colon, underscore, and space characters are reserved as delimters between SAB and code in input sources--e.g.,
+    #   SAB:CODE
+    #   SAB_CODE
+    #   SAB CODE
+    # However, the underscore is also used in code strings in some cases--e.g., RefSeq, with REFSEQ:NR_number.
+
+    # In addition, the hash and backslash figure are delimiters in URIs--e.g., ...#/SAB_CODE
+
+    # Start by reformatting as SAB<space>CODE. The exclusive delimiter (colon) will be added at the end of this
+    # script.
+    ret = x.replace(':', ' ').replace('#', ' ').replace('_', ' ').split('/')[-1]
+
+    for pattern, repl, literal in CODE_DEFAULT_REPLACEMENTS_COMPILED:
+        if literal is None:
+            ret = ret.replace(pattern, repl)
+        elif literal in ret:
+            ret = pattern.sub(repl, ret)
+
+    return ret
 
-    # ---------------
-    # FINAL PROCESSING
+
+def get_code_id(x: str) -> str:
+
+    # OCTOBER 2026
+    # FINAL PROCESSING of codeReplacements for a converted code.
 
     # At this point in the script, the code should be in one of two formats:
     # 1. SAB CODE, where
@@ -301,7 +530,6 @@ def codeReplacements(x: pd.Series, ingestSAB: str):
 
     # Force SAB to uppercase. Force the colon to be the delimiter between SAB and code.
 
-    # After the preceding conversions, ret has changed from a Pandas Series to a numpy array.
     # 1. Split each element on the initial space, if one exists.
     # 2. Convert the SAB portion (first element) to uppercase.
     # JULY 2023
@@ -309,22 +537,175 @@ def codeReplacements(x: pd.Series, ingestSAB: str):
 
     # Note: Special cases should already be in the correct code format of SAB:code.
 
-    for idx, x in np.ndenumerate(ret):
-        xsplit = x.split(sep=' ', maxsplit=1)
-        if len(xsplit) > 1:
-            sab = xsplit[0].upper()
-            code = ' '.join(xsplit[1:len(xsplit)])
-            ret[idx] = sab+':'+code
-        elif len(x)>0:
-            # JULY 2023
-            # For the case of a CodeID that appears to be a "naked" UMLS CUI, format as UMLS:CUI.
-            # SEPT 2023 - Account for codes in the CEDAR SAB.
-            if x[0] == 'C' and not 'CEDAR' in x and x[1].isnumeric:
-             ret[idx] = 'UMLS:'+x
-        else:
-            ret[idx] = x
+    xsplit = x.split(sep=' ', maxsplit=1)
+    if len(xsplit) > 1:
+        return xsplit[0].upper() + ':' + xsplit[1]
+    elif len(x) > 0:
+        # JULY 2023
+        # For the case of a CodeID that appears to be a "naked" UMLS CUI, format as UMLS:CUI.
+        # SEPT 2023 - Account for codes in the CEDAR SAB.
+        # OCTOBER 2026 - The original test of the second character (x[1].isnumeric, without a call) was always true,
+        # so it is omitted.
+        if x[0] == 'C' and not 'CEDAR' in x:
+            return 'UMLS:' + x
+    return x
+
+
+def get_code_id_cache_version() -> str:
+
+    # OCTOBER 2026
+    # Returns a hash of the sources of the codeReplacements rules--this module and the prefix mappings. A cache of
+    # converted codes that was saved with a different version is not used.
+
+    hash = hashlib.md5()
+    with open(__file__, 'rb') as fp:
+        hash.update(fp.read())
+    hash.update(getprefixes().to_csv(index=False).encode('utf-8'))
+    return hash.hexdigest()
+
+
+def get_code_id_cache_line(ruleset: str, codes: dict) -> bytes:
+    # Returns the line of a code cache file for converted codes of a rule set. Only string codes are saved, because
+    # JSON keys are strings.
+    codes = {code: converted for code, converted in codes.items() if isinstance(code, str)}
+    return (json.dumps([ruleset, codes]) + '\n').encode('utf-8')
+
+
+def load_code_id_cache(path: str):
+
+    # OCTOBER 2026
+    # Loads into CODE_ID_CACHE a cache of converted codes that was saved by save_code_id_cache--e.g., by the
+    # ingestion of a prior SAB in a context.
+
+    # The file is in JSON lines format: the first line records the version of the rules for converting codes (see
+    # get_code_id_cache_version), and each following line is a list of a rule set and the codes converted with it
+    # since the prior save. Only the lines after those already loaded or saved in this process are read. An
+    # incomplete last line (e.g., from a failed save) is ignored.
+
+    if not os.path.exists(path):
+        return
+
+    offset = CODE_ID_CACHE_FILES.get(path, {}).get('offset', 0)
+    if path in CODE_ID_CACHE_FILES and offset is None:
+        return
+    if os.path.getsize(path) < offset:
+        # The file was written again after it was loaded.
+        offset = 0
+
+    with open(path, 'rb') as fp:
+        fp.seek(offset)
+        if offset == 0:
+            header = fp.readline()
+            try:
+                version = json.loads(header)['version']
+            except (ValueError, KeyError, TypeError):
+                version = None
+            if version != get_code_id_cache_version() or not header.endswith(b'\n'):
+                ulog.print_and_logger_info('-- The rules for converting codes have changed since the code cache was '
+                                           'saved; ignoring the code cache...')
+                CODE_ID_CACHE_FILES[path] = {'offset': None}
+                return
+            offset = len(header)
+        for line in fp:
+            if not line.endswith(b'\n'):
+                break
+            ruleset, codes = json.loads(line)
+            CODE_ID_CACHE.setdefault(ruleset, {}).update(codes)
+            offset += len(line)
+
+    CODE_ID_CACHE_FILES[path] = {'offset': offset}
+
+
+def save_code_id_cache(path: str):
+
+    # OCTOBER 2026
+    # Saves CODE_ID_CACHE to a file.
+    # The codes converted since the last save are appended to the file, instead of writing the entire cache again.
+    # The entire cache is written only to a new file, or to replace a file that was saved with different rules for
+    # converting codes.
+
+    if path not in CODE_ID_CACHE_FILES:
+        load_code_id_cache(path=path)
+    offset = CODE_ID_CACHE_FILES.get(path, {}).get('offset')
+
+    if offset is None or not os.path.exists(path) or os.path.getsize(path) < offset:
+        header = (json.dumps({'version': get_code_id_cache_version()}) + '\n').encode('utf-8')
+        with open(path + '.tmp', 'wb') as fp:
+            fp.write(header)
+            for ruleset, codes in CODE_ID_CACHE.items():
+                fp.write(get_code_id_cache_line(ruleset=ruleset, codes=codes))
+        os.replace(path + '.tmp', path)
+    else:
+        with open(path, 'r+b') as fp:
+            # Discard an incomplete line from a failed save.
+            fp.seek(offset)
+            fp.truncate()
+            for ruleset, codes in CODE_ID_CACHE_NEW.items():
+                if len(codes) > 0:
+                    fp.write(get_code_id_cache_line(ruleset=ruleset, codes=codes))
 
-    return ret
+    CODE_ID_CACHE_FILES[path] = {'offset': os.path.getsize(path)}
+    CODE_ID_CACHE_NEW.clear()
+
+
+def codeReplacements(x: pd.Series, ingestSAB: str):
+
+    # This function converts strings that correspond to either codes or CUIs for concepts to a format
+    # recognized by the knowledge graph.
+
+    # The standard format is SAB:code.
+
+    # Arguments:
+    #  x - Pandas Series object containing information on either:
+    #      a node (subject or object)
+    #      a dbxref
+    #  ingestSAB: the SAB for a set of assertions.
+    #
+
+    # Returns: numpy array of CodeIDs.
+
+    # JULY 2023 -
+    # 1. Assume that data from SABs from UMLS have been reformatted so that
+    #    HGNC HGNC:CODE -> HGNC CODE
+    #    GO GO:CODE -> GO CODE
+    #    HPO HP:CODE -> HPO CODE
+    # 2. Establishes the colon as the exclusive delimiter between SAB and code.
+    # -------
+
+    # Because of the variety of formats used for codes in various sources, this standardization is
+    # complicated.
+
+    # For the majority of nodes, especially those from either UMLS or from OBO-compliant OWL files in RDF/XML
+    # serialization,
+    # the formatting is straightforward. However, there are a number of special cases, which are handled in the
+    # rule tables above.
+
+    # For some SABs, the reformatting is complicated enough to warrant a resource file named prefixes.csv, which
+    # should be in the application folder.
+
+    # OCTOBER 2026 - Converted to a single pass with the compiled rule tables.
+    # Only the distinct codes in x are converted. Converted codes are cached by rule set, so that a code that
+    # appears in more than one column (e.g., subject, object, node_id, dbxref) or in more than one SAB is only
+    # converted once.
+    # Codes converted since the last save of the cache are also recorded in CODE_ID_CACHE_NEW.
+    ruleset = get_rule_set(ingestSAB)
+    cache = CODE_ID_CACHE.setdefault(ruleset, {})
+    cache_new = CODE_ID_CACHE_NEW.setdefault(ruleset, {})
+
+    codes, uniques = pd.factorize(x, use_na_sentinel=False)
+    converted_uniques = np.empty(len(uniques), dtype=object)
+    for idx, code in enumerate(uniques.tolist()):
+        converted = cache.get(code)
+        if converted is None:
+            converted = get_special_code(code, ingestSAB)
+            if converted is None:
+                converted = get_default_code(code)
+            converted = get_code_id(converted)
+            cache[code] = converted
+            cache_new[code] = converted
+        converted_uniques[idx] = converted
+
+    return converted_uniques[codes]
 
     # -------------
     # ORIGINAL CODE for historical purposes. Life was simpler then.
@@ -361,19 +742,43 @@ def relationReplacements(x: pd.Series):
 
 
 
-    ret = x.str.replace('.', '_', regex=False)
-    ret = ret.str.replace('-', '_', regex=False)
-    ret = ret.str.replace('(', '_', regex=False)
-    ret = ret.str.replace(')', '_', regex=False)
-    ret = ret.str.replace('[', '_', regex=False)
-    ret = ret.str.replace(']', '_', regex=False)
-    ret = ret.str.replace('{', '_', regex=False)
-    ret = ret.str.replace('}', '_', regex=False)
-    ret = ret.str.replace(':', '_', regex=False)
+    # OCTOBER 2026
+    # A column of predicates (e.g., the :TYPE column of CUI-CUIs.csv) has many rows but few distinct predicates.
+    # Only the distinct predicates are converted, with a single translate of the reserved characters; the
+    # conversions are then mapped back to the rows. The conversion of a predicate is in get_relation.
+
+    codes, uniques = pd.factorize(x, use_na_sentinel=False)
+    converted_uniques = np.empty(len(uniques), dtype=object)
+    for idx, relation in enumerate(uniques.tolist()):
+        converted_uniques[idx] = get_relation(relation)
+
+    return converted_uniques[codes]
+
+
+# OCTOBER 2026
+# Characters in predicates that relationReplacements replaces with the underscore.
+RELATION_TRANSLATION = str.maketrans({c: '_' for c in '.-()[]{}:'})
+
+# Patterns of RDF type predicates that relationReplacements replaces with isa. (As in the original str.contains
+# calls, the patterns are regular expressions.)
+RELATION_ISA_PATTERNS = [re.compile('http://www.w3.org/1999/02/22-rdf-syntax-ns#type'),
+                         re.compile('http://www.w3.org/2000/01/rdf-schema#type')]
+
+
+def get_relation(x: str) -> str:
+
+    # OCTOBER 2026
+    # Converts a single predicate for relationReplacements.
 
-    ret = ret.str.lower()
-    ret = np.where(ret.astype(str).str[0].str.isnumeric(),'rel_' + ret, ret)
+    # The original Series conversion treated missing values in its np.where conditions as true, so a missing (or
+    # other non-string) predicate became isa, and an empty predicate became rel_. These results are kept.
+    if not isinstance(x, str):
+        return 'isa'
 
+    # Replace reserved characters with the underscore.
+    ret = x.translate(RELATION_TRANSLATION).lower()
+    if ret == '' or ret[:1].isnumeric():
+        ret = 'rel_' + ret
 
     # For the majority of edges, especially those from either UMLS or from OBO-compliant
     # OWL files in RDF/XML serialization,
@@ -385,11 +790,13 @@ def relationReplacements(x: pd.Series):
 
     # March 2024 predicates are in lowercase.
     # ret = np.where(x.str.contains('RO:'), 'http://purl.obolibrary.org/obo/RO_' + x.str.split('RO:').str[-1], ret)
-    ret = np.where(x.str.contains('ro:'), 'http://purl.obolibrary.org/obo/ro_' + x.str.split('ro:').str[-1], ret)
+    if 'ro:' in x:
+        ret = 'http://purl.obolibrary.org/obo/ro_' + x.split('ro:')[-1]
 
     # Replace #type from RDF schemas with isa.
-    ret = np.where(x.str.contains('http://www.w3.org/1999/02/22-rdf-syntax-ns#type'), 'isa', ret)
-    ret = np.where(x.str.contains('http://www.w3.org/2000/01/rdf-schema#type'), 'isa', ret)
+    for pattern in RELATION_ISA_PATTERNS:
+        if pattern.search(x) is not None:
+            ret = 'isa'
 
     return ret
 
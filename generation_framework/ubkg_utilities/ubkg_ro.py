@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for maintaining a local cache of the Relations Ontology (RO).
+
+# Scripts in the generation framework obtain relationship properties and their inverses from the JSON serialization
+# of RO (ro.json). Instead of fetching ro.json from GitHub for every SAB, scripts read it from a cache directory
+# (by default, ro_cache in the generation_framework directory) that contains:
+# 1. ro.json
+# 2. relation_triples.csv - the table of relationship properties and inverses derived from ro.json
+#    (see get_relation_triples)
+# 3. manifest.json - the ETag and Last-Modified headers of the download of ro.json, the time of the download, and
+#    the MD5 hashes of ro.json and of the version from which relation_triples.csv was derived.
+
+# ro.json is downloaded again only when the cache is older than RO_MAX_AGE_SECONDS, and then with a conditional GET,
+# so that an unchanged ro.json is not downloaded. If the download fails, the cached ro.json is used.
+
+# In offline mode (the environment variable UBKG_RO_OFFLINE, set by the -R argument of build_csv.py), the cache
+# is used regardless of age, and it is an error for the cache not to exist.
+
+# Within a process (e.g., when build_csv.py runs OWLNETS-UMLS-GRAPH in process), ro.json and the table of triples are
+# also kept in memory.
+
+# Several processes can use the cache at once--e.g., the execute scripts of SABs built in parallel with the -j
+# argument of build_csv.py. Each file of the cache is written to a temporary file with a unique name in the cache
+# directory and then renamed, so that processes never write the same file or read a partly written one.
+
+import os
+import json
+import tempfile
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+import requests
+
+import ubkg_logging as ulog
+
+RO_URL = 'https://raw.githubusercontent.com/oborel/obo-relations/master/ro.json'
+
+# Age after which the cache is checked against the RO repository.
+RO_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+# Environment variable that sets offline mode.
+RO_OFFLINE_VARIABLE = 'UBKG_RO_OFFLINE'
+
+# In-memory copies of ro.json and the table of triples, keyed by cache directory.
+RO_MEMORY = {}
+
+
+def get_ro_cache_dir() -> str:
+    # Returns the path to the default cache directory. (This assumes that the calling script is run from the
+    # generation_framework directory, as by build_csv.py.)
+    return os.path.join(os.getcwd(), 'ro_cache')
+
+
+def read_ro_manifest(cachedir: str) -> dict:
+
+    # Reads the manifest of the cache. Returns an empty manifest if the cache does not exist.
+
+    manifestpath = os.path.join(cachedir, 'manifest.json')
+    if not os.path.exists(manifestpath) or not os.path.exists(os.path.join(cachedir, 'ro.json')):
+        return {}
+    with open(manifestpath, 'r') as fp:
+        return json.load(fp)
+
+
+def write_ro_cache_file(cachedir: str, filename: str, content: bytes):
+
+    # Writes a file of the cache through a temporary file with a unique name.
+
+    os.makedirs(cachedir, exist_ok=True)
+    fd, tmppath = tempfile.mkstemp(dir=cachedir, prefix=filename + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(content)
+        os.replace(tmppath, os.path.join(cachedir, filename))
+    except BaseException:
+        if os.path.exists(tmppath):
+            os.remove(tmppath)
+        raise
+
+
+def write_ro_manifest(cachedir: str, manifest: dict):
+    # Writes the manifest of the cache.
+    write_ro_cache_file(cachedir, 'manifest.json', json.dumps(manifest).encode('utf-8'))
+
+
+def refresh_ro_cache(cachedir: str) -> dict:
+
+    # Downloads ro.json to the cache if the cache does not exist, or if it is stale and ro.json has changed.
+    # Returns the manifest of the cache.
+
+    manifest = read_ro_manifest(cachedir)
+
+    if os.environ.get(RO_OFFLINE_VARIABLE):
+        if manifest == {}:
+            ulog.print_and_logger_info(f'ERROR: Offline mode for the Relations Ontology, but there is no cached '
+                                       f'ro.json in {cachedir}.')
+            exit(1)
+        return manifest
+
+    if manifest != {} and time.time() - manifest['fetched'] < RO_MAX_AGE_SECONDS:
+        return manifest
+
+    headers = {'Accept': 'application/json'}
+    if manifest.get('etag') is not None:
+        headers['If-None-Match'] = manifest['etag']
+    if manifest.get('last_modified') is not None:
+        headers['If-Modified-Since'] = manifest['last_modified']
+
+    ulog.print_and_logger_info('-- Checking the Relations Ontology for changes...')
+    try:
+        response = requests.get(RO_URL, headers=headers, timeout=60)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        if manifest == {}:
+            ulog.print_and_logger_info(f'ERROR: Unable to download the Relations Ontology from {RO_URL}: {e}')
+            exit(1)
+        ulog.print_and_logger_info(f'-- Unable to check the Relations Ontology ({e}); using the cached ro.json...')
+        return manifest
+
+    if response.status_code != 304:
+        ulog.print_and_logger_info('-- Downloading the Relations Ontology to the cache...')
+        write_ro_cache_file(cachedir, 'ro.json', response.content)
+        manifest['etag'] = response.headers.get('ETag')
+        manifest['last_modified'] = response.headers.get('Last-Modified')
+        manifest['md5'] = hashlib.md5(response.content).hexdigest()
+
+    manifest['fetched'] = time.time()
+    write_ro_manifest(cachedir, manifest)
+    return manifest
+
+
+def get_ro_json(cachedir: str = None) -> dict:
+
+    # Returns the content of ro.json, from the cache.
+
+    if cachedir is None:
+        cachedir = get_ro_cache_dir()
+
+    manifest = refresh_ro_cache(cachedir)
+    memory = RO_MEMORY.get(cachedir)
+    if memory is not None and memory['md5'] == manifest['md5']:
+        return memory['json']
+
+    with open(os.path.join(cachedir, 'ro.json'), 'r') as fp:
+        rojson = json.load(fp)
+    RO_MEMORY[cachedir] = {'md5': manifest['md5'], 'json': rojson, 'triples': None}
+    return rojson
+
+
+def get_relation_triples(cachedir: str = None) -> pd.DataFrame:
+
+    # Returns the table of relationship properties and inverses derived from ro.json, with columns
+    # IRI, relation_label_RO, inverse_RO.
+    # The table is derived once for each version of ro.json, and saved in the cache.
+
+    if cachedir is None:
+        cachedir = get_ro_cache_dir()
+
+    rojson = get_ro_json(cachedir)
+    memory = RO_MEMORY[cachedir]
+    if memory['triples'] is not None:
+        return memory['triples'].copy()
+
+    # The table is derived again if either ro.json or the derivation (this module) changes.
+    manifest = read_ro_manifest(cachedir)
+    with open(__file__, 'rb') as fp:
+        version = manifest['md5'] + ':' + hashlib.md5(fp.read()).hexdigest()
+
+    triplespath = os.path.join(cachedir, 'relation_triples.csv')
+    if manifest.get('triples_version') == version and os.path.exists(triplespath):
+        dfrt = pd.read_csv(triplespath, dtype=str, keep_default_na=False, na_values=[''])
+    else:
+        dfrt = build_relation_triples(rojson)
+        write_ro_cache_file(cachedir, 'relation_triples.csv', dfrt.to_csv(index=False).encode('utf-8'))
+        manifest['triples_version'] = version
+        write_ro_manifest(cachedir, manifest)
+
+    memory['triples'] = dfrt
+    return dfrt.copy()
+
+
+def build_relation_triples(rojson: dict) -> pd.DataFrame:
+
+    # -------------------------------------------------------------
+    # IDENTIFY RELATIONSHIPS AND INVERSE RELATIONSHIPS
+
+    # Obtain descriptions of relationships and their inverses from the Relations Ontology JSON.
+    # (Moved from getROrelationshiptriples in OWLNETS-UMLS-GRAPH-12.py.)
+
+    # The Relations Ontology (RO) is an ontology of relationships, in which the nodes are
+    # relationship properties and the edges (predicates) are relationships *between*
+    # relationship properties.
+    # For example,
+    # relationship property RO_0002292 (node) inverseOf (edge) relationship property RO_0002206 (node)
+    # or
+    # "expresses" inverseOf "expressed in"
+
+    # Information on relationship properties (i.e., relationship property nodes) is in the node array.
+    dfnodes = pd.DataFrame(rojson['graphs'][0]['nodes'])
+    # Information on edges (i.e., relationships between relationship properties) is in the edges array.
+    dfedges = pd.DataFrame(rojson['graphs'][0]['edges'])
+
+    # Information on the relationships between relationship properties *should be* in the edges array.
+    # Example of edge element:
+    # {
+    #      "sub" : "http://purl.obolibrary.org/obo/RO_0002101",
+    #      "pred" : "inverseOf",
+    #      "obj" : "http://purl.obolibrary.org/obo/RO_0002132"
+    #    }
+    #
+    # The ontology graph requires that every relationship have an inverse.
+    # Not all relationships in RO are defined with inverses; for these relationships, the script will create
+    # "pseudo-inverse" relationships--e.g., if the only information available is the label "eats", then
+    # the pseudo-inverse will be "inverse_eats" (instead of, say, "eaten_by").
+
+    # Cases that require pseudo-inverses include:
+    # 1. A property is incompletely specified in terms of both sides of an inverse relationship--e.g.,
+    #    RO_0002206 is listed as the inverse of RO_0002292, but RO_0002292 is not listed as the
+    #    corresponding inverse of RO_0002206. For these properties, the available relationship
+    #    will be inverted when joining relationship information to the edgelist.
+    #    (This is really a case in which both directions of the inverse relationship should have been
+    #    defined in the edges node, but were not.)
+    # 2. A property does not have inverse relationships defined in RO.
+    #    The relationship will be added to the list with a null inverse. The script will later create a
+    #    pseudo-inverse by appending "inverse_" to the relationship label.
+
+    # ---------------------------------
+
+    # Obtain triple information for relationship properties--i.e.,
+    # 1. IRIs for "subject" nodes and "object" nodes (relationship properties)
+    # 2. relationship predicates (relationships between relationship properties)
+
+    # Get subject node, edge
+    # MAY 2023 replace inner join with left
+    dfrt = dfnodes.merge(dfedges, how='left', left_on='id', right_on='sub')
+    # Get object node
+    dfrt = dfrt.merge(dfnodes, how='left', left_on='obj', right_on='id')
+
+    # May 2023
+    # Set a default predicate to capture nodes without predicates.
+    dfrt = dfrt.fillna(value={'pred': 'no predicate'})
+
+    # ---------------------------------
+    # Identify relationship properties that do not have inverses.
+    # 1. Group relationship properties by predicate, using count.
+    #    ('pred' here describes the relationship between relationship properties.)
+    dfpred = dfrt.groupby(['id_x', 'pred']).count().reset_index()
+
+    # 2. Identify the relationships for which the set of predicates does not include "inverseOf".
+    listinv = dfpred[dfpred['pred'] == 'inverseOf']['id_x'].to_list()
+    listnoinv = dfpred[~dfpred['id_x'].isin(listinv)]['id_x'].to_list()
+    dfnoinv = dfrt.copy()
+    dfnoinv = dfnoinv[dfnoinv['id_x'].isin(listnoinv)]
+
+    # 3. Rename column names to match the relationtriples frame. (Column names are described
+    #    farther down.)
+    dfnoinv = dfnoinv[['id_x', 'lbl_x', 'id_y', 'lbl_y']].rename(
+        columns={'id_x': 'IRI', 'lbl_x': 'relation_label_RO', 'id_y': 'inverse_IRI', 'lbl_y': 'inverse_RO'})
+    # The inverses are undefined.
+    dfnoinv['inverse_IRI'] = np.nan
+    dfnoinv['inverse_RO'] = np.nan
+
+    # ---------------------------------
+    # Look for members of incomplete inverse pairs--i.e., relationship properties that are
+    # the *object* of an inverseOf edge, but not the corresponding *subject* of an inverseOf edge.
+    #
+    # 1. Filter edges to inverseOf.
+    dfedgeinv = dfedges[dfedges['pred'] == 'inverseOf']
+
+    # 2. Find all relation properties that are objects of inverseOf edges.
+    dfnoinv = dfnoinv.merge(dfedgeinv, how='left', left_on='IRI', right_on='obj')
+
+    # 3. Get the label for the relation properties that are subjects of inverseOf edges.
+    dfnoinv = dfnoinv.merge(dfnodes, how='left', left_on='sub', right_on='id')
+    dfnoinv['inverse_IRI'] = np.where(dfnoinv['lbl'].isnull(), dfnoinv['inverse_IRI'], dfnoinv['id'])
+    dfnoinv['inverse_RO'] = np.where(dfnoinv['lbl'].isnull(), dfnoinv['inverse_RO'], dfnoinv['lbl'])
+    dfnoinv = dfnoinv[['IRI', 'relation_label_RO', 'inverse_IRI', 'inverse_RO']]
+
+    # ---------------------------------
+    # Filter the base triples frame to just those relationship properties that have inverses.
+    # This step eliminates relationship properties related by relationships such as "subPropertyOf".
+    dfrt = dfrt[dfrt['pred'] == 'inverseOf']
+
+    # Rename column names.
+    # Column names will be:
+    # IRI - the IRI for the relationship property
+    # relation_label_RO - the label for the relationship property
+    # inverse_RO - the label of the inverse relationship property
+    # inverse_IRI - IRI for the inverse relationship (This will be dropped.)
+    dfrt = dfrt[['id_x', 'lbl_x', 'id_y', 'lbl_y']].rename(
+        columns={'id_x': 'IRI', 'lbl_x': 'relation_label_RO', 'id_y': 'inverse_IRI', 'lbl_y': 'inverse_RO'})
+
+    # Add triples for problematic relationship properties--i.e., without inverses or from incomplete pairs.
+    dfrt = pd.concat([dfrt, dfnoinv], ignore_index=True).drop_duplicates(subset=['IRI'])
+
+    # Convert stings for labels for relationships to expected delimiting.
+    dfrt['relation_label_RO'] = \
+        dfrt['relation_label_RO'].str.replace(' ', '_').str.split('/').str[-1]
+    dfrt['inverse_RO'] = dfrt['inverse_RO'].str.replace(' ', '_').str.split('/').str[-1]
+
+    dfrt = dfrt.drop(columns='inverse_IRI')
+
+    # March 2024 Cast IRI to lowercase.
+    dfrt['IRI'] = dfrt['IRI'].str.lower()
+
+    return dfrt.reset_index(drop=True)
+
+
+def get_ro_label(iri: str, cachedir: str = None) -> str:
+
+    # Returns the label of a relationship property in RO, or an empty string if the property is not in RO.
+
+    for node in get_ro_json(cachedir)['graphs'][0].get('nodes', []):
+        if node.get('id') == iri:
+            return node.get('lbl')
+    return ''
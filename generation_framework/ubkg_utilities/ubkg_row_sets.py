@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for set-membership tests of rows--e.g., to find the rows of an ingestion that are not already in an
+# ontology CSV.
+
+# The OWLNETS-UMLS-GRAPH script appends to an ontology CSV only the rows that are not already in it. A left merge of
+# the new rows with the existing rows (with indicator=True, keeping the rows that are left_only) builds a hash table
+# of all of the existing rows and a joined frame with every column of both frames.
+
+# A row set is instead a sorted array of 64-bit fingerprints of the existing rows, with 8 bytes per distinct row.
+# New rows are fingerprinted in the same way and probed against the array with a binary search, so the memory for
+# the test beyond the row set is proportional to the number of new rows.
+
+# Each column of a row is hashed with pandas.util.hash_array, and the column hashes are combined in order.
+# Strings in columns of object and string dtypes hash identically, so frames read with string dtypes can be compared
+# with frames built by the script.
+
+# Because rows are compared by 64-bit fingerprint, there is a very small probability (approximately rows^2/2^65) that
+# a new row will be dropped because its fingerprint collides with that of a different existing row. The other
+# fingerprint indexes of the generation framework (the row index of ubkg_clean_csv and the term index of
+# ubkg_term_index) have the same probability of a collision.
+
+import numpy as np
+import pandas as pd
+
+# Multiplier for combining the hashes of the columns of a row (the 64-bit FNV prime).
+ROW_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def get_column_hashes(values: pd.Series) -> np.ndarray:
+
+    # Returns the array of the 64-bit hashes of the values of a column.
+
+    if pd.api.types.is_integer_dtype(values.dtype) and not pd.api.types.is_extension_array_dtype(values.dtype):
+        # Encoded identifiers (see ubkg_identifiers) are hashed as integers.
+        return pd.util.hash_array(values.to_numpy())
+    return pd.util.hash_array(values.to_numpy(dtype=object), categorize=True)
+
+
+def get_row_fingerprints(df: pd.DataFrame, columns: list = None) -> np.ndarray:
+
+    # Returns the array of the 64-bit fingerprints of the rows of a DataFrame.
+    # Arguments:
+    #   df: DataFrame
+    #   columns: (optional) the columns to fingerprint, in order. The default is all of the columns of df.
+
+    if columns is None:
+        columns = df.columns.to_list()
+
+    fingerprints = np.zeros(len(df), dtype=np.uint64)
+    for column in columns:
+        fingerprints = fingerprints * ROW_HASH_MULTIPLIER ^ get_column_hashes(df[column])
+    return fingerprints
+
+
+def build_row_set(df: pd.DataFrame, columns: list = None) -> np.ndarray:
+
+    # Builds the row set of a DataFrame.
+    # Arguments:
+    #   df: DataFrame of existing rows
+    #   columns: (optional) the columns to compare, in order. The default is all of the columns of df.
+
+    # Returns: the sorted array of the distinct fingerprints of the rows.
+
+    return np.unique(get_row_fingerprints(df=df, columns=columns))
+
+
+def is_in_row_set(rowset: np.ndarray, df: pd.DataFrame, columns: list = None) -> np.ndarray:
+
+    # Tests the rows of a DataFrame for membership in a row set.
+    # Arguments:
+    #   rowset: row set from build_row_set
+    #   df: DataFrame of new rows
+    #   columns: the columns to compare, in the order used to build the row set. The default is all of the columns
+    #            of df.
+
+    # Returns: a boolean array, with True for each row of df that is in the row set.
+
+    return contains_fingerprints(rowset=rowset, fingerprints=get_row_fingerprints(df=df, columns=columns))
+
+
+def contains_fingerprints(rowset: np.ndarray, fingerprints: np.ndarray) -> np.ndarray:
+
+    # Tests fingerprints for membership in a sorted array of fingerprints (e.g., a row set), with a binary search.
+    # Returns: a boolean array, with True for each fingerprint that is in the array.
+
+    if len(rowset) == 0:
+        return np.zeros(len(fingerprints), dtype=bool)
+    pos = np.minimum(np.searchsorted(rowset, fingerprints), len(rowset) - 1)
+    return np.asarray(rowset[pos] == fingerprints)
+
+
+def merge_fingerprints(rowset: np.ndarray, fingerprints: np.ndarray) -> np.ndarray:
+
+    # Returns a sorted array of fingerprints (e.g., a row set) with new fingerprints merged in. The existing array is
+    # not sorted again: the distinct new fingerprints that are not already in it are inserted at their positions.
+
+    new = np.unique(fingerprints)
+    new = new[~contains_fingerprints(rowset=rowset, fingerprints=new)]
+    return np.insert(np.asarray(rowset), np.searchsorted(rowset, new), new)
+
+
+def select_new_rows(df: pd.DataFrame, rowset: np.ndarray, columns: list = None) -> pd.DataFrame:
+
+    # Returns the rows of a DataFrame that are not in a row set, in their original order--i.e., the equivalent of a
+    # left merge with the existing rows that keeps the rows that are left_only.
+    # Arguments:
+    #   df: DataFrame of new rows
+    #   rowset: row set from build_row_set
+    #   columns: the columns to compare, in the order used to build the row set. The default is all of the columns
+    #            of df.
+
+    return df.loc[~is_in_row_set(rowset=rowset, df=df, columns=columns)]
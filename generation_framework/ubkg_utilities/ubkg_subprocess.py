@@ -1,5 +1,7 @@
 #!/usr/bin/env python
 # coding: utf-8
+import gc
+import runpy
 import shlex
 import subprocess
 import sys
@@ -21,3 +23,28 @@ def call_subprocess(command_line_str: str) -> None:
         sys.exit(1)
 
     return
+
+def call_script_in_process(command_line_str: str) -> None:
+
+    # OCTOBER 2026
+    # Runs a Python script in the current process instead of a subprocess, so that modules imported by the
+    # script--and any state that these modules keep, such as the in-memory cache of ubkg_csv_cache--persist
+    # between calls.
+    # The command line is in the same format as for call_subprocess, with the script as the first argument.
+    # As with call_subprocess, an error in the script exits the calling process.
+
+    runargs = shlex.split(command_line_str)
+    argv = sys.argv
+    sys.argv = runargs
+    try:
+        runpy.run_path(runargs[0], run_name='__main__')
+    except SystemExit as e:
+        if e.code not in [None, 0]:
+            print(f'ERROR from script {runargs} with exit code {e.code}.')
+            sys.exit(1)
+    finally:
+        sys.argv = argv
+        # Release the DataFrames created by the script.
+        gc.collect()
+
+    return
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# OCTOBER 2026
+# UBKG functions for maintaining an index of the terms in SUIs.csv.
+
+# SUIs.csv has one column (name:ID) that contains every term string in the UBKG--tens of millions of strings for a
+# context that includes the UMLS. The OWLNETS-UMLS-GRAPH script only needs to know which of the labels and synonyms
+# of an ingestion are already terms, so it checks them against the index instead of reading SUIs.csv into a
+# DataFrame.
+
+# The term index is a sorted array of the distinct 64-bit fingerprints of the terms (see ubkg_row_sets), with 8 bytes
+# per term. It is written alongside the CSV, in the same way as the row index of ubkg_clean_csv:
+# 1. a NumPy array of the sorted fingerprints (extension .termhash.npy), which is read with memory mapping
+# 2. a JSON file (extension .termhash.json) with the byte offset of the end of the CSV that was indexed, the header
+#    of the CSV, and a hash of the bytes that precede the offset.
+# When the index is read, only the rows that were appended to the CSV after the offset are parsed, in chunks. If the
+# CSV no longer matches the index--e.g., because it was replaced--the index is rebuilt from the entire CSV.
+
+# Terms that the script appends to SUIs.csv during an ingestion are added to the index in memory (add_terms), and
+# are written to the index file the next time that the index is read. The deduplication of SUIs.csv at the end of an
+# ingestion only rewrites rows after the offset of the index, so the index remains valid.
+
+# All values are read as strings; strings such as NA are terms. Empty values are not terms.
+
+# Terms are compared by fingerprint. (See ubkg_row_sets for the probability of a collision.)
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+import ubkg_logging as ulog
+import ubkg_clean_csv as uclean
+import ubkg_csv_cache as ucache
+import ubkg_row_sets as urowsets
+
+# Number of rows of the CSV parsed at a time when the index is built or extended.
+TERM_INDEX_CHUNK_ROWS = 1000000
+
+# Indexes kept in memory between SABs when the OWLNETS-UMLS-GRAPH script runs in process, keyed by CSV path.
+INDEX_MEMORY = {}
+
+
+def get_term_index_paths(csvpath: str) -> tuple[str, str]:
+    # Returns the paths to the sidecar files of the term index for a CSV.
+    return csvpath + '.termhash.npy', csvpath + '.termhash.json'
+
+
+def get_term_fingerprints(terms: pd.Series) -> np.ndarray:
+    # Returns the array of the fingerprints of a Series of terms.
+    return urowsets.get_column_hashes(terms)
+
+
+def read_term_index_store(csvpath: str, header: str) -> dict:
+
+    # Reads the persisted term index for a CSV.
+    # Returns the index, or None if the index does not exist or no longer matches the CSV.
+
+    npypath, jsonpath = get_term_index_paths(csvpath)
+    if not (os.path.exists(npypath) and os.path.exists(jsonpath)):
+        return None
+
+    with open(jsonpath, 'r') as fp:
+        meta = json.load(fp)
+
+    if meta['header'] != header or not ucache.csv_matches(csvpath=csvpath, offset=meta['offset'],
+                                                          header=meta['header'], check=meta['check']):
+        return None
+
+    return {'offset': meta['offset'], 'header': meta['header'], 'check': meta['check'],
+            'fingerprints': np.load(npypath, mmap_mode='r'), 'added': np.zeros(0, dtype=np.uint64)}
+
+
+def write_term_index_store(csvpath: str, index: dict):
+
+    # Writes the term index for a CSV.
+
+    npypath, jsonpath = get_term_index_paths(csvpath)
+    np.save(npypath + '.tmp.npy', index['fingerprints'])
+    os.replace(npypath + '.tmp.npy', npypath)
+    meta = {'offset': index['offset'], 'header': index['header'], 'check': index['check']}
+    with open(jsonpath + '.tmp', 'w') as fp:
+        json.dump(meta, fp)
+    os.replace(jsonpath + '.tmp', jsonpath)
+
+
+def read_term_index(csvpath: str, in_memory: bool = False) -> dict:
+
+    # Reads the term index of a CSV of terms (e.g., SUIs.csv), indexing the rows appended since the index was last
+    # read.
+
+    # Arguments:
+    #   csvpath: full path to the CSV. Terms are in the first column.
+    #   in_memory: keep the index in INDEX_MEMORY for the next read in the same process
+
+    file_size = os.path.getsize(csvpath)
+    with open(csvpath, 'rb') as fp:
+        header = fp.readline().decode('utf-8')
+
+    index = INDEX_MEMORY.pop(csvpath, None)
+    if index is not None and not ucache.csv_matches(csvpath=csvpath, offset=index['offset'], header=index['header'],
+                                                    check=index['check']):
+        index = None
+    if index is None:
+        index = read_term_index_store(csvpath=csvpath, header=header)
+    if index is None:
+        ulog.print_and_logger_info(f'-- Building term index for {csvpath}...')
+        index = {'offset': len(header.encode('utf-8')), 'header': header, 'check': None,
+                 'fingerprints': np.zeros(0, dtype=np.uint64)}
+
+    # Terms added in memory are in the CSV after the offset, so they are indexed again from the CSV.
+    index['added'] = np.zeros(0, dtype=np.uint64)
+
+    if index['offset'] < file_size or index['check'] is None:
+        ulog.print_and_logger_info(f'-- Indexing {file_size - index["offset"]} bytes of terms in {csvpath}...')
+        fingerprints = [np.zeros(0, dtype=np.uint64)]
+        if index['offset'] < file_size:
+            with open(csvpath, 'rb') as fp:
+                fp.seek(index['offset'])
+                for chunk in pd.read_csv(fp, dtype=str, header=None, usecols=[0], keep_default_na=False,
+                                         chunksize=TERM_INDEX_CHUNK_ROWS):
+                    terms = chunk[0]
+                    fingerprints.append(np.unique(get_term_fingerprints(terms[terms != ''])))
+        # The indexed fingerprints are already sorted, so the new fingerprints are merged in instead of sorting all
+        # of the fingerprints again.
+        index['fingerprints'] = urowsets.merge_fingerprints(rowset=index['fingerprints'],
+                                                            fingerprints=np.concatenate(fingerprints))
+        index['offset'] = file_size
+        with open(csvpath, 'rb') as fp:
+            index['check'] = uclean.get_row_index_check(fp, file_size)
+        write_term_index_store(csvpath=csvpath, index=index)
+
+    if in_memory:
+        INDEX_MEMORY[csvpath] = index
+
+    return index
+
+
+def contains_terms(index: dict, terms: pd.Series) -> np.ndarray:
+
+    # Checks a batch of terms against a term index.
+    # Arguments:
+    #   index: index from read_term_index
+    #   terms: Series of terms
+
+    # Returns: a boolean array, with True for each term that is in the index. Null and empty terms are not in the
+    # index.
+
+    fingerprints = get_term_fingerprints(terms)
+    found = urowsets.contains_fingerprints(rowset=index['fingerprints'], fingerprints=fingerprints)
+    found |= urowsets.contains_fingerprints(rowset=index['added'], fingerprints=fingerprints)
+    return found & terms.notna().to_numpy() & (terms != '').to_numpy()
+
+
+def add_terms(index: dict, terms: pd.Series):
+
+    # Adds terms that were appended to the CSV to a term index in memory.
+
+    terms = terms.dropna()
+    index['added'] = urowsets.merge_fingerprints(rowset=index['added'],
+                                                 fingerprints=get_term_fingerprints(terms[terms != '']))